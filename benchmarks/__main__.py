@@ -0,0 +1,185 @@
+"""Run the microbenchmark suite, save baselines and compare against them.
+
+Run with::
+
+    python -m benchmarks run
+    python -m benchmarks save
+    python -m benchmarks compare
+
+``save`` writes the results to a baseline file, by default
+``.benchmarks/baseline.json``. ``compare`` runs the suite again and exits
+with status 1 if any case got slower than its baseline by more than the
+threshold, so it can gate a release.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from typing import Dict, Optional
+
+from benchmarks.suite import SkipCase, measure, select
+
+DEFAULT_BASELINE = os.path.join(".benchmarks", "baseline.json")
+DEFAULT_THRESHOLD = 0.2
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e3), ("us", 1e6)):
+        if seconds * scale >= 1:
+            return f"{seconds * scale:.2f}{unit}"
+    return f"{seconds * 1e9:.0f}ns"
+
+
+def environment() -> Dict[str, str]:
+    """What the results depend on besides the code."""
+    try:
+        import numpy
+
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = "missing"
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "numpy": numpy_version,
+    }
+
+
+def run_suite(patterns, repeat: int) -> Dict[str, float]:
+    """Run the selected cases, printing each result as it comes in.
+    :return: The best seconds per run of every case that ran.
+    """
+    results = {}
+    for bench in select(patterns):
+        try:
+            seconds = measure(bench, repeat)
+        except SkipCase as e:
+            print(f"{bench.name:<52} skipped, {e}")
+            continue
+        results[bench.name] = seconds
+        print(f"{bench.name:<52} {format_time(seconds):>10}")
+    return results
+
+
+def load(path: str) -> dict:
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save(path: str, results: Dict[str, float]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as baseline_file:
+        json.dump(
+            {"environment": environment(), "results": results},
+            baseline_file,
+            indent=2,
+            sort_keys=True,
+        )
+        baseline_file.write("\n")
+
+
+def compare(baseline: dict, results: Dict[str, float], threshold: float) -> int:
+    """Print how every case changed against the baseline.
+    :return: The number of cases that got slower by more than `threshold`.
+    """
+    current = environment()
+    differences = [
+        f"{key}: {value} -> {current.get(key)}"
+        for key, value in baseline.get("environment", {}).items()
+        if current.get(key) != value
+    ]
+    if differences:
+        print("The baseline was saved in a different environment:")
+        for difference in differences:
+            print(f"  {difference}")
+
+    regressions = 0
+    print(f"\n{'case':<52} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, seconds in results.items():
+        before: Optional[float] = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<52} {'':>10} {format_time(seconds):>10}      new")
+            continue
+        change = seconds / before - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(
+            f"{name:<52} {format_time(before):>10} {format_time(seconds):>10}"
+            f" {change:>+8.1%}{flag}"
+        )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Square Game microbenchmarks"
+    )
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="run",
+        choices=("run", "save", "compare", "list"),
+        help="Run the suite, also save it as the baseline, compare it against "
+        "the baseline, or list the cases",
+    )
+    parser.add_argument(
+        "-k",
+        dest="patterns",
+        action="append",
+        help="Only run cases with this in their name, can be repeated",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Repeats of each case, the best one is kept",
+    )
+    parser.add_argument(
+        "--baseline", default=DEFAULT_BASELINE, help="Baseline file to use"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Slowdown that counts as a regression, 0.2 is 20%% slower",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for bench in select(args.patterns):
+            print(bench.name)
+        return 0
+
+    baseline = None
+    if args.command == "compare":
+        try:
+            baseline = load(args.baseline)
+        except FileNotFoundError:
+            print(f"No baseline at {args.baseline}, save one first", file=sys.stderr)
+            return 2
+
+    results = run_suite(args.patterns, args.repeat)
+
+    if args.command == "save":
+        if args.patterns and os.path.exists(args.baseline):
+            # Only update the cases that ran
+            results = {**load(args.baseline)["results"], **results}
+        save(args.baseline, results)
+        print(f"\nSaved {len(results)} results to {args.baseline}")
+    elif baseline is not None:
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n{regressions} regressions over {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
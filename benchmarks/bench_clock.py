@@ -0,0 +1,53 @@
+"""Schedule, run and cancel thousands of per client timers on the server Clock.
+
+Every timer is a soft interval, like a per client timeout, so each one is
+placed by the soft scheduler. The clock runs on a fake time source with a
+few long stalls, which makes late timers go through soft rescheduling too.
+
+Run with::
+
+    python -m benchmarks.bench_clock
+"""
+import random
+import time
+
+from square.server.clock import Clock
+
+
+def run_timers(count, seconds=5.0, frame=1 / 60):
+    now = [0.0]
+    clock = Clock(time_function=lambda: now[0])
+    rng = random.Random(count)
+    timers = [lambda dt: None for _ in range(count)]
+
+    start = time.perf_counter()
+    for timer in timers:
+        clock.schedule_interval_soft(timer, rng.uniform(0.5, 2.0))
+    scheduled = time.perf_counter()
+
+    frames = int(seconds / frame)
+    for i in range(frames):
+        # A stall every second, long enough to make timers miss their slot
+        now[0] += 0.25 if i % 60 == 59 else frame
+        clock.tick()
+    ticked = time.perf_counter()
+
+    for timer in timers:
+        clock.unschedule(timer)
+    unscheduled = time.perf_counter()
+
+    return scheduled - start, ticked - scheduled, unscheduled - ticked
+
+
+def run(counts=(1000, 5000, 20000)):
+    print(f"{'timers':>7} {'schedule':>10} {'5s ticks':>10} {'unschedule':>11}")
+    for count in counts:
+        schedule, tick, unschedule = run_timers(count)
+        print(
+            f"{count:>7} {schedule * 1000:>8.1f}ms {tick * 1000:>8.1f}ms"
+            f" {unschedule * 1000:>9.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    run()
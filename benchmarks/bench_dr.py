@@ -0,0 +1,104 @@
+"""Compare DRProcessor over per entity components and over a ColumnStore.
+
+Both worlds get the same remote players and the same snapshots, a few of
+them far enough away to snap, and are stepped side by side. After every
+step the positions of the two worlds must be identical, otherwise the run
+stops with an AssertionError.
+
+Run with::
+
+    python -m benchmarks.bench_dr
+"""
+import random
+import timeit
+
+from square.client.components import DR_FIELDS, ColumnDRComponent, DRComponent
+from square.client.processors import DRProcessor
+from square.common import esper
+from square.common.components import (
+    ColumnPhysicsComponent,
+    ColumnTransformComponent,
+    PhysicsComponent,
+    TransformComponent,
+)
+from square.common.esper import columns
+
+DELTA_TIMES = (1 / 60, 1 / 30, 0.1)
+
+
+def make_world(count, columnar, seed=1):
+    rng = random.Random(seed)
+    world = esper.World()
+    store = None
+    if columnar:
+        store = esper.ColumnStore("x", "y", "vx", "vy", *DR_FIELDS)
+    world.add_processor(DRProcessor(store))
+
+    for _ in range(count):
+        x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+        vx, vy = rng.choice((-3, 0, 3)), rng.choice((-3, 0, 3))
+        # Every tenth snapshot is far enough away to snap
+        jump = 50.0 if rng.random() < 0.1 else rng.uniform(-5, 5)
+        snapshot = {
+            "position": (x + jump, y - jump),
+            "velocity": (rng.uniform(-3, 3), rng.uniform(-3, 3)),
+            "acceleration": (rng.uniform(-30, 30), rng.uniform(-30, 30)),
+        }
+        if store is None:
+            world.create_entity(
+                TransformComponent(x, y),
+                PhysicsComponent(vx, vy),
+                DRComponent(**snapshot),
+            )
+            continue
+        entity = world.create_entity()
+        store.add(entity, x=x, y=y, vx=vx, vy=vy)
+        dr_comp = ColumnDRComponent(store, entity)
+        for name, value in snapshot.items():
+            setattr(dr_comp, name, value)
+        world.add_component(
+            entity, ColumnTransformComponent(store, entity), TransformComponent
+        )
+        world.add_component(
+            entity, ColumnPhysicsComponent(store, entity), PhysicsComponent
+        )
+        world.add_component(entity, dr_comp, DRComponent)
+    return world
+
+
+def positions(world):
+    return {
+        ent: (transform.x, transform.y)
+        for ent, transform in world.get_component(TransformComponent)
+    }
+
+
+def check(count):
+    """Step both worlds through every delta time, excluding one player like
+    the client does with its own, and compare them after each step.
+    """
+    scalar = make_world(count, False)
+    columnar = make_world(count, True)
+    excludes = [count // 2]
+    for delta_time in DELTA_TIMES * 3:
+        scalar.process(delta_time=delta_time, excludes=excludes)
+        columnar.process(delta_time=delta_time, excludes=excludes)
+        assert positions(scalar) == positions(columnar), "Projections differ"
+
+
+def run(counts=(100, 1000, 10000), number=20):
+    backend = "numpy" if columns._np is not None else "array"
+    print(f"{'entities':>9} {'storage':>14} {'steps/s':>10}")
+    for count in counts:
+        check(count)
+        for name, columnar in (("components", False), (f"columns/{backend}", True)):
+            world = make_world(count, columnar)
+            elapsed = timeit.timeit(
+                lambda: world.process(delta_time=1 / 60, excludes=[0]),
+                number=number,
+            )
+            print(f"{count:>9} {name:>14} {number / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,60 @@
+"""Compare the dict backed esper.World with esper.ArchetypeWorld.
+
+Run with::
+
+    python -m benchmarks.bench_esper
+"""
+import timeit
+
+from square.common import esper
+from square.common.components import PhysicsComponent, TransformComponent
+
+
+class Tag:
+    pass
+
+
+def make_world(world_class, count):
+    world = world_class()
+    for i in range(count):
+        world.create_entity(TransformComponent(i, i), PhysicsComponent(i, i))
+    return world
+
+
+def iterate(world):
+    for _, (transform, phys) in world.get_components(
+        TransformComponent, PhysicsComponent
+    ):
+        transform.x += phys.velocity[0]
+
+
+def churn(world):
+    """Tag and untag a tenth of the entities, invalidating every query."""
+    for entity, _ in world.get_component(TransformComponent)[::10]:
+        world.add_component(entity, Tag())
+    for entity, _ in world.get_component(Tag):
+        world.remove_component(entity, Tag)
+    iterate(world)
+
+
+def run(counts=(1000, 10000, 100000), number=20):
+    print(
+        f"{'entities':>9} {'world':>15} {'create/s':>10} {'iter/s':>10}"
+        f" {'churn/s':>10}"
+    )
+    for count in counts:
+        for world_class in (esper.World, esper.ArchetypeWorld):
+            create = timeit.timeit(lambda: make_world(world_class, count), number=1)
+            world = make_world(world_class, count)
+            iterate(world)
+            step = timeit.timeit(lambda: iterate(world), number=number)
+            rounds = max(1, number // 4)
+            changed = timeit.timeit(lambda: churn(world), number=rounds)
+            print(
+                f"{count:>9} {world_class.__name__:>15} {count / create:>10.0f}"
+                f" {number / step:>10.1f} {rounds / changed:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    run()
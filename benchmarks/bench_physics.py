@@ -0,0 +1,37 @@
+"""Compare PhysicsProcessor over per entity components and over a ColumnStore.
+
+Run with::
+
+    python -m benchmarks.bench_physics
+"""
+import timeit
+
+from square.common.application import Application
+from square.common.components import PhysicsComponent
+from square.common.esper import columns
+
+
+def make_application(count, columnar):
+    application = Application(columnar=columnar)
+    for i in range(count):
+        player = application.add_player(str(i), float(i), float(i))
+        phys = application.world.component_for_entity(player, PhysicsComponent)
+        phys.velocity[0] = 3.0
+        phys.velocity[1] = -3.0
+    return application
+
+
+def run(counts=(1000, 10000, 100000), number=20):
+    backend = "numpy" if columns._np is not None else "array"
+    print(f"{'entities':>9} {'storage':>14} {'steps/s':>10}")
+    for count in counts:
+        for name, columnar in (("components", False), (f"columns/{backend}", True)):
+            world = make_application(count, columnar).world
+            elapsed = timeit.timeit(
+                lambda: world.process(delta_time=1 / 60), number=number
+            )
+            print(f"{count:>9} {name:>14} {number / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,113 @@
+"""Compare the binary snapshot codec against the old semicolon text format.
+
+Binary keyframes carry every player, binary deltas are encoded against the
+previous snapshot with a tenth of the players moving.
+
+Run with::
+
+    python -m benchmarks.bench_snapshot
+"""
+import random
+import timeit
+
+from square.common.networking import SnapshotDecoder, encode_snapshot, quantize
+
+
+def make_players(count):
+    rng = random.Random(count)
+    return [
+        (
+            f"127.0.0.1:{20000 + net_id}",
+            net_id,
+            rng.choice((-3.0, 0.0, 3.0)),
+            rng.choice((-3.0, 0.0, 3.0)),
+            rng.uniform(0, 800),
+            rng.uniform(0, 600),
+        )
+        for net_id in range(count)
+    ]
+
+
+def text_encode(players):
+    """The text format send_udp used before the binary codec."""
+    data = ""
+    for client_id, _, vx, vy, x, y in players:
+        data += f"{client_id};"
+        data += f"{vx};{vy};"
+        data += f"{x};{y};"
+        data += ";"
+    return data[:-2].encode()
+
+
+def text_decode(datagram):
+    """The text parsing process_server_update used before the binary codec."""
+    players = []
+    for player_data in datagram.decode("utf-8").split(";;"):
+        player_data = player_data.split(";")
+        players.append((player_data[0], *[float(val) for val in player_data[1:]]))
+    return players
+
+
+def binary_decode(datagrams, baseline=None):
+    decoder = SnapshotDecoder()
+    if baseline is not None:
+        for datagram in baseline:
+            decoder.feed(datagram)
+    for datagram in datagrams:
+        decoder.feed(datagram)
+
+
+def moved(state, fraction=0.1):
+    """Copy of `state` with the first `fraction` of the entities moved."""
+    moving = int(len(state) * fraction)
+    return {
+        net_id: (vx, vy, x + 48, y) if net_id < moving else (vx, vy, x, y)
+        for net_id, (vx, vy, x, y) in state.items()
+    }
+
+
+def run(counts=(10, 100, 500), number=200):
+    print(
+        f"{'players':>8} {'format':>7} {'bytes':>8} "
+        f"{'encode/s':>10} {'decode/s':>10}"
+    )
+    for count in counts:
+        players = make_players(count)
+        state = {player[1]: quantize(*player[2:]) for player in players}
+        next_state = moved(state)
+
+        text = text_encode(players)
+        keyframe = encode_snapshot(1, state)
+        delta = encode_snapshot(2, next_state, 1, state)
+        results = (
+            (
+                "text",
+                len(text),
+                timeit.timeit(lambda: text_encode(players), number=number),
+                timeit.timeit(lambda: text_decode(text), number=number),
+            ),
+            (
+                "key",
+                sum(len(datagram) for datagram in keyframe),
+                timeit.timeit(lambda: encode_snapshot(1, state), number=number),
+                timeit.timeit(lambda: binary_decode(keyframe), number=number),
+            ),
+            (
+                "delta",
+                sum(len(datagram) for datagram in delta),
+                timeit.timeit(
+                    lambda: encode_snapshot(2, next_state, 1, state), number=number
+                ),
+                # Includes decoding the keyframe the delta is applied to
+                timeit.timeit(lambda: binary_decode(delta, keyframe), number=number),
+            ),
+        )
+        for name, size, encode_time, decode_time in results:
+            print(
+                f"{count:>8} {name:>7} {size:>8} "
+                f"{number / encode_time:>10.0f} {number / decode_time:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,134 @@
+"""Loopback load test of the server's UDP receive and send paths.
+
+The receive test floods the server socket from a few client sockets while a
+receiver thread hands input datagrams off to a queue, once with the old one datagram
+per wakeup loop and once with `DatagramReader`. The send test sends a tick's
+worth of snapshots with the old per player address parsing and with
+`DatagramSender`.
+
+Run with::
+
+    python -m benchmarks.bench_udp_io
+"""
+import queue
+import socket
+import threading
+import time
+
+from square import BUFFER_SIZE
+from square.common.networking import decode_inputs, encode_inputs
+from square.server.networking import DatagramReader, DatagramSender
+
+SENDERS = 8
+DATAGRAMS = 20000
+
+
+def udp_socket(address=("127.0.0.1", 0)):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+    sock.bind(address)
+    return sock
+
+
+def receive_per_datagram(sock, out, stop):
+    """The receive loop UDPReceiver used before batching."""
+    while not stop.is_set():
+        try:
+            data, address = sock.recvfrom(BUFFER_SIZE)
+        except socket.timeout:
+            continue
+        out.put((f"{address[0]}:{address[1]}", decode_inputs(data)))
+
+
+def receive_batched(sock, out, stop):
+    reader = DatagramReader(sock, decode_inputs)
+    while not stop.is_set():
+        try:
+            batch = reader.drain()
+        except socket.timeout:
+            continue
+        if batch:
+            out.put(batch)
+
+
+def run_receive(receiver, batched):
+    server = udp_socket()
+    server.settimeout(0.1)
+    address = server.getsockname()
+    clients = [udp_socket() for _ in range(SENDERS)]
+    datagram = encode_inputs(4, 1, b"\x02\x02\x06\x06")
+
+    out = queue.Queue()
+    stop = threading.Event()
+    thread = threading.Thread(target=receiver, args=(server, out, stop))
+    thread.start()
+
+    received = 0
+    start = time.perf_counter()
+    for i in range(DATAGRAMS):
+        clients[i % SENDERS].sendto(datagram, address)
+    # Drain like the game loop does, until the flood has been handed off
+    deadline = time.perf_counter() + 5
+    while received < DATAGRAMS and time.perf_counter() < deadline:
+        try:
+            item = out.get(timeout=0.2)
+        except queue.Empty:
+            break
+        received += len(item) if batched else 1
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    thread.join()
+    for sock in clients + [server]:
+        sock.close()
+    return received, elapsed
+
+
+def run_send(players=500, ticks=20):
+    server = udp_socket()
+    clients = [udp_socket() for _ in range(players)]
+    ids = [f"{host}:{port}" for host, port in (c.getsockname() for c in clients)]
+    datagram = b"\0" * 200
+    results = []
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for id in ids:
+            id_split = id.split(":")
+            server.sendto(datagram, (id_split[0], int(id_split[1])))
+    results.append(("per datagram", players * ticks / (time.perf_counter() - start)))
+
+    sender = DatagramSender(server)
+    addresses = {}
+    for id in ids:
+        host, _, port = id.rpartition(":")
+        addresses[id] = (host, int(port))
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sender.send_batch([(datagram, addresses[id]) for id in ids])
+    results.append(("batched", players * ticks / (time.perf_counter() - start)))
+
+    for sock in clients + [server]:
+        sock.close()
+    return results
+
+
+def run():
+    print(f"receive: {DATAGRAMS} datagrams from {SENDERS} sockets")
+    for name, receiver, batched in (
+        ("per datagram", receive_per_datagram, False),
+        ("batched", receive_batched, True),
+    ):
+        received, elapsed = run_receive(receiver, batched)
+        print(
+            f"  {name:>12}: {received / elapsed:>10.0f} packets/s "
+            f"({received} received)"
+        )
+
+    print("send: 500 players, 20 ticks")
+    for name, rate in run_send():
+        print(f"  {name:>12}: {rate:>10.0f} packets/s")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,308 @@
+"""Microbenchmarks of the hot paths of the client and the server.
+
+Every case is registered with `case` under a dotted name. A case is a setup
+function returning the statement to time. Setup runs again before every
+repeat, so statements are free to use up what it built, like deleting every
+entity of a world. Each repeat times `number` runs of the statement, and the
+best repeat is kept, as the one least disturbed by the rest of the machine.
+
+See ``python -m benchmarks --help`` for running the suite, saving baselines
+and comparing against them.
+"""
+import random
+import timeit
+from collections import deque
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from benchmarks.bench_esper import churn, iterate, make_world
+from benchmarks.bench_physics import make_application
+from square.common import esper
+from square.common.components import InputComponent, TransformComponent
+from square.common.networking import (
+    DeltaEncoder,
+    SnapshotDecoder,
+    decode_inputs,
+    dequantize,
+    encode_inputs,
+    quantize,
+)
+from square.common.processors import InputProcessor, PhysicsProcessor
+from square.common.processors.input_processor import DOWN, LEFT, RIGHT, UP
+from square.server.clock import Clock
+
+ENTITIES = 10000
+TIMERS = 5000
+PLAYERS = 500
+CLIENTS = 50
+INPUTS = 30
+FRAME = 1 / 60
+
+
+class SkipCase(Exception):
+    """Raised by the setup of a case that can't run here, with the reason."""
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    # Runs of the statement timed per repeat
+    number: int
+
+
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str, number: int = 1):
+    """Register the decorated setup function as a case named `name`."""
+
+    def register(setup):
+        CASES[name] = Case(name, setup, number)
+        return setup
+
+    return register
+
+
+def measure(bench: Case, repeat: int = 5) -> float:
+    """Best seconds per run of the statement of `bench` over `repeat` repeats.
+    Raises SkipCase if the case can't run here.
+    """
+    best = None
+    for _ in range(repeat):
+        statement = bench.setup()
+        elapsed = timeit.timeit(statement, number=bench.number) / bench.number
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def select(patterns: Optional[Iterable[str]] = None) -> List[Case]:
+    """Cases with any of `patterns` in their name, every case without any."""
+    patterns = list(patterns or ())
+    return [
+        bench
+        for name, bench in CASES.items()
+        if not patterns or any(pattern in name for pattern in patterns)
+    ]
+
+
+# esper
+
+
+def _register_world_cases(world_class):
+    prefix = f"esper.{world_class.__name__}"
+
+    @case(f"{prefix}.create_entity/{ENTITIES}")
+    def create():
+        return lambda: make_world(world_class, ENTITIES)
+
+    @case(f"{prefix}.delete_entities/{ENTITIES}")
+    def delete():
+        world = make_world(world_class, ENTITIES)
+        entities = [entity for entity, _ in world.get_component(TransformComponent)]
+        return lambda: world.delete_entities(entities, immediate=True)
+
+    @case(f"{prefix}.get_components/{ENTITIES}", number=20)
+    def get_components():
+        world = make_world(world_class, ENTITIES)
+        # Time the cached query, not building the cache
+        iterate(world)
+        return lambda: iterate(world)
+
+    @case(f"{prefix}.invalidate/{ENTITIES}", number=5)
+    def invalidate():
+        world = make_world(world_class, ENTITIES)
+        iterate(world)
+        return lambda: churn(world)
+
+
+_register_world_cases(esper.World)
+_register_world_cases(esper.ArchetypeWorld)
+
+
+# clock
+
+
+def _make_clock():
+    now = [0.0]
+    clock = Clock(time_function=lambda: now[0])
+    return clock, now
+
+
+def _make_timers(count: int):
+    rng = random.Random(count)
+    return [(lambda dt: None, rng.uniform(0.5, 2.0)) for _ in range(count)]
+
+
+@case(f"clock.schedule_interval_soft/{TIMERS}")
+def clock_schedule():
+    clock, _ = _make_clock()
+    timers = _make_timers(TIMERS)
+
+    def schedule():
+        for timer, interval in timers:
+            clock.schedule_interval_soft(timer, interval)
+
+    return schedule
+
+
+@case("clock.tick/idle", number=10000)
+def clock_tick_idle():
+    clock, now = _make_clock()
+
+    def tick():
+        now[0] += FRAME
+        clock.tick()
+
+    return tick
+
+
+@case(f"clock.tick/{TIMERS}", number=300)
+def clock_tick():
+    clock, now = _make_clock()
+    for timer, interval in _make_timers(TIMERS):
+        clock.schedule_interval_soft(timer, interval)
+
+    def tick():
+        now[0] += FRAME
+        clock.tick()
+
+    return tick
+
+
+@case(f"clock.unschedule/{TIMERS}")
+def clock_unschedule():
+    clock, _ = _make_clock()
+    timers = _make_timers(TIMERS)
+    for timer, interval in timers:
+        clock.schedule_interval_soft(timer, interval)
+
+    def unschedule():
+        for timer, _ in timers:
+            clock.unschedule(timer)
+
+    return unschedule
+
+
+# processors
+
+
+def _register_physics_case(storage, columnar):
+    @case(f"processors.PhysicsProcessor/{ENTITIES}/{storage}", number=20)
+    def physics():
+        world = make_application(ENTITIES, columnar).world
+        processor = world.get_processor(PhysicsProcessor)
+        return lambda: processor.process(FRAME)
+
+
+_register_physics_case("components", False)
+_register_physics_case("columns", True)
+
+
+@case(f"processors.InputProcessor/{ENTITIES}", number=20)
+def input_processor():
+    application = make_application(ENTITIES, False)
+    world = application.world
+    rng = random.Random(ENTITIES)
+    directions = (0, LEFT, RIGHT, UP, DOWN, LEFT | UP, RIGHT | DOWN)
+    # One command per entity for every run, as if every client kept up
+    for _, inp in world.get_component(InputComponent):
+        inp.commands = deque(
+            (sequence, rng.choice(directions)) for sequence in range(1, 21)
+        )
+    processor = world.get_processor(InputProcessor)
+    return lambda: processor.process(FRAME)
+
+
+def _register_dr_case(storage, columnar):
+    @case(f"processors.DRProcessor/{ENTITIES}/{storage}", number=20)
+    def dead_reckoning():
+        try:
+            from benchmarks.bench_dr import make_world as make_dr_world
+        except ImportError as e:
+            raise SkipCase(f"the client can't be imported: {e}")
+        world = make_dr_world(ENTITIES, columnar)
+        return lambda: world.process(delta_time=FRAME, excludes=[1])
+
+
+_register_dr_case("components", False)
+_register_dr_case("columns", True)
+
+
+# networking
+
+
+def _make_bodies(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [
+        [
+            rng.choice((-3.0, 0.0, 3.0)),
+            rng.choice((-3.0, 0.0, 3.0)),
+            rng.uniform(0, 800),
+            rng.uniform(0, 600),
+        ]
+        for _ in range(count)
+    ]
+
+
+def _move(bodies, sequence: int) -> None:
+    """Move a tenth of the bodies, a different tenth every snapshot."""
+    for body in bodies[sequence % 10 :: 10]:
+        body[2] += body[0]
+        body[3] += body[1]
+
+
+@case(f"net.send_udp/{PLAYERS}x{CLIENTS}", number=20)
+def send_udp():
+    """Quantize every player, then delta encode them for every client, each
+    acknowledging the snapshot before.
+    """
+    bodies = _make_bodies(PLAYERS)
+    encoders = [DeltaEncoder() for _ in range(CLIENTS)]
+    sequence = [0]
+
+    def send():
+        sequence[0] += 1
+        _move(bodies, sequence[0])
+        state = {net_id: quantize(*body) for net_id, body in enumerate(bodies)}
+        for encoder in encoders:
+            encoder.encode(sequence[0], state, sequence[0], sequence[0] * FRAME)
+            encoder.ack(sequence[0])
+
+    return send
+
+
+@case(f"net.process_server_update/{PLAYERS}", number=20)
+def process_server_update():
+    """Decode a keyframe and the deltas after it, then dequantize every
+    player in each of them.
+    """
+    bodies = _make_bodies(PLAYERS)
+    encoder = DeltaEncoder()
+    snapshots = []
+    for sequence in range(1, 21):
+        _move(bodies, sequence)
+        state = {net_id: quantize(*body) for net_id, body in enumerate(bodies)}
+        snapshots.append(encoder.encode(sequence, state, sequence, sequence * FRAME))
+        encoder.ack(sequence)
+    decoder = SnapshotDecoder()
+    remaining = iter(snapshots)
+
+    def receive():
+        for datagram in next(remaining):
+            snapshot = decoder.feed(datagram)
+        for player_data in snapshot.state.values():
+            dequantize(player_data)
+
+    return receive
+
+
+@case(f"net.encode_inputs/{INPUTS}", number=10000)
+def inputs_encode():
+    inputs = [RIGHT | UP] * INPUTS
+    return lambda: encode_inputs(1000, 990, inputs)
+
+
+@case(f"net.decode_inputs/{INPUTS}", number=10000)
+def inputs_decode():
+    datagram = encode_inputs(1000, 990, [RIGHT | UP] * INPUTS)
+    return lambda: decode_inputs(datagram)
@@ -1,12 +1,16 @@
 import argparse
+import asyncio
+import importlib.util
+import logging
+from typing import Optional
 
 
-def launch_client():
+def launch_client(columnar: bool = False, interpolate: bool = False):
     import arcade
 
     import square.client
 
-    window = square.client.Window()
+    window = square.client.Window(columnar=columnar, interpolate=interpolate)
 
     square.client.set_window(window)
     window.show_view(window.views["main_menu"])
@@ -16,31 +20,100 @@ def launch_client():
 def launch_server(
     port: int,
     address: str = "127.0.0.1",
+    interest_radius: float = 500.0,
+    backend: str = "threads",
+    columnar: bool = False,
+    profile: Optional[float] = None,
+    loop: str = "sleep",
+    shards: int = 0,
+    zone_width: float = 1000.0,
 ):
     from square.server import ServerApplication
+    from square.server.sharding import ShardedServer
 
-    server = ServerApplication(
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(name)s: %(message)s"
+    )
+    options = dict(
         address=address,
         port=port,
+        interest_radius=interest_radius,
+        backend=backend,
+        columnar=columnar,
+        profile_interval=profile,
+        loop_mode=loop,
     )
+    if shards:
+        server = ShardedServer(shards=shards, zone_width=zone_width, **options)
+    else:
+        server = ServerApplication(**options)
     server.start()
 
 
+def launch_bots(
+    count: int,
+    port: int,
+    address: str = "127.0.0.1",
+    duration: float = 0.0,
+    interval: float = 5.0,
+):
+    from square.bots import run_swarm
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(name)s: %(message)s"
+    )
+    try:
+        asyncio.run(run_swarm(count, (address, port), duration, interval))
+    except KeyboardInterrupt:
+        pass
+
+
 def launcher():
     parser = argparse.ArgumentParser()
     parser.add_argument("-s", "--server", action="store_true")
     parser.add_argument("-a", "--address", default="127.0.0.1")
     parser.add_argument("-p", "--port", type=int, default=9000)
+    parser.add_argument("-r", "--interest-radius", type=float, default=500.0)
+    parser.add_argument(
+        "-b", "--backend", choices=["threads", "selectors"], default="threads"
+    )
+    parser.add_argument("--columnar", action="store_true")
+    parser.add_argument("--profile", type=float, nargs="?", const=0.0)
+    parser.add_argument("--loop", choices=["sleep", "spin"], default="sleep")
+    parser.add_argument("--interpolate", action="store_true")
+    parser.add_argument("--shards", type=int, default=0)
+    parser.add_argument("--zone-width", type=float, default=1000.0)
+    parser.add_argument("--bots", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=0.0)
+    parser.add_argument("--report-interval", type=float, default=5.0)
 
     args = parser.parse_args()
+    # Without NumPy the columns are plain arrays, slower than the components
+    if args.columnar and importlib.util.find_spec("numpy") is None:
+        parser.error("--columnar needs NumPy, install the numpy extra")
 
-    if args.server:
+    if args.bots:
+        launch_bots(
+            args.bots,
+            address=args.address,
+            port=args.port,
+            duration=args.duration,
+            interval=args.report_interval,
+        )
+    elif args.server:
         launch_server(
             address=args.address,
             port=args.port,
+            interest_radius=args.interest_radius,
+            backend=args.backend,
+            columnar=args.columnar,
+            profile=args.profile,
+            loop=args.loop,
+            shards=args.shards,
+            zone_width=args.zone_width,
         )
     else:
-        launch_client()
+        launch_client(columnar=args.columnar, interpolate=args.interpolate)
 
 
 if __name__ == "__main__":
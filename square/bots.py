@@ -0,0 +1,308 @@
+"""Headless bots for load testing the server.
+
+Every bot joins over TCP like a real client, then sends input commands over
+UDP from a random walk and decodes the snapshots it gets back. All of the
+bots run on a single asyncio loop, so one process can drive a few thousand
+of them. Nothing in here depends on arcade.
+
+Every report interval the swarm logs the packets per second going each way,
+the size of the snapshots received, the latency between sending an input
+command and receiving the first snapshot that includes it, and the timings
+the server reports back in answer to a ``server_stats`` message. The input
+rate is logged against the rate the bots should be sending at, along with
+the steps the swarm dropped, so a swarm too big for its own process isn't
+mistaken for a struggling server.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from square import UDP_SEND_INTERVAL
+from square.common.networking import (
+    SnapshotDecoder,
+    SnapshotError,
+    encode_frame,
+    encode_inputs,
+)
+from square.common.networking.framing import FRAME_HEADER
+from square.common.processors.input_processor import DOWN, LEFT, RIGHT, UP
+from square.common.stats import RollingHistogram
+from square.common.timestep import FixedTimestep
+
+logger = logging.getLogger(__name__)
+
+STEP = 1 / 60
+# Bots send on different steps, like real clients that didn't start together
+SEND_EVERY = max(1, round(UDP_SEND_INTERVAL / STEP))
+INPUT_WINDOW = 60
+# Chance per step of walking off in a new direction
+TURN_CHANCE = 0.02
+# Standing still, or walking in any of the 8 directions
+DIRECTIONS = (0,) + tuple(
+    horizontal | vertical
+    for horizontal in (0, LEFT, RIGHT)
+    for vertical in (0, UP, DOWN)
+    if horizontal | vertical
+)
+# Bots connecting at the same time
+CONNECT_BATCH = 64
+
+Address = Tuple[str, int]
+
+
+class SwarmStats:
+    """Counters shared by every bot, cleared after each report."""
+
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.received_bytes = 0
+        self.snapshot_sizes = RollingHistogram(10000)
+        self.latency = RollingHistogram(10000)
+        self.server: Dict[str, str] = {}
+        # Steps the bots took, and seconds of steps dropped to catch up
+        self.steps = 0
+        self.dropped = 0.0
+
+    def clear(self) -> None:
+        self.sent = 0
+        self.received = 0
+        self.received_bytes = 0
+        self.snapshot_sizes.clear()
+        self.latency.clear()
+        self.steps = 0
+        self.dropped = 0.0
+
+
+class _BotProtocol(asyncio.DatagramProtocol):
+    def __init__(self, bot: "Bot"):
+        self.bot = bot
+
+    def datagram_received(self, data, address):
+        self.bot.on_datagram(data)
+
+
+class Bot:
+    """One headless client.
+
+    :param server: Address of the server's TCP and UDP ports.
+    :param stats: Where the bot counts its traffic.
+    :param rng: Random source for the random walk.
+    """
+
+    def __init__(self, server: Address, stats: SwarmStats, rng: random.Random):
+        self.server = server
+        self.stats = stats
+        self.rng = rng
+        self.connected = False
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+        self.decoder = SnapshotDecoder()
+        self.bits = 0
+        self.sequence = 0
+        self.sent_sequence = 0
+        self.pending: Deque[Tuple[int, int]] = deque(maxlen=INPUT_WINDOW)
+        # When each command was first sent, until a snapshot includes it
+        self.sent_at: Dict[int, float] = {}
+        self.snapshot_bytes = 0
+
+    async def connect(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.reader, self.writer = await asyncio.open_connection(*self.server)
+        # The server sends snapshots to the address of the TCP connection
+        local = self.writer.get_extra_info("sockname")[:2]
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _BotProtocol(self), local_addr=local, remote_addr=self.server
+        )
+        self.connected = True
+
+    async def read_messages(self) -> None:
+        """Handle TCP messages until the server closes the connection."""
+        try:
+            while True:
+                header = await self.reader.readexactly(FRAME_HEADER.size)
+                (size,) = FRAME_HEADER.unpack(header)
+                payload = await self.reader.readexactly(size)
+                self.on_message(payload.decode("utf-8"))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        self.connected = False
+
+    def on_message(self, message: str) -> None:
+        fields = message.split(";;")
+        if fields[0] == "server_stats":
+            self.stats.server = dict(field.split("=", 1) for field in fields[1:])
+
+    def request_server_stats(self) -> None:
+        if self.connected:
+            self.writer.write(encode_frame("server_stats"))
+
+    def step(self) -> None:
+        """Queue this step's input command, sometimes turning."""
+        if self.rng.random() < TURN_CHANCE:
+            self.bits = self.rng.choice(DIRECTIONS)
+        self.sequence += 1
+        self.pending.append((self.sequence, self.bits))
+
+    def send(self, now: float) -> None:
+        """Send every command the server hasn't simulated yet."""
+        if not self.connected:
+            return
+        for sequence in range(self.sent_sequence + 1, self.sequence + 1):
+            self.sent_at[sequence] = now
+        self.sent_sequence = self.sequence
+        self.transport.sendto(
+            encode_inputs(
+                self.sequence, self.decoder.ack, [bits for _, bits in self.pending]
+            )
+        )
+        self.stats.sent += 1
+
+    def on_datagram(self, data: bytes) -> None:
+        now = time.perf_counter()
+        stats = self.stats
+        stats.received += 1
+        stats.received_bytes += len(data)
+        self.snapshot_bytes += len(data)
+        try:
+            snapshot = self.decoder.feed(data)
+        except SnapshotError:
+            return
+        if snapshot is None:
+            return
+        stats.snapshot_sizes.add(self.snapshot_bytes)
+        self.snapshot_bytes = 0
+
+        acked = snapshot.input_sequence
+        while self.pending and self.pending[0][0] <= acked:
+            self.pending.popleft()
+        sent = self.sent_at.get(acked)
+        if sent is not None:
+            stats.latency.add(now - sent)
+        # Commands are sent in order, so the oldest come first
+        sent_at = self.sent_at
+        while sent_at and next(iter(sent_at)) <= acked:
+            del sent_at[next(iter(sent_at))]
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+        if self.writer is not None:
+            self.writer.close()
+        self.connected = False
+
+
+def format_report(stats: SwarmStats, bots: List[Bot], elapsed: float) -> List[str]:
+    """Render the swarm's counters as log lines.
+    The input rate is shown against the target rate of the connected bots.
+    """
+    connected = sum(bot.connected for bot in bots)
+    target = connected / (SEND_EVERY * STEP)
+    dropped_steps = round(stats.dropped / STEP)
+
+    snapshot = "n/a"
+    if len(stats.snapshot_sizes):
+        sizes = stats.snapshot_sizes.summary()
+        snapshot = f"p50={sizes['p50']:.0f}B p99={sizes['p99']:.0f}B"
+    latency = "n/a"
+    if len(stats.latency):
+        summary = stats.latency.summary()
+        latency = " ".join(
+            f"{stat}={summary[stat] * 1000:.1f}ms" for stat in ("p50", "p99", "max")
+        )
+
+    lines = [
+        f"bots={connected}/{len(bots)} up={stats.sent / elapsed:.0f}/{target:.0f}pps"
+        f" down={stats.received / elapsed:.0f}pps"
+        f" {stats.received_bytes / elapsed / 1024:.1f}KiB/s"
+        f" snapshot {snapshot} latency {latency}"
+        f" steps={stats.steps} dropped={dropped_steps}"
+    ]
+    if dropped_steps:
+        lines.append(
+            f"bots fell {dropped_steps} steps behind, the rates above are"
+            " limited by this process rather than the server"
+        )
+    if stats.server:
+        fields = " ".join(f"{k}={v}" for k, v in stats.server.items())
+        lines.append(f"server: {fields}")
+    return lines
+
+
+def advance_swarm(
+    bots: List[Bot], stats: SwarmStats, timestep: FixedTimestep, delta_time: float
+) -> None:
+    """Take the steps `delta_time` is worth, counting them and any dropped
+    in `stats`. Every bot sends on one step in SEND_EVERY, its turn set by
+    its index, so the bots' datagrams are spread evenly over the steps.
+    """
+    dropped = timestep.dropped
+    steps = timestep.advance(delta_time)
+    stats.dropped += timestep.dropped - dropped
+    stats.steps += steps
+    for step in range(timestep.steps - steps, timestep.steps):
+        turn = step % SEND_EVERY
+        clock = time.perf_counter()
+        for index, bot in enumerate(bots):
+            bot.step()
+            if index % SEND_EVERY == turn:
+                bot.send(clock)
+
+
+async def _report(stats: SwarmStats, bots: List[Bot], interval: float):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        # Ask for the server's side shortly before reporting it
+        if bots:
+            bots[0].request_server_stats()
+        await asyncio.sleep(min(0.25, interval / 4))
+        for line in format_report(stats, bots, time.perf_counter() - started):
+            logger.info(line)
+        stats.clear()
+
+
+async def run_swarm(
+    count: int,
+    server: Address,
+    duration: float = 0.0,
+    interval: float = 5.0,
+    seed: Optional[int] = None,
+) -> SwarmStats:
+    """Connect `count` bots to `server` and walk them around.
+
+    :param duration: Seconds to run for, 0 to run until cancelled.
+    :param interval: Seconds between reports.
+    :param seed: Seed of the random walks, for repeatable runs.
+    :return: The counters since the last report.
+    """
+    stats = SwarmStats()
+    rng = random.Random(seed)
+    bots = [Bot(server, stats, random.Random(rng.random())) for _ in range(count)]
+    for start in range(0, count, CONNECT_BATCH):
+        batch = bots[start : start + CONNECT_BATCH]
+        await asyncio.gather(*(bot.connect() for bot in batch))
+    logger.info("%d bots connected to %s:%d", count, *server)
+
+    tasks = [asyncio.create_task(bot.read_messages()) for bot in bots]
+    tasks.append(asyncio.create_task(_report(stats, bots, interval)))
+    timestep = FixedTimestep(STEP)
+    loop = asyncio.get_running_loop()
+    started = last = loop.time()
+    try:
+        while not duration or last - started < duration:
+            await asyncio.sleep(max(0.0, last + STEP - loop.time()))
+            now = loop.time()
+            advance_swarm(bots, stats, timestep, now - last)
+            last = now
+    finally:
+        for task in tasks:
+            task.cancel()
+        for bot in bots:
+            bot.close()
+    return stats
@@ -1,17 +1,37 @@
-import queue
 import socket
-import time
-from typing import Optional
+from collections import deque
+from typing import Deque, Dict, Optional, Set, Tuple
 
 import arcade
 
 import square.client
 from square import UDP_SEND_INTERVAL
-from square.client.components import DRComponent, InputComponent
+from square.client.components import (
+    DR_FIELDS,
+    ColumnDRComponent,
+    DRComponent,
+    SpriteComponent,
+)
 from square.client.networking import TCPReceiver, UDPReceiver
-from square.client.processors import DRProcessor, InputProcessor
+from square.client.processors import (
+    DRProcessor,
+    InterpolationProcessor,
+    SpriteSyncProcessor,
+)
 from square.common.application import Application
-from square.common.components import PhysicsComponent, SpriteComponent
+from square.common.components import InputComponent, TransformComponent
+from square.common.dead_reckoning import record_snapshot
+from square.common.inbox import Inbox
+from square.common.interpolation import SnapshotInterpolator
+from square.common.networking import dequantize, encode_inputs
+from square.common.processors.input_processor import (
+    drop_commands,
+    input_bits,
+    replay_commands,
+)
+
+# Most input commands kept waiting for the server, a second of steps
+INPUT_WINDOW = 60
 
 _application: Optional["ClientApplication"] = None
 
@@ -29,52 +49,67 @@ def get_application() -> "ClientApplication":
 
 
 class ClientApplication(Application):
-    def __init__(self, address):
-        super().__init__()
+    body_fields = Application.body_fields + DR_FIELDS
+
+    def __init__(self, address, columnar: bool = False, interpolate: bool = False):
+        super().__init__(columnar=columnar)
         self.server_address = address
+        self.player_spritelist = arcade.SpriteList()
 
         # Networking Things
         self.my_address = None
         self.my_entity = None
         self.tcp_socket = None
         self.udp_socket = None
-        self.server_message_queue = None
-        self.server_update_queue = None
+        self.server_message_inbox = None
+        self.server_update_inbox = None
         self.tcp_receiver = None
         self.udp_receiver = None
 
-        self.time = None
+        # Maps the server's numeric network ids to player ids
+        self.net_players: Dict[int, str] = {}
+        # Network ids of the players in the latest snapshot
+        self.visible_players: Set[int] = set()
+        self.my_net_id = None
+
+        # Input commands are numbered, and the ones the server has not
+        # simulated yet are replayed on top of every snapshot
+        self.input_sequence = 0
+        self.pending_inputs: Deque[Tuple[int, int]] = deque(maxlen=INPUT_WINDOW)
 
-        self.client_input = {
-            "left": 0,
-            "right": 0,
-            "up": 0,
-            "down": 0,
-        }
+        self.time = None
 
-        self.world.add_processor(InputProcessor())
-        self.world.add_processor(DRProcessor())
+        # Remote players are either dead reckoned ahead of the latest
+        # snapshot, or interpolated a little behind it
+        self.interpolator = None
+        if interpolate:
+            self.interpolator = SnapshotInterpolator()
+            self.world.add_processor(InterpolationProcessor(self.interpolator))
+        else:
+            self.world.add_processor(DRProcessor(self.bodies))
+        # Rendering happens after the simulation has settled for this frame
+        self.world.add_processor(SpriteSyncProcessor(), priority=-1)
 
         square.client.get_window().register_application(self)
 
     def start(self):
 
         # Setup TCP Handling
-        self.server_message_queue = queue.Queue()
+        self.server_message_inbox = Inbox()
         self.tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.tcp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.tcp_socket.connect(self.server_address)
         address = self.tcp_socket.getsockname()
         self.my_address = f"{address[0]}:{address[1]}"
-        self.tcp_receiver = TCPReceiver(self.tcp_socket, self.server_message_queue)
+        self.tcp_receiver = TCPReceiver(self.tcp_socket, self.server_message_inbox)
         self.tcp_receiver.daemon = True
         self.tcp_receiver.start()
 
         # Setup UDP Handling
-        self.server_update_queue = queue.Queue()
+        self.server_update_inbox = Inbox()
         self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.udp_socket.bind(address)
-        self.udp_receiver = UDPReceiver(self.udp_socket, self.server_update_queue)
+        self.udp_receiver = UDPReceiver(self.udp_socket, self.server_update_inbox)
         self.udp_receiver.daemon = True
         self.udp_receiver.start()
 
@@ -103,12 +138,50 @@ class ClientApplication(Application):
         self.udp_socket.close()
         self.udp_receiver.join()
 
-    def new_player(self, id, x, y):
-        self.add_player(id, x, y)
-        self.world.add_component(self.players[id], DRComponent())
-        self.world.add_component(self.players[id], InputComponent())
-        if id == self.my_address:
-            self.my_entity = self.players[id]
+    def add_players(self, spawns):
+        spawns = list(spawns)
+        players = super().add_players(spawns)
+        sprites = []
+        for _, x, y in spawns:
+            sprite = arcade.SpriteSolidColor(40, 40, arcade.csscolor.RED)
+            sprite.center_x = x
+            sprite.center_y = y
+            self.player_spritelist.append(sprite)
+            sprites.append(sprite)
+        if self.bodies is None:
+            dr_comps = [DRComponent() for _ in players]
+        else:
+            # Dead reckoning state shares the body columns, see DRProcessor
+            dr_comps = [ColumnDRComponent(self.bodies, player) for player in players]
+        self.world.add_components(
+            (
+                player,
+                {SpriteComponent: SpriteComponent(sprite), DRComponent: dr_comp},
+            )
+            for player, sprite, dr_comp in zip(players, sprites, dr_comps)
+        )
+        return players
+
+    def remove_players(self, ids):
+        ids = list(ids)
+        for id in ids:
+            sprite_comp = self.world.component_for_entity(
+                self.players[id], SpriteComponent
+            )
+            sprite_comp.sprite.remove_from_sprite_lists()
+            if self.interpolator is not None:
+                self.interpolator.remove(self.players[id])
+        super().remove_players(ids)
+
+    def new_players(self, players):
+        """Add players announced by the server, as (id, net_id, x, y) tuples"""
+        for id, net_id, _, _ in players:
+            self.net_players[net_id] = id
+            if id == self.my_address:
+                self.my_net_id = net_id
+        self.add_players((id, x, y) for id, _, x, y in players)
+        if self.my_address in self.players:
+            self.my_entity = self.players[self.my_address]
 
     def input(self):
         return self.world.component_for_entity(self.my_entity, InputComponent)
@@ -134,81 +207,151 @@ class ClientApplication(Application):
             self.input().down = 0
 
     def on_update(self, delta_time):
-        super().on_update(delta_time)
-
         self.process_server_messages()
         self.process_server_updates()
 
+        super().on_update(delta_time)
+
+    def step(self, delta_time):
+        if self.my_entity is not None:
+            self.queue_input()
         self.world.process(delta_time=delta_time, excludes=[self.my_entity])
 
-    def process_server_messages(self):
-        messages = []
-        while not self.server_message_queue.empty():
-            messages.append(self.server_message_queue.get())
-        if not messages:
-            return
+    def queue_input(self):
+        """Turn the held keys into this step's input command.
+        The command is simulated locally right away, and kept until the
+        server reports having simulated it too.
+        """
+        inp = self.input()
+        self.input_sequence += 1
+        command = (self.input_sequence, input_bits(inp))
+        inp.commands.append(command)
+        self.pending_inputs.append(command)
 
-        for message in messages:
+    def process_server_messages(self):
+        for message in self.server_message_inbox.drain():
             self.process_server_message(message)
 
     def process_server_message(self, message):
         message = message.split(";;")
         command = message[0]
         if command == "client_connect":
-            # A new player joined the game
-            self.new_player(message[1], float(message[2]), float(message[3]))
+            # One or more players joined the game
+            self.new_players(
+                [
+                    (
+                        message[i],
+                        int(message[i + 1]),
+                        float(message[i + 2]),
+                        float(message[i + 3]),
+                    )
+                    for i in range(1, len(message) - 3, 4)
+                    if message[i] not in self.players
+                ]
+            )
         elif command == "client_disconnect":
             # A player has left the game
             self.remove_player(message[1])
+            self.net_players = {
+                net_id: id
+                for net_id, id in self.net_players.items()
+                if id != message[1]
+            }
 
     def process_server_updates(self):
-        updates = []
-        while not self.server_update_queue.empty():
-            updates.append(self.server_update_queue.get())
+        # Snapshots arrive in order and each one holds the complete state,
+        # so only the newest needs to be applied
+        updates = self.server_update_inbox.drain()
         if not updates:
             return
-
-        for update in updates:
-            self.process_server_update(update)
+        if self.interpolator is not None:
+            # Interpolation needs every position, not only the newest
+            for update in updates[:-1]:
+                self.interpolate_update(update)
+        self.process_server_update(updates[-1])
 
     def process_server_update(self, update):
-        update = update.split(";;")
-        for player_data in update:
-            player_data = player_data.split(";")
-            player_id = player_data[0]
-            if player_id not in self.players:
-                self.new_player(
-                    player_id,
-                    float(player_data[3]),
-                    float(player_data[4]),
-                )
+        sequence, input_sequence, server_time, state = update
+        # Players outside of our area of interest are left out of snapshots
+        for net_id in self.visible_players - state.keys():
+            self.set_player_visible(net_id, False)
+        for net_id in state.keys() - self.visible_players:
+            self.set_player_visible(net_id, True)
+        self.visible_players = set(state)
+
+        if self.interpolator is not None:
+            self.interpolate_update(update)
+        else:
+            for player, player_data in self.remote_players(state):
+                self.update_player(player, dequantize(player_data), server_time)
+
+        self.reconcile(input_sequence, state.get(self.my_net_id))
+
+    def remote_players(self, state):
+        """Get the (entity, quantized state) of every other player in a
+        snapshot. Players we haven't received a client_connect for yet are
+        skipped.
+        """
+        for net_id, player_data in state.items():
+            player_id = self.net_players.get(net_id)
+            if player_id is None or player_id not in self.players:
                 continue
             if player_id != self.my_address:
-                self.update_player(self.players[player_id], player_data[1:])
+                yield self.players[player_id], player_data
+
+    def interpolate_update(self, update):
+        """Buffer the positions in a snapshot for the InterpolationProcessor"""
+        self.interpolator.observe(update.server_time)
+        for player, player_data in self.remote_players(update.state):
+            _, _, x, y = dequantize(player_data)
+            self.interpolator.push(player, update.server_time, x, y)
+
+    def reconcile(self, input_sequence, player_data):
+        """Move our player to where the server has it, then replay the
+        commands the server has not simulated yet on top of that.
+        """
+        drop_commands(self.pending_inputs, input_sequence)
+        if player_data is None or self.my_entity is None:
+            return
 
-    def update_player(self, player, data):
-        dr_comp = self.world.component_for_entity(player, DRComponent)
-        dr_comp.previous_position = dr_comp.position
-        dr_comp.previous_velocity = dr_comp.velocity
-        dr_comp.previous_time = dr_comp.time
-        dr_comp.position = (float(data[2]), float(data[3]))
-        dr_comp.velocity = (float(data[0]), float(data[1]))
-        dr_comp.time = time.time()
-        accel_x = (dr_comp.velocity[0] - dr_comp.previous_velocity[0]) / (
-            dr_comp.time - dr_comp.previous_time
-        )
-        accel_y = (dr_comp.velocity[1] - dr_comp.previous_velocity[1]) / (
-            dr_comp.time - dr_comp.previous_time
+        _, _, x, y = dequantize(player_data)
+        transform = self.world.component_for_entity(self.my_entity, TransformComponent)
+        transform.x, transform.y = replay_commands(self.pending_inputs, x, y)
+
+    def set_player_visible(self, net_id, visible):
+        player_id = self.net_players.get(net_id)
+        if player_id is None or player_id not in self.players:
+            return
+        sprite_comp = self.world.component_for_entity(
+            self.players[player_id], SpriteComponent
         )
-        dr_comp.acceleration = (accel_x, accel_y)
+        sprite_comp.sprite.visible = visible
+        # A player coming back into view starts over from where it reappears
+        if visible:
+            return
+        if self.interpolator is not None:
+            self.interpolator.remove(self.players[player_id])
+        else:
+            dr_comp = self.world.component_for_entity(
+                self.players[player_id], DRComponent
+            )
+            dr_comp.snapshots = 0
+
+    def update_player(self, player, data, server_time):
+        dr_comp = self.world.component_for_entity(player, DRComponent)
+        # Snapshots are timed by the server, arrival times would turn network
+        # jitter into acceleration
+        record_snapshot(dr_comp, (data[0], data[1]), (data[2], data[3]), server_time)
 
     def send_udp(self, delta_time):
         if not self.my_entity:
             return
 
-        data = ""
-        phys = self.world.component_for_entity(self.my_entity, PhysicsComponent)
-        sprite = self.world.component_for_entity(self.my_entity, SpriteComponent)
-        data += f"{phys.velocity[0]};{phys.velocity[1]};"
-        data += f"{sprite.sprite.center_x};{sprite.sprite.center_y}"
-        self.udp_socket.sendto(data.encode(), self.server_address)
+        # Every command the server has not simulated yet, in case the
+        # datagrams carrying them were lost
+        data = encode_inputs(
+            self.input_sequence,
+            self.udp_receiver.decoder.ack,
+            [bits for _, bits in self.pending_inputs],
+        )
+        self.udp_socket.sendto(data, self.server_address)
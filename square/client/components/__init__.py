@@ -1,2 +1,4 @@
-from .dr_comp import DRComponent
-from .input_comp import InputComponent
+from square.common.dead_reckoning import DR_FIELDS
+
+from .dr_comp import ColumnDRComponent, DRComponent
+from .sprite_comp import SpriteComponent
@@ -1,6 +1,8 @@
 from dataclasses import dataclass as component
 from typing import Tuple
 
+from square.common.esper import ColumnStore
+
 
 @component
 class DRComponent:
@@ -11,3 +13,62 @@ class DRComponent:
     previous_time: float = 0
     time: float = 0
     acceleration: Tuple[float, float] = (0, 0)
+    # Snapshots recorded since the entity came into view
+    snapshots: int = 0
+
+
+class ColumnDRComponent:
+    """A DRComponent whose position, velocity and acceleration live in the
+    `DR_FIELDS` columns of a ColumnStore, so DRProcessor can project every
+    entity at once. Add it to entities with a type alias of DRComponent.
+    """
+
+    __slots__ = [
+        "store",
+        "entity",
+        "previous_position",
+        "previous_velocity",
+        "previous_time",
+        "time",
+        "snapshots",
+    ]
+
+    def __init__(self, store: ColumnStore, entity: int):
+        self.store = store
+        self.entity = entity
+        self.previous_position: Tuple[float, float] = (0, 0)
+        self.previous_velocity: Tuple[float, float] = (0, 0)
+        self.previous_time: float = 0
+        self.time: float = 0
+        self.snapshots = 0
+
+    def _get(self, x: str, y: str) -> Tuple[float, float]:
+        return self.store.get(self.entity, x), self.store.get(self.entity, y)
+
+    def _set(self, x: str, y: str, value: Tuple[float, float]):
+        self.store.set(self.entity, x, value[0])
+        self.store.set(self.entity, y, value[1])
+
+    @property
+    def position(self) -> Tuple[float, float]:
+        return self._get("px", "py")
+
+    @position.setter
+    def position(self, value: Tuple[float, float]):
+        self._set("px", "py", value)
+
+    @property
+    def velocity(self) -> Tuple[float, float]:
+        return self._get("dvx", "dvy")
+
+    @velocity.setter
+    def velocity(self, value: Tuple[float, float]):
+        self._set("dvx", "dvy", value)
+
+    @property
+    def acceleration(self) -> Tuple[float, float]:
+        return self._get("ax", "ay")
+
+    @acceleration.setter
+    def acceleration(self, value: Tuple[float, float]):
+        self._set("ax", "ay", value)
@@ -1,17 +1,22 @@
 from threading import Thread
 
-from square import BUFFER_SIZE
+from square.common.networking import FrameBuffer, FramingError
 
 
 class TCPReceiver(Thread):
-    def __init__(self, socket, queue):
+    def __init__(self, socket, inbox):
         super().__init__()
         self.running = False
         self.socket = socket
-        self.queue = queue
+        self.inbox = inbox
+        self.frames = FrameBuffer()
 
     def run(self):
         self.running = True
         while self.running:
-            data = self.socket.recv(BUFFER_SIZE).decode("utf-8")
-            self.queue.put(data)
+            try:
+                if not self.frames.recv_into(self.socket):
+                    break
+                self.inbox.put_many(self.frames.messages())
+            except (OSError, FramingError):
+                break
@@ -1,17 +1,24 @@
 from threading import Thread
 
 from square import BUFFER_SIZE
+from square.common.networking import SnapshotDecoder, SnapshotError
 
 
 class UDPReceiver(Thread):
-    def __init__(self, socket, queue):
+    def __init__(self, socket, inbox):
         super().__init__()
         self.running = False
         self.socket = socket
-        self.queue = queue
+        self.inbox = inbox
+        self.decoder = SnapshotDecoder()
 
     def run(self):
         self.running = True
         while self.running:
-            data = self.socket.recv(BUFFER_SIZE).decode("utf-8")
-            self.queue.put(data)
+            data = self.socket.recv(BUFFER_SIZE)
+            try:
+                snapshot = self.decoder.feed(data)
+            except SnapshotError:
+                continue
+            if snapshot is not None:
+                self.inbox.put(snapshot)
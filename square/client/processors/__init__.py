@@ -1,2 +1,3 @@
 from .dr_processor import DRProcessor
-from .input_processor import InputProcessor
+from .interpolation_processor import InterpolationProcessor
+from .sprite_sync_processor import SpriteSyncProcessor
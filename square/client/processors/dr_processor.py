@@ -1,64 +1,56 @@
-from typing import List
+from typing import List, Optional
 
 from square.client.components import DRComponent
 from square.common import esper
-from square.common.components import PhysicsComponent, SpriteComponent
+from square.common.components import PhysicsComponent, TransformComponent
+from square.common.dead_reckoning import project_axis, project_store
 
 
 class DRProcessor(esper.Processor):
+    """Dead reckons remote players towards their latest snapshot.
+
+    :param store: Optional ColumnStore with the x, y, vx and vy columns of
+                  every body and the `DR_FIELDS` columns of its
+                  ColumnDRComponent. When given, every entity in it is
+                  projected in one pass over whole columns, with the same
+                  results as projecting them one at a time.
+    """
+
+    reads = (DRComponent, PhysicsComponent, TransformComponent)
+    writes = (TransformComponent,)
+
+    def __init__(self, store: Optional[esper.ColumnStore] = None):
+        self.store = store
+
     def process(self, delta_time: float, excludes: List[int] = []):
-        dt2 = delta_time * delta_time
-        for ent, (dr_comp, physics_comp, sprite_comp) in self.world.get_components(
-            DRComponent, PhysicsComponent, SpriteComponent
+        if self.store is not None:
+            slots = self.store.slots
+            skip = {slots[ent] for ent in excludes if ent in slots}
+            project_store(self.store, delta_time, skip)
+            return
+
+        excludes = set(excludes)
+        for ent, (dr_comp, physics_comp, transform) in self.world.get_components(
+            DRComponent, PhysicsComponent, TransformComponent
         ):
             if ent in excludes:
                 continue
 
-            time_cap = delta_time / 0.0666
-            time_cap = max(min(time_cap, 1.0), 0.0)
-            vb = (
-                (
-                    physics_comp.velocity[0]
-                    + ((dr_comp.velocity[0] - physics_comp.velocity[0]) * time_cap)
-                ),
-                (
-                    physics_comp.velocity[1]
-                    + ((dr_comp.velocity[1] - physics_comp.velocity[1]) * time_cap)
-                ),
-            )
-            pos_t0 = (
-                (
-                    sprite_comp.sprite.center_x
-                    + (vb[0] * delta_time)
-                    + (0.5 * dr_comp.acceleration[0] * dt2)
-                ),
-                (
-                    sprite_comp.sprite.center_y
-                    + (vb[1] * delta_time)
-                    + (0.5 * dr_comp.acceleration[1] * dt2)
-                ),
+            velocity = physics_comp.velocity
+            acceleration = dr_comp.acceleration
+            transform.x = project_axis(
+                transform.x,
+                velocity[0],
+                dr_comp.position[0],
+                dr_comp.velocity[0],
+                acceleration[0],
+                delta_time,
             )
-            pos_t1 = (
-                (
-                    dr_comp.position[0]
-                    + (dr_comp.velocity[0] * delta_time)
-                    + (0.5 * dr_comp.acceleration[0] * dt2)
-                ),
-                (
-                    dr_comp.position[1]
-                    + (dr_comp.velocity[1] * delta_time)
-                    + (0.5 * dr_comp.acceleration[1] * dt2)
-                ),
+            transform.y = project_axis(
+                transform.y,
+                velocity[1],
+                dr_comp.position[1],
+                dr_comp.velocity[1],
+                acceleration[1],
+                delta_time,
             )
-
-            pos_qx = pos_t0[0] + ((pos_t1[0] - pos_t0[0]) * time_cap)
-            pos_qy = pos_t0[1] + ((pos_t1[1] - pos_t0[1]) * time_cap)
-
-            if abs(pos_qx - dr_comp.position[0]) >= 20:
-                pos_qx = dr_comp.position[0]
-
-            if abs(pos_qy - dr_comp.position[1]) >= 20:
-                pos_qy = dr_comp.position[1]
-
-            sprite_comp.sprite.center_x = pos_qx
-            sprite_comp.sprite.center_y = pos_qy
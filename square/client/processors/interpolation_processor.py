@@ -0,0 +1,32 @@
+from typing import List
+
+from square.common import esper
+from square.common.components import TransformComponent
+from square.common.interpolation import SnapshotInterpolator
+
+
+class InterpolationProcessor(esper.Processor):
+    """Moves remote players to their interpolated snapshot positions.
+
+    :param interpolator: The SnapshotInterpolator the client buffers every
+                         remote player's snapshots in.
+    """
+
+    reads = (TransformComponent,)
+    writes = (TransformComponent,)
+
+    def __init__(self, interpolator: SnapshotInterpolator):
+        self.interpolator = interpolator
+
+    def process(self, delta_time: float, excludes: List[int] = []):
+        render_time = self.interpolator.render_time()
+        if render_time is None:
+            return
+        for ent, buffer in self.interpolator.buffers.items():
+            if ent in excludes:
+                continue
+            position = buffer.sample(render_time)
+            if position is None:
+                continue
+            transform = self.world.component_for_entity(ent, TransformComponent)
+            transform.x, transform.y = position
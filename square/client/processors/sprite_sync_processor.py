@@ -0,0 +1,19 @@
+from typing import List
+
+from square.client.components import SpriteComponent
+from square.common import esper
+from square.common.components import TransformComponent
+
+
+class SpriteSyncProcessor(esper.Processor):
+    """Copies simulated positions onto sprites, ready to be drawn."""
+
+    reads = (TransformComponent, SpriteComponent)
+    writes = (SpriteComponent,)
+
+    def process(self, delta_time: float, excludes: List[int] = []):
+        for ent, (transform, sprite_comp) in self.world.get_components(
+            TransformComponent, SpriteComponent
+        ):
+            sprite_comp.sprite.center_x = transform.x
+            sprite_comp.sprite.center_y = transform.y
@@ -140,7 +140,13 @@ class MainMenuView(View):
         self.v_box.add(quit_button)
 
     def switch_to_multiplayer(self, address: Tuple[str, int] = None):
-        square.client.set_application(square.client.ClientApplication(address))
+        square.client.set_application(
+            square.client.ClientApplication(
+                address,
+                columnar=self.window.columnar,
+                interpolate=self.window.interpolate,
+            )
+        )
         if "game" not in self.window.views:
             self.window.views["game"] = GameView()
             self.window.views["pause"] = PauseView()
@@ -23,13 +23,17 @@ def set_window(window: "Window") -> None:
 
 
 class Window(arcade.Window):
-    def __init__(self):
+    def __init__(self, columnar: bool = False, interpolate: bool = False):
         super().__init__(
             width=800,
             height=600,
             resizable=False,
         )
 
+        # Passed on to every ClientApplication this window starts
+        self.columnar = columnar
+        self.interpolate = interpolate
+
         # setup views
         self.views = {}
         self.views["main_menu"] = MainMenuView()
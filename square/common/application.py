@@ -1,40 +1,102 @@
-from typing import Dict
-
-import arcade
+from typing import Dict, Iterable, List, Tuple
 
 from square.common import esper
-from square.common.components import PhysicsComponent, SpriteComponent
-from square.common.processors import PhysicsProcessor
+from square.common.components import (
+    ColumnPhysicsComponent,
+    ColumnTransformComponent,
+    InputComponent,
+    PhysicsComponent,
+    TransformComponent,
+)
+from square.common.processors import InputProcessor, PhysicsProcessor
+from square.common.timestep import FixedTimestep
 
 
 class Application:
     """
     Main game class
 
-    The server uses this to run the headless version of the game.
+    The server uses this to run the headless version of the game, so nothing
+    in here may depend on arcade. Clients add rendering on top of it.
+
+    :param columnar: Keep player positions and velocities in contiguous
+                     columns, so physics runs as whole column operations.
+    :param timed: Time every processor run, see `esper.World.profile`.
+
+    The world is simulated in fixed steps of `timestep.step` seconds, however
+    often and irregularly `on_update` is called.
     """
 
-    def __init__(self):
-        self.world = esper.World()
+    # Columns of the ColumnStore player bodies live in when columnar
+    body_fields = ("x", "y", "vx", "vy")
+
+    def __init__(self, columnar: bool = False, timed: bool = False):
+        self.world = esper.World(timed=timed)
         self.players: Dict[str, int] = {}
-        self.player_spritelist = arcade.SpriteList()
-        self.world.add_processor(PhysicsProcessor())
+        self.timestep = FixedTimestep()
+
+        self.bodies = None
+        if columnar:
+            self.bodies = esper.ColumnStore(*self.body_fields)
+        self.world.add_processor(PhysicsProcessor(self.bodies))
+        # Commands set the velocity that moves their player in the same step
+        self.world.add_processor(InputProcessor(), priority=1)
 
     def add_player(self, new_id: str, x: float, y: float):
-        if new_id in self.players:
+        return self.add_players([(new_id, x, y)])[0]
+
+    def add_players(self, spawns: Iterable[Tuple[str, float, float]]) -> List[int]:
+        """Add many players at once, as (id, x, y) tuples.
+        All of the entities are created in a single pass over the world.
+        """
+        spawns = list(spawns)
+        new_ids = [new_id for new_id, _, _ in spawns]
+        repeated = len(set(new_ids)) != len(new_ids)
+        if repeated or not self.players.keys().isdisjoint(new_ids):
             raise RuntimeError("Duplicate Player ID")
-        sprite = arcade.SpriteSolidColor(40, 40, arcade.csscolor.RED)
-        sprite.center_x = x
-        sprite.center_y = y
-        if self.player_spritelist is not None:
-            self.player_spritelist.append(sprite)
-        player = self.world.create_entity(SpriteComponent(sprite), PhysicsComponent())
-        self.players[new_id] = player
-        return player
+
+        if self.bodies is None:
+            players = self.world.create_entities(
+                (TransformComponent(x, y), PhysicsComponent(), InputComponent())
+                for _, x, y in spawns
+            )
+        else:
+            players = self.world.create_entities(() for _ in spawns)
+            for player, (_, x, y) in zip(players, spawns):
+                self.bodies.add(player, x=x, y=y)
+            self.world.add_components(
+                (
+                    player,
+                    {
+                        TransformComponent: ColumnTransformComponent(
+                            self.bodies, player
+                        ),
+                        PhysicsComponent: ColumnPhysicsComponent(self.bodies, player),
+                        InputComponent: InputComponent(),
+                    },
+                )
+                for player in players
+            )
+        self.players.update(zip(new_ids, players))
+        return players
 
     def remove_player(self, id: str):
-        self.world.delete_entity(self.players[id])
-        del self.players[id]
+        self.remove_players([id])
+
+    def remove_players(self, ids: Iterable[str]):
+        players = [self.players.pop(id) for id in ids]
+        if self.bodies is None:
+            self.world.delete_entities(players)
+        else:
+            # The columns are shared, so the entities can't outlive their rows
+            self.world.delete_entities(players, immediate=True)
+            for player in players:
+                self.bodies.remove(player)
 
     def on_update(self, delta_time):
-        pass
+        for _ in range(self.timestep.advance(delta_time)):
+            self.step(self.timestep.step)
+
+    def step(self, delta_time):
+        """Advance the simulation by one fixed step"""
+        self.world.process(delta_time=delta_time)
@@ -1,2 +1,3 @@
-from .physics_comp import PhysicsComponent
-from .sprite_comp import SpriteComponent
+from .input_comp import InputComponent
+from .physics_comp import ColumnPhysicsComponent, PhysicsComponent
+from .transform_comp import ColumnTransformComponent, TransformComponent
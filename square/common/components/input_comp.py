@@ -0,0 +1,18 @@
+from collections import deque
+from dataclasses import dataclass as component
+from dataclasses import field
+from typing import Deque, Tuple
+
+
+@component
+class InputComponent:
+    # Keys held down by the local player, sampled into a command every step
+    left: int = 0
+    right: int = 0
+    up: int = 0
+    down: int = 0
+    # (sequence, input bits) commands waiting to be simulated, oldest first
+    commands: Deque[Tuple[int, int]] = field(default_factory=deque)
+    # Sequence of the last command simulated, and of the last one queued
+    applied: int = 0
+    received: int = 0
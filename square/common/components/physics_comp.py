@@ -1,6 +1,38 @@
 from typing import List
 
+from square.common.esper import ColumnStore
+
 
 class PhysicsComponent:
     def __init__(self, x=0.0, y=0.0):
         self.velocity: List[float] = [x, y]
+
+
+class _ColumnVelocity:
+    """List-like view of the vx and vy columns of one entity."""
+
+    __slots__ = ["store", "entity"]
+
+    _fields = ("vx", "vy")
+
+    def __init__(self, store: ColumnStore, entity: int):
+        self.store = store
+        self.entity = entity
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, index: int) -> float:
+        return self.store.get(self.entity, self._fields[index])
+
+    def __setitem__(self, index: int, value: float):
+        self.store.set(self.entity, self._fields[index], value)
+
+
+class ColumnPhysicsComponent:
+    """A PhysicsComponent whose velocity lives in the vx and vy columns of a
+    ColumnStore. Add it to entities with a type alias of PhysicsComponent.
+    """
+
+    def __init__(self, store: ColumnStore, entity: int):
+        self.velocity = _ColumnVelocity(store, entity)
@@ -0,0 +1,37 @@
+from dataclasses import dataclass as component
+
+from square.common.esper import ColumnStore
+
+
+@component
+class TransformComponent:
+    x: float = 0.0
+    y: float = 0.0
+
+
+class ColumnTransformComponent:
+    """A TransformComponent whose position lives in the x and y columns of a
+    ColumnStore. Add it to entities with a type alias of TransformComponent.
+    """
+
+    __slots__ = ["store", "entity"]
+
+    def __init__(self, store: ColumnStore, entity: int):
+        self.store = store
+        self.entity = entity
+
+    @property
+    def x(self) -> float:
+        return self.store.get(self.entity, "x")
+
+    @x.setter
+    def x(self, value: float):
+        self.store.set(self.entity, "x", value)
+
+    @property
+    def y(self) -> float:
+        return self.store.get(self.entity, "y")
+
+    @y.setter
+    def y(self, value: float):
+        self.store.set(self.entity, "y", value)
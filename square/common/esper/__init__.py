@@ -4,7 +4,9 @@ From: https://github.com/benmoran56/esper
 """
 
 import time as _time
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
 from typing import Any as _Any
+from typing import Dict as _Dict
 from typing import Iterable as _Iterable
 from typing import List as _List
 from typing import Optional as _Optional
@@ -12,6 +14,10 @@ from typing import Tuple as _Tuple
 from typing import Type as _Type
 from typing import TypeVar as _TypeVar
 
+from square.common.esper.columns import ColumnStore
+from square.common.esper.scheduler import build_stages as _build_stages
+from square.common.stats import RollingHistogram as _RollingHistogram
+
 version = "1.5"
 
 _C = _TypeVar("_C")
@@ -26,37 +32,146 @@ class Processor:
     generally want to iterate over entities with one (or more) calls to the
     appropriate world methods there, such as
     `for ent, (rend, vel) in self.world.get_components(Renderable, Velocity):`
+
+    A Processor can be run less often than `World.process` is called. With
+    an `interval`, it only runs once that much `delta_time` has built up,
+    and receives the time since its last run as its `delta_time`. With
+    `skip_unchanged`, it only runs after one of its `reads` Component types
+    has changed, see `World.mark_dirty`.
+
+    Declaring both `reads` and `writes` lets a World with `workers` run the
+    Processor alongside others it doesn't conflict with. Its `writes` types
+    are marked dirty after every run.
     """
 
     priority = 0
     world = _Any
+    interval = 0
+    reads: _Optional[_Tuple[_Any, ...]] = None
+    writes: _Optional[_Tuple[_Any, ...]] = None
+    skip_unchanged = False
 
     def process(self, *args, **kwargs):
         raise NotImplementedError
 
 
+class _Query:
+    """Incrementally maintained result of a component query.
+    `members` maps each matching Entity to its Components, and `result` is
+    the list handed out by the World, rebuilt only after membership changes.
+    """
+
+    __slots__ = ["types", "members", "result"]
+
+    def __init__(self, types, members):
+        self.types = types
+        self.members = members
+        self.result = None
+
+
 class World:
     """A World object keeps track of all Entities, Components, and Processors.
     A World contains a database of all Entity/Component assignments. The World
     is also responsible for executing all Processors assigned to it for each
     frame of your game.
+    :param timed: Record how long each Processor takes, see `profile`.
+    :param workers: Run Processors that don't conflict with each other on a
+                    pool of this many threads. 0 runs every Processor in
+                    turn on the calling thread.
     """
 
-    def __init__(self, timed=False):
+    def __init__(self, timed=False, workers=0):
         self._processors = []
         self._next_entity_id = 0
         self._components = {}
         self._entities = {}
         self._dead_entities = set()
-        self._get_component_cache = {}
-        self._get_components_cache = {}
+        self._component_queries: _Dict[_Any, _Query] = {}
+        self._components_queries: _Dict[_Any, _Query] = {}
+        self._queries_by_type: _Dict[_Any, _List[_Query]] = {}
+        self._version = 0
+        self._type_versions: _Dict[_Any, int] = {}
+        self._stages = None
+        self._executor = None
         if timed:
-            self.process_times = {}
+            self.process_times: _Dict[str, float] = {}
+            self.process_stats: _Dict[str, _RollingHistogram] = {}
             self._process = self._timed_process
+            self._call = self._timed_call
+        if workers:
+            self._executor = _ThreadPoolExecutor(workers, "esper")
+            self._process = self._parallel_process
 
     def clear_cache(self) -> None:
-        self._get_component_cache = {}
-        self._get_components_cache = {}
+        """Drop every query result, they are rebuilt on their next use."""
+        self._component_queries = {}
+        self._components_queries = {}
+        self._queries_by_type = {}
+
+    def mark_dirty(self, *component_types: _Any) -> None:
+        """Record that Components of these types have changed.
+        Adding or removing Components marks their types automatically.
+        Changes to the attributes of a Component can't be seen by the World,
+        so whatever makes them should mark the type, to wake up Processors
+        that skip runs while their Components are unchanged.
+        :param component_types: The Component types that changed.
+        """
+        self._version += 1
+        for component_type in component_types:
+            self._type_versions[component_type] = self._version
+
+    def _component_added(self, entity: int, component_type: _Any) -> None:
+        """Add an Entity to the cached queries it now matches."""
+        self.mark_dirty(component_type)
+        entity_db = self._entities[entity]
+
+        query = self._component_queries.get(component_type)
+        if query is not None:
+            query.members[entity] = entity_db[component_type]
+            query.result = None
+
+        for query in self._queries_by_type.get(component_type, ()):
+            if all(ct in entity_db for ct in query.types):
+                query.members[entity] = [entity_db[ct] for ct in query.types]
+                query.result = None
+
+    def _components_added(self, added: _List[_Tuple[int, _Dict[_Any, _C]]]) -> None:
+        """Add many Entities to the cached queries they now match."""
+        entity_dbs = self._entities
+        component_queries = self._component_queries
+        queries_by_type = self._queries_by_type
+        changed = set()
+        changed_types = set()
+
+        for entity, components in added:
+            entity_db = entity_dbs[entity]
+            changed_types.update(components)
+            for component_type in components:
+                query = component_queries.get(component_type)
+                if query is not None:
+                    query.members[entity] = entity_db[component_type]
+                    changed.add(query)
+
+                for query in queries_by_type.get(component_type, ()):
+                    if all(ct in entity_db for ct in query.types):
+                        query.members[entity] = [entity_db[ct] for ct in query.types]
+                        changed.add(query)
+
+        for query in changed:
+            query.result = None
+        self.mark_dirty(*changed_types)
+
+    def _component_removed(self, entity: int, component_type: _Any) -> None:
+        """Remove an Entity from the cached queries it no longer matches."""
+        self.mark_dirty(component_type)
+        query = self._component_queries.get(component_type)
+        if query is not None:
+            query.members.pop(entity, None)
+            query.result = None
+
+        for query in self._queries_by_type.get(component_type, ()):
+            if query.members.pop(entity, None) is not None:
+                query.result = None
 
     def clear_database(self) -> None:
         """Remove all Entities and Components from the World."""
@@ -65,6 +180,7 @@ class World:
         self._components.clear()
         self._entities.clear()
         self.clear_cache()
+        self.mark_dirty(*self._type_versions)
 
     def add_processor(self, processor_instance: Processor, priority=0) -> None:
         """Add a Processor instance to the World.
@@ -75,8 +191,11 @@ class World:
         assert issubclass(processor_instance.__class__, Processor)
         processor_instance.priority = priority
         processor_instance.world = self
+        processor_instance._elapsed = 0.0
+        processor_instance._seen_version = -1
         self._processors.append(processor_instance)
         self._processors.sort(key=lambda proc: proc.priority, reverse=True)
+        self._stages = None
 
     def remove_processor(self, processor_type: _Type[Processor]) -> None:
         """Remove a Processor from the World, by type.
@@ -86,6 +205,7 @@ class World:
             if type(processor) == processor_type:
                 processor.world = None
                 self._processors.remove(processor)
+                self._stages = None
 
     def get_processor(self, processor_type: _Type[_P]) -> _Optional[_P]:
         """Get a Processor instance, by type.
@@ -110,13 +230,58 @@ class World:
                entity on creation.
         :return: The next Entity ID in sequence.
         """
-        self._next_entity_id += 1
+        return self.create_entities((components,))[0]
+
+    def create_entities(self, components: _Iterable[_Iterable[_C]]) -> _List[int]:
+        """Create many new Entities in one pass.
+        The cached queries are updated once for the whole batch, instead of
+        once per Component as repeated calls to `add_component` would.
+        :param components: One iterable of Component instances per Entity.
+        :return: The new Entity IDs, in the same order.
+        """
+        entities = []
+        additions = []
+        for entity_components in components:
+            self._next_entity_id += 1
+            entities.append(self._next_entity_id)
+            additions.append(
+                (self._next_entity_id, {type(cmp): cmp for cmp in entity_components})
+            )
+
+        self.add_components(additions)
+        return entities
+
+    def add_components(
+        self, components: _Iterable[_Tuple[int, _Dict[_Type[_C], _C]]]
+    ) -> None:
+        """Add Components to many Entities in one pass.
+        Components are given per Entity as a dict keyed by the type they
+        should be stored as, so type aliases work as in `add_component`.
+        Existing Components of the same type are replaced.
+        :param components: (Entity, {type: Component}) pairs.
+        """
+        entity_dbs = self._entities
+        comp_db = self._components
+        added = []
+
+        for entity, entity_components in components:
+            if not entity_components:
+                continue
 
-        # TODO: duplicate add_component code here for performance
-        for cmp in components:
-            self.add_component(self._next_entity_id, cmp)
+            entity_db = entity_dbs.get(entity)
+            if entity_db is None:
+                entity_db = entity_dbs[entity] = {}
+            entity_db.update(entity_components)
 
-        return self._next_entity_id
+            for component_type in entity_components:
+                entities = comp_db.get(component_type)
+                if entities is None:
+                    entities = comp_db[component_type] = set()
+                entities.add(entity)
+
+            added.append((entity, entity_components))
+
+        self._components_added(added)
 
     def delete_entity(self, entity: int, immediate=False) -> None:
         """Delete an Entity from the World.
@@ -129,18 +294,50 @@ class World:
         :param entity: The Entity ID you wish to delete.
         :param immediate: If True, delete the Entity immediately.
         """
-        if immediate:
-            for component_type in self._entities[entity]:
-                self._components[component_type].discard(entity)
-
-                if not self._components[component_type]:
-                    del self._components[component_type]
+        self.delete_entities((entity,), immediate)
+
+    def delete_entities(self, entities: _Iterable[int], immediate=False) -> None:
+        """Delete many Entities from the World in one pass.
+        Behaves like `delete_entity` for each Entity.
+        Raises a KeyError if one of the entities does not exist in the
+        database. Entities before it in `entities` are still deleted.
+        :param entities: The Entity IDs you wish to delete.
+        :param immediate: If True, delete the Entities immediately.
+        """
+        if not immediate:
+            self._dead_entities.update(entities)
+            return
 
-            del self._entities[entity]
-            self.clear_cache()
+        entity_dbs = self._entities
+        comp_db = self._components
+        component_queries = self._component_queries
+        queries_by_type = self._queries_by_type
+        changed = set()
+        changed_types = set()
 
-        else:
-            self._dead_entities.add(entity)
+        try:
+            for entity in entities:
+                entity_db = entity_dbs.pop(entity)
+                changed_types.update(entity_db)
+                for component_type in entity_db:
+                    comp_db[component_type].discard(entity)
+
+                    if not comp_db[component_type]:
+                        del comp_db[component_type]
+
+                    query = component_queries.get(component_type)
+                    if query is not None:
+                        if query.members.pop(entity, None) is not None:
+                            changed.add(query)
+
+                    for query in queries_by_type.get(component_type, ()):
+                        if query.members.pop(entity, None) is not None:
+                            changed.add(query)
+        finally:
+            # Also when an entity was missing, for the ones already deleted
+            for query in changed:
+                query.result = None
+            self.mark_dirty(*changed_types)
 
     def entity_exists(self, entity: int) -> bool:
         """Check if a specific entity exists.
@@ -223,7 +420,7 @@ class World:
             self._entities[entity] = {}
 
         self._entities[entity][component_type] = component_instance
-        self.clear_cache()
+        self._component_added(entity, component_type)
 
     def remove_component(self, entity: int, component_type: _Type[_C]) -> int:
         """Remove a Component instance from an Entity, by type.
@@ -241,11 +438,11 @@ class World:
             del self._components[component_type]
 
         del self._entities[entity][component_type]
+        self._component_removed(entity, component_type)
 
         if not self._entities[entity]:
             del self._entities[entity]
 
-        self.clear_cache()
         return entity
 
     def _get_component(self, component_type: _Type[_C]) -> _Iterable[_Tuple[int, _C]]:
@@ -280,24 +477,41 @@ class World:
         component_type.
         """
         try:
-            return self._get_component_cache[component_type]
+            query = self._component_queries[component_type]
         except KeyError:
-            return self._get_component_cache.setdefault(
-                component_type, list(self._get_component(component_type))
+            query = self._component_queries[component_type] = _Query(
+                (component_type,), dict(self._get_component(component_type))
             )
 
+        if query.result is None:
+            query.result = list(query.members.items())
+        return query.result
+
     def get_components(
         self, *component_types: _Type[_C]
     ) -> _List[_Tuple[int, _List[_C]]]:
         """Return a sequence of (entity, (*components)) pairs for each entity
         with every component in component_types.
+        The query is cached and kept up to date as Components are added and
+        removed, so it only has to be rebuilt when its own members change.
         """
         try:
-            return self._get_components_cache[component_types]
+            query = self._components_queries[component_types]
         except KeyError:
-            return self._get_components_cache.setdefault(
-                component_types, list(self._get_components(*component_types))
+            new_query = _Query(
+                component_types, dict(self._get_components(*component_types))
             )
+            # Processors running in parallel may race to create the query
+            query = self._components_queries.setdefault(component_types, new_query)
+            if query is new_query:
+                for component_type in set(component_types):
+                    self._queries_by_type.setdefault(component_type, []).append(
+                        query
+                    )
+
+        if query.result is None:
+            query.result = list(query.members.items())
+        return query.result
 
     def try_component(self, entity: int, component_type: _Type[_C]) -> _Optional[_C]:
         """Try to get a single component type for an Entity.
@@ -331,35 +545,136 @@ class World:
         return None
 
     def _clear_dead_entities(self):
-        """Finalize deletion of any Entities that are marked dead.
-        In the interest of performance, this method duplicates code from the
-        `delete_entity` method. If that method is changed, those changes should
-        be duplicated here as well.
-        """
-        for entity in self._dead_entities:
-
-            for component_type in self._entities[entity]:
-                self._components[component_type].discard(entity)
-
-                if not self._components[component_type]:
-                    del self._components[component_type]
+        """Finalize deletion of any Entities that are marked dead."""
+        if self._dead_entities:
+            dead_entities = self._dead_entities
+            self._dead_entities = set()
+            self.delete_entities(dead_entities, immediate=True)
+
+    def _due(self, processor: Processor, kwargs: _Dict[str, _Any]):
+        """Return the kwargs to run a Processor with, or None to skip it."""
+        if processor.interval:
+            delta_time = kwargs.get("delta_time")
+            if delta_time is not None:
+                processor._elapsed += delta_time
+                if processor._elapsed < processor.interval:
+                    return None
+                # Keep the remainder, so the average rate matches the interval
+                steps, processor._elapsed = divmod(
+                    processor._elapsed, processor.interval
+                )
+                kwargs = dict(kwargs, delta_time=steps * processor.interval)
+
+        if processor.skip_unchanged and processor.reads is not None:
+            versions = self._type_versions
+            version = max((versions.get(ct, 0) for ct in processor.reads), default=0)
+            if version <= processor._seen_version:
+                return None
+            processor._seen_version = version
+
+        return kwargs
+
+    def _call(self, processor: Processor, args, kwargs) -> None:
+        processor.process(*args, **kwargs)
+
+    def _timed_call(self, processor: Processor, args, kwargs) -> None:
+        """Track Processor execution time for benchmarking."""
+        start_time = _time.perf_counter_ns()
+        processor.process(*args, **kwargs)
+        elapsed = _time.perf_counter_ns() - start_time
 
-            del self._entities[entity]
+        name = processor.__class__.__name__
+        self.process_times[name] = elapsed / 1_000_000
+        try:
+            self.process_stats[name].add(elapsed)
+        except KeyError:
+            self.process_stats[name] = stats = _RollingHistogram()
+            stats.add(elapsed)
 
-        self._dead_entities.clear()
-        self.clear_cache()
+    def query_counts(self) -> _Dict[str, int]:
+        """Number of Entities matched by each cached query, keyed by the
+        names of its Component types.
+        """
+        counts = {}
+        for cache in (self._component_queries, self._components_queries):
+            for query in cache.values():
+                name = ", ".join(getattr(ct, "__name__", str(ct)) for ct in query.types)
+                counts[name] = self._query_size(query)
+        return counts
+
+    def _query_size(self, query: _Query) -> int:
+        return len(query.members)
+
+    def profile(self) -> _Dict[str, _Any]:
+        """Snapshot of the World's instrumentation.
+        `processors` maps each Processor to a summary of its recent run
+        times in milliseconds, and is only filled in by a timed World.
+        `queries` is `query_counts`, and `entities` the number of Entities
+        with at least one Component.
+        """
+        processors = {}
+        for name, stats in getattr(self, "process_stats", {}).items():
+            summary = stats.summary()
+            processors[name] = {
+                key: value if key == "count" else value / 1_000_000
+                for key, value in summary.items()
+            }
+        return {
+            "processors": processors,
+            "queries": self.query_counts(),
+            "entities": self._entity_count(),
+        }
+
+    def _entity_count(self) -> int:
+        return len(self._entities)
 
     def _process(self, *args, **kwargs):
         for processor in self._processors:
-            processor.process(*args, **kwargs)
+            if processor.interval or processor.skip_unchanged:
+                due_kwargs = self._due(processor, kwargs)
+                if due_kwargs is None:
+                    continue
+                processor.process(*args, **due_kwargs)
+            else:
+                processor.process(*args, **kwargs)
+            if processor.writes:
+                self.mark_dirty(*processor.writes)
 
     def _timed_process(self, *args, **kwargs):
-        """Track Processor execution time for benchmarking."""
         for processor in self._processors:
-            start_time = _time.process_time()
-            processor.process(*args, **kwargs)
-            process_time = int(round((_time.process_time() - start_time) * 1000, 2))
-            self.process_times[processor.__class__.__name__] = process_time
+            due_kwargs = self._due(processor, kwargs)
+            if due_kwargs is None:
+                continue
+            self._timed_call(processor, args, due_kwargs)
+            if processor.writes:
+                self.mark_dirty(*processor.writes)
+
+    def _parallel_process(self, *args, **kwargs):
+        """Run each stage of non-conflicting Processors on the thread pool."""
+        if self._stages is None:
+            self._stages = _build_stages(self._processors)
+
+        for stage in self._stages:
+            runs = []
+            for processor in stage:
+                due_kwargs = self._due(processor, kwargs)
+                if due_kwargs is not None:
+                    runs.append((processor, due_kwargs))
+
+            if len(runs) == 1:
+                self._call(runs[0][0], args, runs[0][1])
+            elif runs:
+                futures = [
+                    self._executor.submit(self._call, processor, args, due_kwargs)
+                    for processor, due_kwargs in runs
+                ]
+                for future in futures:
+                    future.result()
+
+            # Marked here rather than in the workers, versions aren't atomic
+            for processor, _ in runs:
+                if processor.writes:
+                    self.mark_dirty(*processor.writes)
 
     def process(self, *args, **kwargs):
         """Call the process method on all Processors, in order of their priority.
@@ -367,8 +682,288 @@ class World:
         optional priority setting. In addition, any Entities that were marked
         for deletion since the last call to *World.process*, will be deleted
         at the start of this method call.
+        Processors with an `interval` or `skip_unchanged` may sit out a call.
         :param args: Optional arguments that will be passed through to the
                      *process* method of all Processors.
         """
         self._clear_dead_entities()
         self._process(*args, **kwargs)
+
+
+class _Archetype:
+    """A table of every Entity sharing one exact set of Component types.
+    Each Component type has its own column, with one row per Entity.
+    `queries` are the cached queries this table currently contributes to.
+    """
+
+    __slots__ = ["signature", "entities", "rows", "columns", "queries"]
+
+    def __init__(self, signature):
+        self.signature = signature
+        self.entities = []
+        self.rows = {}
+        self.columns = {component_type: [] for component_type in signature}
+        self.queries = []
+
+    def append(self, entity: int, components: _Dict[_Any, _Any]) -> None:
+        self.rows[entity] = len(self.entities)
+        self.entities.append(entity)
+        for component_type, column in self.columns.items():
+            column.append(components[component_type])
+
+    def pop(self, entity: int) -> _Dict[_Any, _Any]:
+        """Remove an Entity's row, filling the gap with the last row."""
+        row = self.rows.pop(entity)
+        last = len(self.entities) - 1
+        components = {}
+        for component_type, column in self.columns.items():
+            components[component_type] = column[row]
+            column[row] = column[last]
+            column.pop()
+
+        moved = self.entities[last]
+        self.entities[row] = moved
+        self.entities.pop()
+        if moved != entity:
+            self.rows[moved] = row
+
+        return components
+
+
+class ArchetypeWorld(World):
+    """A World storing Components in archetype tables.
+    Entities with the same set of Component types share a table holding one
+    column per type, so a query walks a few contiguous lists instead of one
+    dict per Entity. Adding or removing a Component moves the Entity to
+    another table, which makes structural changes dearer than with `World`.
+    The public API and the query caching behave exactly like `World`.
+    """
+
+    def __init__(self, timed=False, workers=0):
+        super().__init__(timed=timed, workers=workers)
+        self._archetypes: _Dict[frozenset, _Archetype] = {}
+        self._entity_archetypes: _Dict[int, _Archetype] = {}
+
+    def clear_cache(self) -> None:
+        super().clear_cache()
+        for archetype in self._archetypes.values():
+            archetype.queries = []
+
+    def _archetype(self, signature: frozenset) -> _Archetype:
+        """Return the table for a set of Component types, creating it if needed."""
+        try:
+            return self._archetypes[signature]
+        except KeyError:
+            pass
+
+        archetype = self._archetypes[signature] = _Archetype(signature)
+        for cache in (self._component_queries, self._components_queries):
+            for query in cache.values():
+                if signature.issuperset(query.types):
+                    query.members.append(archetype)
+                    archetype.queries.append(query)
+        return archetype
+
+    def _move(self, entity: int, components: _Dict[_Any, _Any]) -> None:
+        """Store an Entity's Components in the table matching their types."""
+        if components:
+            archetype = self._archetype(frozenset(components))
+            archetype.append(entity, components)
+            self._entity_archetypes[entity] = archetype
+            for query in archetype.queries:
+                query.result = None
+            self.mark_dirty(*components)
+        else:
+            del self._entity_archetypes[entity]
+
+    def _take(self, entity: int) -> _Dict[_Any, _Any]:
+        """Remove an Entity from its table, returning its Components."""
+        archetype = self._entity_archetypes[entity]
+        for query in archetype.queries:
+            query.result = None
+        self.mark_dirty(*archetype.signature)
+        return archetype.pop(entity)
+
+    def clear_database(self) -> None:
+        """Remove all Entities and Components from the World."""
+        self._archetypes.clear()
+        self._entity_archetypes.clear()
+        super().clear_database()
+
+    def add_components(
+        self, components: _Iterable[_Tuple[int, _Dict[_Type[_C], _C]]]
+    ) -> None:
+        """Add Components to many Entities in one pass.
+        Each Entity is moved to the table for its final set of types once,
+        instead of along one table per Component.
+        :param components: (Entity, {type: Component}) pairs.
+        """
+        for entity, entity_components in components:
+            if not entity_components:
+                continue
+
+            archetype = self._entity_archetypes.get(entity)
+            if archetype is None:
+                self._move(entity, dict(entity_components))
+            elif archetype.signature.issuperset(entity_components):
+                row = archetype.rows[entity]
+                for component_type, component in entity_components.items():
+                    archetype.columns[component_type][row] = component
+                for query in archetype.queries:
+                    query.result = None
+                self.mark_dirty(*entity_components)
+            else:
+                moved = self._take(entity)
+                moved.update(entity_components)
+                self._move(entity, moved)
+
+    def delete_entities(self, entities: _Iterable[int], immediate=False) -> None:
+        if not immediate:
+            self._dead_entities.update(entities)
+            return
+
+        for entity in entities:
+            self._take(entity)
+            del self._entity_archetypes[entity]
+
+    def entity_exists(self, entity: int) -> bool:
+        return (
+            entity in self._entity_archetypes and entity not in self._dead_entities
+        )
+
+    def component_for_entity(self, entity: int, component_type: _Type[_C]) -> _C:
+        archetype = self._entity_archetypes[entity]
+        return archetype.columns[component_type][archetype.rows[entity]]
+
+    def components_for_entity(self, entity: int) -> _Tuple[_C, ...]:
+        archetype = self._entity_archetypes[entity]
+        row = archetype.rows[entity]
+        return tuple(column[row] for column in archetype.columns.values())
+
+    def has_component(self, entity: int, component_type: _Type[_C]) -> bool:
+        return component_type in self._entity_archetypes[entity].signature
+
+    def has_components(self, entity: int, *component_types: _Type[_C]) -> bool:
+        return self._entity_archetypes[entity].signature.issuperset(component_types)
+
+    def add_component(
+        self,
+        entity: int,
+        component_instance: _C,
+        type_alias: _Optional[_Type[_C]] = None,
+    ) -> None:
+        """Add a new Component instance to an Entity.
+        A Component replacing one of the same type is written in place,
+        anything else moves the Entity to the table for its new set of types.
+        :param entity: The Entity to associate the Component with.
+        :param component_instance: A Component instance.
+        :param type_alias: An optional type that the Component instance
+                           should be stored as.
+        """
+        component_type = type_alias or type(component_instance)
+        archetype = self._entity_archetypes.get(entity)
+
+        if archetype is not None and component_type in archetype.signature:
+            row = archetype.rows[entity]
+            archetype.columns[component_type][row] = component_instance
+            for query in archetype.queries:
+                query.result = None
+            self.mark_dirty(component_type)
+            return
+
+        components = self._take(entity) if archetype is not None else {}
+        components[component_type] = component_instance
+        self._move(entity, components)
+
+    def remove_component(self, entity: int, component_type: _Type[_C]) -> int:
+        """Remove a Component instance from an Entity, by type.
+        Raises a KeyError if either the given entity or Component type does
+        not exist in the database.
+        :param entity: The Entity to remove the Component from.
+        :param component_type: The type of the Component to remove.
+        """
+        if component_type not in self._entity_archetypes[entity].signature:
+            raise KeyError(component_type)
+
+        components = self._take(entity)
+        del components[component_type]
+        self._move(entity, components)
+        return entity
+
+    def _query_size(self, query: _Query) -> int:
+        return sum(len(archetype.entities) for archetype in query.members)
+
+    def _entity_count(self) -> int:
+        return len(self._entity_archetypes)
+
+    def _query(self, cache, types) -> _Query:
+        """Return the cached query for `types`, linking it to matching tables."""
+        try:
+            return cache[types]
+        except KeyError:
+            pass
+
+        new_query = _Query(types, [])
+        # Processors running in parallel may race to create the query
+        query = cache.setdefault(types, new_query)
+        if query is not new_query:
+            return query
+        for signature, archetype in self._archetypes.items():
+            if signature.issuperset(types):
+                query.members.append(archetype)
+                archetype.queries.append(query)
+        return query
+
+    def _get_component(self, component_type: _Type[_C]) -> _Iterable[_Tuple[int, _C]]:
+        return iter(self.get_component(component_type))
+
+    def _get_components(
+        self, *component_types: _Type[_C]
+    ) -> _Iterable[_Tuple[int, _List[_C]]]:
+        return iter(self.get_components(*component_types))
+
+    def get_component(self, component_type: _Type[_C]) -> _List[_Tuple[int, _C]]:
+        """Return a sequence of (entity, component) pairs for each entity with
+        component_type.
+        """
+        query = self._query(self._component_queries, (component_type,))
+
+        if query.result is None:
+            query.result = result = []
+            for archetype in query.members:
+                column = archetype.columns[component_type]
+                result.extend(zip(archetype.entities, column))
+        return query.result
+
+    def get_components(
+        self, *component_types: _Type[_C]
+    ) -> _List[_Tuple[int, _List[_C]]]:
+        """Return a sequence of (entity, (*components)) pairs for each entity
+        with every component in component_types.
+        The result is rebuilt column by column from the matching tables, only
+        after one of them has changed.
+        """
+        query = self._query(self._components_queries, component_types)
+
+        if query.result is None:
+            query.result = result = []
+            for archetype in query.members:
+                columns = [archetype.columns[ct] for ct in component_types]
+                result.extend(zip(archetype.entities, map(list, zip(*columns))))
+        return query.result
+
+    def try_component(self, entity: int, component_type: _Type[_C]) -> _Optional[_C]:
+        archetype = self._entity_archetypes[entity]
+        column = archetype.columns.get(component_type)
+        if column is not None:
+            return column[archetype.rows[entity]]
+        return None
+
+    def try_components(
+        self, entity: int, *component_types: _Type[_C]
+    ) -> _Optional[_List[_List[_C]]]:
+        archetype = self._entity_archetypes[entity]
+        if archetype.signature.issuperset(component_types):
+            row = archetype.rows[entity]
+            return [archetype.columns[ct][row] for ct in component_types]
+        return None
@@ -0,0 +1,110 @@
+"""Structure of arrays storage for numeric component fields.
+
+A `ColumnStore` keeps one contiguous column of doubles per field, indexed by
+a dense slot per entity. Processors can then update every entity at once
+with whole column operations instead of per entity attribute lookups.
+Columns are NumPy arrays when NumPy is installed, and ``array("d")``
+otherwise. The arrays keep the store working without NumPy, but whole column
+operations on them are slower than updating the same components one at a
+time, so ``--columnar`` refuses to start without NumPy.
+"""
+
+from array import array as _array
+from operator import add as _add
+from typing import Dict as _Dict
+from typing import List as _List
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+
+class ColumnStore:
+    """Dense columns of float fields for a set of entities.
+
+    Rows are kept packed: removing an entity moves the last row into its
+    slot, so every column is contiguous from slot 0 to ``len(store)``.
+    :param fields: The names of the columns to store.
+    :param capacity: Number of rows to preallocate when NumPy is used.
+    """
+
+    def __init__(self, *fields: str, capacity: int = 64):
+        self.fields = fields
+        self.entities: _List[int] = []
+        self.slots: _Dict[int, int] = {}
+        if _np is not None:
+            self._columns = {field: _np.zeros(capacity) for field in fields}
+        else:
+            self._columns = {field: _array("d") for field in fields}
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __contains__(self, entity: int) -> bool:
+        return entity in self.slots
+
+    def add(self, entity: int, **values: float) -> int:
+        """Add a row for an Entity.
+        :param entity: The Entity to add.
+        :param values: Initial values by field name, missing fields are 0.
+        :return: The slot of the new row.
+        """
+        if entity in self.slots:
+            raise KeyError(f"Entity {entity} is already in the store")
+        slot = len(self.entities)
+        if _np is not None:
+            capacity = len(self._columns[self.fields[0]])
+            if slot == capacity:
+                for field, column in self._columns.items():
+                    grown = _np.zeros(capacity * 2)
+                    grown[:capacity] = column
+                    self._columns[field] = grown
+            for field, column in self._columns.items():
+                column[slot] = values.get(field, 0.0)
+        else:
+            for field, column in self._columns.items():
+                column.append(values.get(field, 0.0))
+
+        self.entities.append(entity)
+        self.slots[entity] = slot
+        return slot
+
+    def remove(self, entity: int) -> None:
+        """Remove an Entity's row, moving the last row into its slot.
+        Raises a KeyError if the entity is not in the store.
+        """
+        slot = self.slots.pop(entity)
+        last = len(self.entities) - 1
+        last_entity = self.entities.pop()
+        if slot != last:
+            for column in self._columns.values():
+                column[slot] = column[last]
+            self.entities[slot] = last_entity
+            self.slots[last_entity] = slot
+        if _np is None:
+            for column in self._columns.values():
+                column.pop()
+
+    def get(self, entity: int, field: str) -> float:
+        return float(self._columns[field][self.slots[entity]])
+
+    def set(self, entity: int, field: str, value: float) -> None:
+        self._columns[field][self.slots[entity]] = value
+
+    def column(self, field: str):
+        """Get the live values of a field for every row, in slot order.
+        With NumPy this is a view, so writes go straight into the store.
+        """
+        if _np is not None:
+            return self._columns[field][: len(self.entities)]
+        return self._columns[field]
+
+    def iadd(self, target: str, source: str) -> None:
+        """Add the `source` column to the `target` column, for every row."""
+        if _np is not None:
+            count = len(self.entities)
+            self._columns[target][:count] += self._columns[source][:count]
+            return
+        target_column = self._columns[target]
+        target_column[:] = _array("d", map(_add, target_column, self._columns[source]))
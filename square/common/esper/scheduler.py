@@ -0,0 +1,48 @@
+"""Dependency ordering for running Processors concurrently.
+
+Processors declare the Component types they `reads` and `writes`. Two
+Processors conflict when one writes a type the other reads or writes, and
+conflicting Processors keep their priority order. Everything else may run
+at the same time. A Processor without both declarations conflicts with
+every other Processor, so it runs alone, after everything before it and
+before everything after it, exactly as in a serial run.
+"""
+
+from typing import Any as _Any
+from typing import List as _List
+
+
+def _conflicts(first: _Any, second: _Any) -> bool:
+    if first.reads is None or first.writes is None:
+        return True
+    if second.reads is None or second.writes is None:
+        return True
+    first_writes = set(first.writes)
+    second_writes = set(second.writes)
+    return (
+        not first_writes.isdisjoint(second.reads)
+        or not first_writes.isdisjoint(second_writes)
+        or not second_writes.isdisjoint(first.reads)
+    )
+
+
+def build_stages(processors: _List[_Any]) -> _List[_List[_Any]]:
+    """Group Processors into stages that can each run concurrently.
+    Every Processor lands in the stage after the last earlier Processor it
+    conflicts with, so running the stages in order gives the same result as
+    running the Processors one by one in the given order.
+    :param processors: Processors in the order they would run serially.
+    :return: The stages, in the order they have to run.
+    """
+    stages: _List[_List[_Any]] = []
+    levels = []
+    for index, processor in enumerate(processors):
+        level = 0
+        for earlier in range(index):
+            if levels[earlier] >= level and _conflicts(processors[earlier], processor):
+                level = levels[earlier] + 1
+        levels.append(level)
+        if level == len(stages):
+            stages.append([])
+        stages[level].append(processor)
+    return stages
@@ -0,0 +1,64 @@
+"""Tick batched hand-off from receiver threads to the game loop.
+
+Receiver threads put items into an inbox as they arrive and the game loop
+takes everything that arrived since the last tick in one `drain` call. The
+inbox is double buffered: draining swaps in a fresh buffer, so the lock is
+taken once per tick by the game loop and once per item or batch by a
+receiver, instead of once per item on both sides like `queue.Queue`.
+"""
+from threading import Lock
+from typing import Dict, Generic, Hashable, Iterable, List, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class Inbox(Generic[T]):
+    """Collects items in arrival order."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._items: List[T] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item: T) -> None:
+        with self._lock:
+            self._items.append(item)
+
+    def put_many(self, items: Iterable[T]) -> None:
+        with self._lock:
+            self._items.extend(items)
+
+    def drain(self) -> List[T]:
+        """Take every item put since the last drain."""
+        with self._lock:
+            items, self._items = self._items, []
+        return items
+
+
+class CoalescingInbox(Generic[K, T]):
+    """Keeps only the latest item put for each key."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._latest: Dict[K, T] = {}
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def put(self, key: K, item: T) -> None:
+        with self._lock:
+            self._latest[key] = item
+
+    def put_many(self, items: Iterable[Tuple[K, T]]) -> None:
+        """Put ``(key, item)`` pairs, later pairs replacing earlier ones."""
+        with self._lock:
+            self._latest.update(items)
+
+    def drain(self) -> Dict[K, T]:
+        """Take the latest item for every key put since the last drain."""
+        with self._lock:
+            latest, self._latest = self._latest, {}
+        return latest
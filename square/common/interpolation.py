@@ -0,0 +1,109 @@
+"""Snapshot interpolation of remote players.
+
+Instead of dead reckoning ahead of the latest snapshot, remote players can
+be drawn a fixed delay in the past, between two snapshots that have both
+arrived already. Every snapshot is stamped with the server time it was
+taken at, so the motion follows the server's timing instead of the jitter
+of the network. Nothing in here depends on arcade.
+"""
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from square import UDP_SEND_INTERVAL
+
+# Two snapshots of cover, so losing one still leaves a pair to interpolate
+DEFAULT_DELAY = 2 * UDP_SEND_INTERVAL
+DEFAULT_SIZE = 16
+
+# How quickly the server clock estimate follows arrivals getting later
+DRIFT = 0.05
+
+
+class SnapshotBuffer:
+    """Ring buffer of the positions of one entity, by server time.
+
+    :param size: Number of positions to keep.
+    """
+
+    def __init__(self, size: int = DEFAULT_SIZE):
+        self.samples: Deque[Tuple[float, float, float]] = deque(maxlen=size)
+
+    def add(self, server_time: float, x: float, y: float) -> bool:
+        """Add a position, unless it is not newer than every position held.
+        :return: False when the position was out of order and discarded.
+        """
+        if self.samples and server_time <= self.samples[-1][0]:
+            return False
+        self.samples.append((server_time, x, y))
+        return True
+
+    def sample(self, server_time: float) -> Optional[Tuple[float, float]]:
+        """The position at `server_time`, interpolated between the positions
+        around it. Outside of the buffer the nearest position is held.
+        :return: None when the buffer is empty.
+        """
+        if not self.samples:
+            return None
+        newer = None
+        for older in reversed(self.samples):
+            if older[0] <= server_time:
+                if newer is None:
+                    return older[1], older[2]
+                fraction = (server_time - older[0]) / (newer[0] - older[0])
+                return (
+                    older[1] + (newer[1] - older[1]) * fraction,
+                    older[2] + (newer[2] - older[2]) * fraction,
+                )
+            newer = older
+        return newer[1], newer[2]
+
+
+class SnapshotInterpolator:
+    """Buffers the positions of every remote player and decides the server
+    time they are drawn at.
+
+    The offset between the server clock and the local clock is estimated
+    from the snapshot with the quickest arrival, slowly following arrivals
+    if they get later. Players are drawn `delay` seconds behind that
+    estimate of the current server time.
+    :param delay: Seconds behind the server that players are drawn at.
+    :param size: Number of positions to keep per player.
+    """
+
+    def __init__(self, delay: float = DEFAULT_DELAY, size: int = DEFAULT_SIZE):
+        self.delay = delay
+        self.size = size
+        self.buffers: Dict[int, SnapshotBuffer] = {}
+        self.offset: Optional[float] = None
+
+    def observe(self, server_time: float, local_time: Optional[float] = None):
+        """Update the server clock estimate with a snapshot's arrival."""
+        if local_time is None:
+            local_time = time.perf_counter()
+        offset = server_time - local_time
+        if self.offset is None or offset > self.offset:
+            self.offset = offset
+        else:
+            self.offset += (offset - self.offset) * DRIFT
+
+    def push(self, entity: int, server_time: float, x: float, y: float) -> bool:
+        """Buffer a position of an entity.
+        :return: False when the position was out of order and discarded.
+        """
+        buffer = self.buffers.get(entity)
+        if buffer is None:
+            buffer = self.buffers[entity] = SnapshotBuffer(self.size)
+        return buffer.add(server_time, x, y)
+
+    def remove(self, entity: int) -> None:
+        """Forget an entity's positions, it starts over from its next one."""
+        self.buffers.pop(entity, None)
+
+    def render_time(self, local_time: Optional[float] = None) -> Optional[float]:
+        """The server time to draw players at, None before any snapshot."""
+        if self.offset is None:
+            return None
+        if local_time is None:
+            local_time = time.perf_counter()
+        return local_time + self.offset - self.delay
@@ -0,0 +1,11 @@
+from .delta import DeltaEncoder, ReceivedSnapshot, SnapshotDecoder
+from .framing import FrameBuffer, FramingError, encode_frame
+from .snapshot import (
+    SNAPSHOT_VERSION,
+    SnapshotError,
+    decode_inputs,
+    dequantize,
+    encode_inputs,
+    encode_snapshot,
+    quantize,
+)
@@ -0,0 +1,220 @@
+"""Delta compression of snapshots against the last acknowledged state.
+
+The server keeps one `DeltaEncoder` per client, remembering the snapshots it
+recently sent to that client. Each new snapshot is encoded against the latest
+one the client acknowledged, falling back to a keyframe when there is no
+acknowledged snapshot left in the history, for example after heavy loss.
+
+The client feeds every datagram it receives into a `SnapshotDecoder`, which
+reassembles multi-part snapshots, applies deltas to the baseline they were
+encoded against and keeps the history needed to decode future deltas.
+"""
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+from .snapshot import (
+    ALL_FIELDS,
+    KIND_DELTA,
+    KIND_KEYFRAME,
+    REMOVED,
+    Snapshot,
+    SnapshotError,
+    decode_header,
+    decode_records,
+    encode_snapshot,
+)
+
+DEFAULT_HISTORY = 32
+
+
+class ReceivedSnapshot(NamedTuple):
+    """A complete snapshot, as returned by `SnapshotDecoder.feed`."""
+
+    sequence: int
+    # The last input command of this client the state includes
+    input_sequence: int
+    # Seconds of server time the state was taken at
+    server_time: float
+    state: Snapshot
+
+
+class DeltaEncoder:
+    """Encodes snapshots for a single client.
+
+    :param history: How many sent snapshots to remember. If the client has
+                    not acknowledged any of them a keyframe is sent instead.
+    """
+
+    def __init__(self, history: int = DEFAULT_HISTORY):
+        self.history = history
+        self.acked: Optional[int] = None
+        self._sent: "OrderedDict[int, Snapshot]" = OrderedDict()
+
+    def ack(self, sequence: int) -> None:
+        """Record that the client fully received snapshot `sequence`."""
+        if sequence not in self._sent:
+            return
+        if self.acked is not None and sequence <= self.acked:
+            return
+        self.acked = sequence
+
+        # Acks only move forward, so older snapshots can never be a baseline
+        while next(iter(self._sent)) != sequence:
+            self._sent.popitem(last=False)
+
+    def encode(
+        self,
+        sequence: int,
+        state: Snapshot,
+        input_sequence: int = 0,
+        server_time: float = 0.0,
+    ) -> List[bytes]:
+        """Encode `state` as snapshot `sequence` for this client.
+        :param input_sequence: The client's last input command in `state`.
+        :param server_time: Seconds of server time `state` was taken at.
+        """
+        baseline = self._sent.get(self.acked) if self.acked is not None else None
+        datagrams = encode_snapshot(
+            sequence,
+            state,
+            self.acked if baseline is not None else 0,
+            baseline,
+            input_sequence,
+            server_time,
+        )
+
+        self._sent[sequence] = state
+        if len(self._sent) > self.history:
+            evicted, _ = self._sent.popitem(last=False)
+            if evicted == self.acked:
+                self.acked = None
+        return datagrams
+
+
+class _PartialSnapshot:
+    __slots__ = [
+        "kind",
+        "baseline",
+        "input_sequence",
+        "server_time",
+        "parts",
+        "received",
+    ]
+
+    def __init__(
+        self,
+        kind: int,
+        baseline: int,
+        input_sequence: int,
+        server_time: float,
+        parts: int,
+    ):
+        self.kind = kind
+        self.baseline = baseline
+        self.input_sequence = input_sequence
+        self.server_time = server_time
+        self.parts: List[Optional[list]] = [None] * parts
+        self.received = 0
+
+
+class SnapshotDecoder:
+    """Reassembles snapshots received by a client.
+
+    :param history: How many complete snapshots to keep as possible baselines.
+    """
+
+    def __init__(self, history: int = DEFAULT_HISTORY):
+        self.history = history
+        self.latest: Optional[int] = None
+        self._states: "OrderedDict[int, Snapshot]" = OrderedDict()
+        self._pending: Dict[int, _PartialSnapshot] = {}
+
+    @property
+    def ack(self) -> int:
+        """The sequence to acknowledge to the server, 0 if none yet."""
+        return self.latest or 0
+
+    def feed(self, datagram) -> Optional[ReceivedSnapshot]:
+        """Process a single snapshot datagram.
+
+        Stale and out of order snapshots, and deltas against a baseline that
+        is no longer known, are dropped.
+        Raises a SnapshotError if the datagram is malformed, or disagrees
+        with the other parts of its snapshot.
+        :return: The ReceivedSnapshot once a snapshot is complete,
+                 otherwise None.
+        """
+        (
+            kind,
+            sequence,
+            baseline,
+            input_sequence,
+            server_time,
+            part,
+            parts,
+            count,
+        ) = decode_header(datagram)
+        if kind not in (KIND_KEYFRAME, KIND_DELTA):
+            raise SnapshotError(f"Unexpected datagram kind {kind}")
+        if self.latest is not None and sequence <= self.latest:
+            return None
+        if kind == KIND_DELTA and baseline not in self._states:
+            # Also when the baseline was evicted while reassembling the delta
+            self._pending.pop(sequence, None)
+            return None
+        if part >= parts:
+            raise SnapshotError("Snapshot part index out of range")
+
+        pending = self._pending.get(sequence)
+        if pending is None:
+            pending = self._pending[sequence] = _PartialSnapshot(
+                kind, baseline, input_sequence, server_time, parts
+            )
+        elif (kind, baseline, parts) != (
+            pending.kind,
+            pending.baseline,
+            len(pending.parts),
+        ):
+            raise SnapshotError("Snapshot parts disagree on their header")
+        if pending.parts[part] is None:
+            pending.parts[part] = decode_records(datagram, count)
+            pending.received += 1
+        if pending.received < len(pending.parts):
+            return None
+
+        del self._pending[sequence]
+        return ReceivedSnapshot(
+            sequence,
+            pending.input_sequence,
+            pending.server_time,
+            self._complete(sequence, pending),
+        )
+
+    def _complete(self, sequence: int, pending: _PartialSnapshot) -> Snapshot:
+        if pending.kind == KIND_KEYFRAME:
+            state: Snapshot = {}
+        else:
+            state = dict(self._states[pending.baseline])
+
+        for records in pending.parts:
+            for net_id, mask, values in records:
+                if mask & REMOVED:
+                    state.pop(net_id, None)
+                elif mask == ALL_FIELDS:
+                    state[net_id] = values
+                else:
+                    entity = list(state.get(net_id, (0, 0, 0, 0)))
+                    values = iter(values)
+                    for bit in range(4):
+                        if mask >> bit & 1:
+                            entity[bit] = next(values)
+                    state[net_id] = tuple(entity)
+
+        self.latest = sequence
+        self._states[sequence] = state
+        while len(self._states) > self.history:
+            self._states.popitem(last=False)
+        # Anything older than the latest snapshot can never be completed
+        for stale in [seq for seq in self._pending if seq < sequence]:
+            del self._pending[stale]
+        return state
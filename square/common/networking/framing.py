@@ -0,0 +1,98 @@
+"""Length prefixed framing for the TCP control channel.
+
+TCP is a stream, so a single recv can hold several messages or only part of
+one. Every message is sent as a 4 byte big endian length followed by that
+many bytes of UTF-8 text, and each connection reads into a `FrameBuffer`
+which splits the stream back into messages.
+"""
+import struct
+from typing import List
+
+from square import BUFFER_SIZE
+
+FRAME_HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 1 << 20
+
+
+class FramingError(ValueError):
+    """Raised when a peer sends a frame that can't be valid."""
+
+
+def encode_frame(message: str) -> bytes:
+    """Encode a message as a single frame."""
+    payload = message.encode("utf-8")
+    if len(payload) > MAX_FRAME_SIZE:
+        raise FramingError("Message is larger than the maximum frame size")
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+class FrameBuffer:
+    """Receive buffer for one connection.
+
+    Data is received straight into a preallocated bytearray and messages are
+    decoded from memoryview slices of it, so there are no intermediate bytes
+    objects. Unread data is moved back to the front of the buffer when the
+    free space at the end runs low, which keeps every frame contiguous.
+
+    :param capacity: Initial size of the buffer, it grows to fit large frames.
+    """
+
+    def __init__(self, capacity: int = BUFFER_SIZE * 4):
+        self.buffer = bytearray(capacity)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+
+    def _reserve(self, size: int) -> None:
+        """Make sure there is room for at least `size` more bytes."""
+        if len(self.buffer) - self.end >= size:
+            return
+        pending = self.end - self.start
+        if pending + size > len(self.buffer):
+            # Memoryviews must be released before a bytearray can be resized
+            self.view.release()
+            self.buffer.extend(bytes(pending + size - len(self.buffer)))
+            self.view = memoryview(self.buffer)
+        self.view[:pending] = self.view[self.start : self.end]
+        self.start = 0
+        self.end = pending
+
+    def recv_into(self, socket) -> int:
+        """Receive whatever is available from `socket` into the buffer.
+
+        :return: The number of bytes received, 0 once the peer has closed
+                 the connection.
+        """
+        self._reserve(BUFFER_SIZE)
+        received = socket.recv_into(self.view[self.end :])
+        self.end += received
+        return received
+
+    def messages(self) -> List[str]:
+        """Decode and consume every complete message in the buffer.
+
+        Raises a FramingError if the peer announced an oversized frame.
+        """
+        messages = []
+        view = self.view
+        start = self.start
+        end = self.end
+        header_size = FRAME_HEADER.size
+        while end - start >= header_size:
+            (size,) = FRAME_HEADER.unpack_from(view, start)
+            if size > MAX_FRAME_SIZE:
+                raise FramingError("Peer sent a frame larger than the maximum")
+            if end - start - header_size < size:
+                # Make sure the rest of this frame will fit
+                self.start = start
+                self._reserve(header_size + size - (end - start))
+                return messages
+            start += header_size
+            messages.append(str(view[start : start + size], "utf-8"))
+            start += size
+
+        if start == end:
+            start = end = 0
+        self.start = start
+        self.end = end
+        return messages
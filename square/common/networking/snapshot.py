@@ -0,0 +1,259 @@
+"""Binary snapshot wire format.
+
+Every snapshot datagram starts with a fixed header of ``(version, kind,
+sequence, baseline, input_sequence, server_time, part, parts, count)``
+followed by ``count`` records. ``input_sequence`` is the last input command
+of the receiving client the server has simulated when the snapshot was
+taken, and ``server_time`` is when it was taken, in milliseconds of server
+time wrapping around every 2**32 milliseconds.
+
+Server snapshots are either keyframes, which carry every entity, or deltas,
+which only carry the fields that changed since the ``baseline`` snapshot the
+client last acknowledged. Each record is a network id, a field mask and the
+quantized value of every field set in the mask. Entities that disappeared
+since the baseline are sent with only the `REMOVED` bit set.
+
+Snapshots that do not fit into a single `BUFFER_SIZE` datagram are split
+into ``parts`` datagrams sharing the same sequence number, and a client only
+treats a snapshot as received once every part has arrived.
+
+Clients send input commands instead of their state. An input datagram has
+a short header of ``(version, kind, sequence, ack, count)`` followed by one
+byte of input bits per command, for the ``count`` commands ending at command
+``sequence``. Clients keep sending every command the server has not applied
+yet, so losing a datagram loses no input. ``ack`` is the sequence of the
+latest snapshot the client has fully received.
+"""
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from square import BUFFER_SIZE
+
+SNAPSHOT_VERSION = 4
+
+KIND_KEYFRAME = 1
+KIND_DELTA = 2
+KIND_INPUT = 4
+
+# version, kind, sequence, baseline sequence, input sequence, server time,
+# part, part count, record count
+HEADER = struct.Struct("!BBIIIIBBH")
+# network id, field mask
+RECORD_HEADER = struct.Struct("!HB")
+# version, kind, newest command sequence, snapshot ack, command count
+INPUT_HEADER = struct.Struct("!BBIIB")
+
+# Field mask bits, in the order the fields are written
+VELOCITY_X = 0x01
+VELOCITY_Y = 0x02
+POSITION_X = 0x04
+POSITION_Y = 0x08
+ALL_FIELDS = 0x0F
+REMOVED = 0x10
+
+_FIELD_FORMATS = ("h", "h", "i", "i")
+_FIELD_STRUCTS = [
+    struct.Struct(
+        "!" + "".join(fmt for bit, fmt in enumerate(_FIELD_FORMATS) if mask >> bit & 1)
+    )
+    for mask in range(ALL_FIELDS + 1)
+]
+
+# Quantization steps per unit
+VELOCITY_SCALE = 256
+POSITION_SCALE = 16
+TIME_SCALE = 1000
+
+MAX_PARTS = 255
+MAX_INPUTS = 255
+
+# Quantized (vx, vy, x, y)
+EntityState = Tuple[int, int, int, int]
+Snapshot = Dict[int, EntityState]
+
+
+class SnapshotError(ValueError):
+    """Raised when a datagram is not a valid snapshot or input datagram."""
+
+
+def _clamp(value: int, limit: int) -> int:
+    return -limit if value < -limit else limit if value > limit else value
+
+
+def quantize(vx: float, vy: float, x: float, y: float) -> EntityState:
+    """Quantize an entity's velocity and position for the wire."""
+    return (
+        _clamp(round(vx * VELOCITY_SCALE), 0x7FFF),
+        _clamp(round(vy * VELOCITY_SCALE), 0x7FFF),
+        _clamp(round(x * POSITION_SCALE), 0x7FFFFFFF),
+        _clamp(round(y * POSITION_SCALE), 0x7FFFFFFF),
+    )
+
+
+def dequantize(state: EntityState) -> Tuple[float, float, float, float]:
+    """Convert a quantized entity state back to ``(vx, vy, x, y)``."""
+    return (
+        state[0] / VELOCITY_SCALE,
+        state[1] / VELOCITY_SCALE,
+        state[2] / POSITION_SCALE,
+        state[3] / POSITION_SCALE,
+    )
+
+
+_FULL_RECORD = struct.Struct(
+    RECORD_HEADER.format + _FIELD_STRUCTS[ALL_FIELDS].format[1:]
+)
+
+
+def _encode_record(net_id: int, state: EntityState, previous) -> Optional[bytes]:
+    if previous is None:
+        return _FULL_RECORD.pack(net_id, ALL_FIELDS, *state)
+    if state == previous:
+        return None
+    mask = 0
+    values = []
+    for bit in range(4):
+        if state[bit] != previous[bit]:
+            mask |= 1 << bit
+            values.append(state[bit])
+    return RECORD_HEADER.pack(net_id, mask) + _FIELD_STRUCTS[mask].pack(*values)
+
+
+def encode_snapshot(
+    sequence: int,
+    state: Snapshot,
+    baseline_sequence: int = 0,
+    baseline: Optional[Snapshot] = None,
+    input_sequence: int = 0,
+    server_time: float = 0.0,
+) -> List[bytes]:
+    """Encode a snapshot into one or more datagrams.
+
+    :param sequence: Snapshot sequence number, shared by every part.
+    :param state: The quantized state of every entity the client should see.
+    :param baseline_sequence: The sequence number of `baseline`.
+    :param baseline: The state of the snapshot the delta is computed against,
+                     or None to encode a keyframe.
+    :param input_sequence: The last input command of the receiving client
+                           that is part of `state`.
+    :param server_time: Seconds of server time `state` was taken at.
+    :return: A list of datagrams, each no larger than `BUFFER_SIZE`.
+    """
+    records = []
+    if baseline is None:
+        for net_id, entity in state.items():
+            records.append(_encode_record(net_id, entity, None))
+    else:
+        for net_id, entity in state.items():
+            record = _encode_record(net_id, entity, baseline.get(net_id))
+            if record is not None:
+                records.append(record)
+        for net_id in baseline.keys() - state.keys():
+            records.append(RECORD_HEADER.pack(net_id, REMOVED))
+
+    # Group records into datagram sized parts
+    parts: List[List[bytes]] = [[]]
+    size = HEADER.size
+    for record in records:
+        if size + len(record) > BUFFER_SIZE:
+            parts.append([])
+            size = HEADER.size
+        parts[-1].append(record)
+        size += len(record)
+    if len(parts) > MAX_PARTS:
+        raise SnapshotError("Snapshot does not fit in the maximum number of parts")
+
+    kind = KIND_KEYFRAME if baseline is None else KIND_DELTA
+    timestamp = round(server_time * TIME_SCALE) & 0xFFFFFFFF
+    return [
+        HEADER.pack(
+            SNAPSHOT_VERSION,
+            kind,
+            sequence,
+            baseline_sequence if baseline is not None else 0,
+            input_sequence,
+            timestamp,
+            index,
+            len(parts),
+            len(part),
+        )
+        + b"".join(part)
+        for index, part in enumerate(parts)
+    ]
+
+
+def _check_header(datagram, header: struct.Struct) -> None:
+    if len(datagram) < header.size:
+        raise SnapshotError("Datagram is shorter than its header")
+    if datagram[0] != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {datagram[0]}")
+
+
+def decode_header(datagram) -> Tuple[int, int, int, int, float, int, int, int]:
+    """Decode and validate a snapshot datagram header.
+
+    :return: ``(kind, sequence, baseline, input_sequence, server_time, part,
+             parts, count)``, with ``server_time`` in seconds.
+    """
+    _check_header(datagram, HEADER)
+    header = HEADER.unpack_from(datagram)
+    return header[1:5] + (header[5] / TIME_SCALE,) + header[6:]
+
+
+def decode_records(datagram, count: int) -> List[Tuple[int, int, tuple]]:
+    """Decode the records of a snapshot datagram.
+
+    :return: ``(net_id, mask, values)`` for every record, where ``values``
+             holds the quantized value of every field set in ``mask``.
+    """
+    records = []
+    offset = HEADER.size
+    try:
+        for _ in range(count):
+            net_id, mask = RECORD_HEADER.unpack_from(datagram, offset)
+            if mask == ALL_FIELDS:
+                # Keyframes are made up entirely of full records
+                values = _FULL_RECORD.unpack_from(datagram, offset)
+                records.append((net_id, mask, values[2:]))
+                offset += _FULL_RECORD.size
+                continue
+            offset += RECORD_HEADER.size
+            fields = _FIELD_STRUCTS[mask & ALL_FIELDS]
+            records.append((net_id, mask, fields.unpack_from(datagram, offset)))
+            offset += fields.size
+    except struct.error as e:
+        raise SnapshotError("Snapshot is truncated") from e
+    if offset != len(datagram):
+        raise SnapshotError("Snapshot length does not match its records")
+    return records
+
+
+def encode_inputs(sequence: int, ack: int, inputs: Sequence[int]) -> bytes:
+    """Encode a window of client input commands.
+
+    :param sequence: Sequence number of the last command in `inputs`.
+    :param ack: The latest snapshot sequence the client fully received.
+    :param inputs: The input bits of consecutive commands, oldest first.
+    """
+    if len(inputs) > MAX_INPUTS:
+        raise SnapshotError("Too many input commands for one datagram")
+    return INPUT_HEADER.pack(
+        SNAPSHOT_VERSION, KIND_INPUT, sequence, ack, len(inputs)
+    ) + bytes(inputs)
+
+
+def decode_inputs(datagram) -> Tuple[int, int, bytes]:
+    """Decode a window of client input commands.
+
+    :return: ``(sequence, ack, inputs)``, where ``inputs`` holds the input
+             bits of the commands ending at command ``sequence``.
+    """
+    _check_header(datagram, INPUT_HEADER)
+    _, kind, sequence, ack, count = INPUT_HEADER.unpack_from(datagram)
+    if kind != KIND_INPUT:
+        raise SnapshotError(f"Unexpected datagram kind {kind}")
+    if len(datagram) != INPUT_HEADER.size + count:
+        raise SnapshotError("Input length does not match its command count")
+    if count > sequence:
+        raise SnapshotError("Input commands start before the first sequence")
+    return sequence, ack, bytes(datagram[INPUT_HEADER.size :])
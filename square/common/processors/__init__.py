@@ -1 +1,2 @@
+from .input_processor import InputProcessor
 from .physics_processor import PhysicsProcessor
@@ -0,0 +1,128 @@
+from typing import Deque, Iterable, List, Sequence, Tuple
+
+from square import UDP_SEND_INTERVAL
+from square.common import esper
+from square.common.components import InputComponent, PhysicsComponent
+
+# Input bits of a command
+LEFT = 0x01
+RIGHT = 0x02
+UP = 0x04
+DOWN = 0x08
+
+# Distance moved per step while a direction is held
+SPEED = 3
+
+# Most input commands an entity can have waiting, a client whose clock runs
+# faster than the server's loses its oldest commands instead of adding lag
+MAX_QUEUED_INPUTS = 30
+# Commands one input datagram usually brings, at 60 steps a second. A queue
+# deeper than that is caught up on, so a late burst doesn't add lag for good
+TARGET_QUEUED_INPUTS = round(UDP_SEND_INTERVAL * 60)
+
+
+def input_bits(inp: InputComponent) -> int:
+    """Pack the keys held in an InputComponent into input bits."""
+    return (
+        (LEFT if inp.left else 0)
+        | (RIGHT if inp.right else 0)
+        | (UP if inp.up else 0)
+        | (DOWN if inp.down else 0)
+    )
+
+
+def input_velocity(bits: int) -> Tuple[int, int]:
+    """The velocity a command with these input bits gives for one step."""
+    vx = vy = 0
+    if bits & UP and not bits & DOWN:
+        vy = SPEED
+    elif bits & DOWN and not bits & UP:
+        vy = -SPEED
+    if bits & LEFT and not bits & RIGHT:
+        vx = -SPEED
+    elif bits & RIGHT and not bits & LEFT:
+        vx = SPEED
+    return vx, vy
+
+
+def queue_commands(
+    inp: InputComponent,
+    sequence: int,
+    inputs: Sequence[int],
+    limit: int = MAX_QUEUED_INPUTS,
+) -> None:
+    """Queue the commands of an input datagram that are new to `inp`.
+
+    Datagrams overlap and can arrive out of order, so only the commands
+    newer than anything queued before are kept.
+    :param sequence: Sequence number of the last command in `inputs`.
+    :param inputs: The input bits of consecutive commands, oldest first.
+    :param limit: Most commands to keep queued, the oldest are dropped.
+    """
+    first = sequence - len(inputs) + 1
+    for index in range(max(inp.received + 1 - first, 0), len(inputs)):
+        inp.commands.append((first + index, inputs[index]))
+    inp.received = max(inp.received, sequence)
+    while len(inp.commands) > limit:
+        inp.commands.popleft()
+
+
+def drop_commands(commands: Deque[Tuple[int, int]], sequence: int) -> None:
+    """Drop the ``(sequence, input bits)`` commands up to and including
+    command `sequence` from the front of `commands`.
+    """
+    while commands and commands[0][0] <= sequence:
+        commands.popleft()
+
+
+def replay_commands(
+    commands: Iterable[Tuple[int, int]], x: float, y: float
+) -> Tuple[float, float]:
+    """Where an entity at ``(x, y)`` ends up after simulating `commands`,
+    one step each, like the InputProcessor and PhysicsProcessor would.
+    """
+    for _, bits in commands:
+        vx, vy = input_velocity(bits)
+        x += vx
+        y += vy
+    return x, y
+
+
+class InputProcessor(esper.Processor):
+    """Turns queued input commands into velocities.
+
+    Every step simulates the oldest queued command of each entity. An entity
+    without a command stands still, so the server ends up in the same place
+    as the client that predicted the commands, however they were delayed.
+    While more than `target` commands are queued, a second one is simulated
+    in the same step, by moving the entity the sum of both velocities.
+    Must run before the PhysicsProcessor, so a command moves its entity in
+    the step that simulates it.
+
+    :param target: Queue depth above which commands are caught up on.
+    """
+
+    reads = (InputComponent,)
+    writes = (InputComponent, PhysicsComponent)
+
+    def __init__(self, target: int = TARGET_QUEUED_INPUTS):
+        self.target = target
+
+    def process(self, delta_time: float, excludes: List[int] = []):
+        target = self.target
+        for ent, (phys, inp) in self.world.get_components(
+            PhysicsComponent, InputComponent
+        ):
+            commands = inp.commands
+            if not commands:
+                phys.velocity[0] = phys.velocity[1] = 0
+                continue
+            behind = len(commands) > target
+            inp.applied, bits = commands.popleft()
+            vx, vy = input_velocity(bits)
+            if behind:
+                inp.applied, bits = commands.popleft()
+                extra_vx, extra_vy = input_velocity(bits)
+                vx += extra_vx
+                vy += extra_vy
+            phys.velocity[0], phys.velocity[1] = vx, vy
@@ -1,13 +1,31 @@
-from typing import List
+from typing import List, Optional
 
 from square.common import esper
-from square.common.components import PhysicsComponent, SpriteComponent
+from square.common.components import PhysicsComponent, TransformComponent
 
 
 class PhysicsProcessor(esper.Processor):
+    """Moves every body by its velocity.
+
+    :param store: Optional ColumnStore with x, y, vx and vy columns. When
+                  given, every body must live in it and they are all moved
+                  with whole column operations.
+    """
+
+    reads = (PhysicsComponent, TransformComponent)
+    writes = (TransformComponent,)
+
+    def __init__(self, store: Optional[esper.ColumnStore] = None):
+        self.store = store
+
     def process(self, delta_time: float, excludes: List[int] = []):
-        for ent, (phys, sprite) in self.world.get_components(
-            PhysicsComponent, SpriteComponent
+        if self.store is not None:
+            self.store.iadd("x", "vx")
+            self.store.iadd("y", "vy")
+            return
+
+        for ent, (phys, transform) in self.world.get_components(
+            PhysicsComponent, TransformComponent
         ):
-            sprite.sprite.center_x += phys.velocity[0]
-            sprite.sprite.center_y += phys.velocity[1]
+            transform.x += phys.velocity[0]
+            transform.y += phys.velocity[1]
@@ -0,0 +1,60 @@
+"""Rolling statistics for timing instrumentation."""
+
+from collections import deque
+from typing import Deque, Dict, List
+
+
+def _rank(ordered: List[float], percent: float) -> float:
+    """Nearest rank percentile of an already sorted, non empty list."""
+    index = round(percent / 100 * len(ordered)) - 1
+    return ordered[max(0, min(len(ordered) - 1, index))]
+
+
+class RollingHistogram:
+    """Distribution of the most recent samples.
+
+    Samples are kept in a fixed size window, so the percentiles follow
+    recent behaviour instead of averaging over the whole run. Sorting only
+    happens when a summary is asked for, adding a sample is O(1).
+    :param size: Number of samples to keep.
+    """
+
+    def __init__(self, size: int = 600):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def add(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+
+    def clear(self) -> None:
+        self.samples.clear()
+        self.count = 0
+
+    def percentile(self, percent: float) -> float:
+        """Percentile of the window, 0 when it is empty."""
+        if not self.samples:
+            return 0.0
+        return _rank(sorted(self.samples), percent)
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, p50, p95, p99 and max of the window.
+        `count` is every sample ever added, the rest only cover the window.
+        """
+        if not self.samples:
+            summary = dict.fromkeys(("mean", "p50", "p95", "p99", "max"), 0.0)
+            summary["count"] = self.count
+            return summary
+
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "mean": sum(ordered) / len(ordered),
+            "p50": _rank(ordered, 50),
+            "p95": _rank(ordered, 95),
+            "p99": _rank(ordered, 99),
+            "max": ordered[-1],
+        }
@@ -0,0 +1,51 @@
+"""Fixed timestep accumulator for driving the simulation."""
+
+
+class FixedTimestep:
+    """Turns variable frame times into a whole number of fixed steps.
+
+    Time handed to `advance` builds up in an accumulator, and every full
+    `step` in it is one step of simulation, so the simulation advances the
+    same way however irregular the calls are. A late frame is caught up in
+    batches of at most `max_steps`, the rest waits for the next call. Once
+    more than `max_lag` seconds are owed the surplus is dropped, so an
+    overloaded process slows the simulation down instead of spiralling.
+
+    :param step: Seconds of simulation per step.
+    :param max_steps: Most steps returned by a single `advance`.
+    :param max_lag: Most seconds of simulation that can be owed.
+    """
+
+    def __init__(
+        self, step: float = 1 / 60, max_steps: int = 5, max_lag: float = 0.25
+    ):
+        self.step = step
+        self.max_steps = max_steps
+        self.max_lag = max_lag
+        self.accumulator = 0.0
+        # Steps taken, and seconds of simulation thrown away under load
+        self.steps = 0
+        self.dropped = 0.0
+
+    def advance(self, delta_time: float) -> int:
+        """Add elapsed time and take the steps that are due.
+        :param delta_time: Seconds since the last call.
+        :return: Number of steps to simulate now.
+        """
+        self.accumulator += delta_time
+        if self.accumulator > self.max_lag:
+            self.dropped += self.accumulator - self.max_lag
+            self.accumulator = self.max_lag
+
+        steps = min(int(self.accumulator / self.step), self.max_steps)
+        self.accumulator -= steps * self.step
+        self.steps += steps
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        """How far between the last step and the next one we are, from 0 to 1.
+        Rendering can interpolate between the last two simulated states by
+        this much to hide the difference between frame and step rate.
+        """
+        return min(self.accumulator / self.step, 1.0)
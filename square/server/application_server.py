@@ -1,17 +1,33 @@
-import queue
 import socket
 import sys
-from typing import Optional
+import time
+from typing import Dict, List, Optional, Tuple
 
-from square import UDP_SEND_INTERVAL
 from square.common.application import Application
-from square.common.components import PhysicsComponent, SpriteComponent
+from square.common.components import (
+    InputComponent,
+    PhysicsComponent,
+    TransformComponent,
+)
+from square.common.inbox import CoalescingInbox, Inbox
+from square.common.networking import DeltaEncoder, encode_frame, quantize
+from square.common.processors.input_processor import queue_commands
+from square.common.stats import RollingHistogram
 from square.server import clock
 from square.server.components import TCPComponent
-from square.server.networking import TCPConnectionListener, UDPReceiver
+from square.server.interest import DEFAULT_RADIUS, InterestManager
+from square.server.loop import ServerLoop
+from square.server.networking import DatagramSender, SelectorNetwork, ThreadedNetwork
+from square.server.processors import SnapshotProcessor
+from square.server.profiling import ProfileExporter
 
 _server: Optional["ServerApplication"] = None
 
+NETWORK_BACKENDS = {
+    "threads": ThreadedNetwork,
+    "selectors": SelectorNetwork,
+}
+
 
 def get_server() -> "ServerApplication":
     if _server is None:
@@ -32,52 +48,95 @@ class ServerApplication(Application):
         self,
         address: str,
         port: int,
+        interest_radius: float = DEFAULT_RADIUS,
+        backend: str = "threads",
+        columnar: bool = False,
+        profile_interval: Optional[float] = None,
+        loop_mode: str = "sleep",
     ):
-        super().__init__()
+        super().__init__(columnar=columnar, timed=profile_interval is not None)
 
         self.address = address
         self.port = port
 
+        # Only send clients the players near them, a radius of 0 sends everyone
+        self.interest = InterestManager(interest_radius) if interest_radius else None
+
         # Networking Stuff
         self.tcp_socket = None
         self.udp_socket = None
-        self.client_connection_queue = None
-        self.client_disconnect_queue = None
-        self.client_message_queue = None
-        self.client_update_queue = None
-        self.tcp_connector = None
-        self.udp_receiver = None
-        self.entity_tcp_receivers = None
+        self.client_connection_inbox = None
+        self.client_disconnect_inbox = None
+        self.client_message_inbox = None
+        self.client_update_inbox = None
+        self.network_backend = NETWORK_BACKENDS[backend]
+        self.network = None
+        self.udp_sender = None
+        self.loop_mode = loop_mode
+        self.loop = None
+        self.started = None
+        self.last_update = None
+
+        # Compact numeric ids used to key players in UDP snapshots
+        self.net_ids: Dict[str, int] = {}
+        self.client_addresses: Dict[str, Tuple[str, int]] = {}
+        self.snapshot_encoders: Dict[str, DeltaEncoder] = {}
+        self._free_net_ids: List[int] = []
+        self._next_net_id = 0
+        self.snapshot_sequence = 0
+
+        # Processor timings are logged every profile_interval seconds, and on
+        # SIGUSR1. None turns profiling off, 0 only dumps on the signal.
+        self.profiler = None
+        if profile_interval is not None:
+            self.profiler = ProfileExporter(self.world, profile_interval)
+
+        # Always on timings, reported to clients that ask for server_stats
+        self.tick_times = RollingHistogram()
+        self.input_times = RollingHistogram()
+        self.send_times = RollingHistogram()
+        self.send_bytes = RollingHistogram()
+
+        # Snapshots go out after the step has moved everyone, every few steps
+        self.world.add_processor(SnapshotProcessor(self), priority=-1)
 
         set_server(self)
 
     def start(self):
         # Setup TCP Handling
-        self.client_connection_queue = queue.Queue()
-        self.client_disconnect_queue = queue.Queue()
-        self.client_message_queue = queue.Queue()
+        self.client_connection_inbox = Inbox()
+        self.client_disconnect_inbox = Inbox()
+        self.client_message_inbox = Inbox()
         self.tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.tcp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.tcp_socket.bind((self.address, self.port))
         self.tcp_socket.listen()
         if self.port == 0:
             self.port = self.tcp_socket.getsockname()[1]
-        self.tcp_connector = TCPConnectionListener(
-            self.tcp_socket, self.client_connection_queue
-        )
-        self.entity_tcp_receivers = {}
-        self.tcp_connector.daemon = True
-        self.tcp_connector.start()
 
         # Setup UDP Handling
-        self.client_update_queue = queue.Queue()
+        # Every input datagram repeats the commands the server has not applied,
+        # so only the newest one from each client is needed each tick
+        self.client_update_inbox = CoalescingInbox()
         self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.udp_socket.bind((self.address, self.port))
-        self.udp_receiver = UDPReceiver(self.udp_socket, self.client_update_queue)
-        self.udp_receiver.daemon = True
-        self.udp_receiver.start()
+        self.udp_sender = DatagramSender(self.udp_socket)
+
+        self.network = self.network_backend(
+            self.tcp_socket,
+            self.udp_socket,
+            self.client_connection_inbox,
+            self.client_message_inbox,
+            self.client_disconnect_inbox,
+            self.client_update_inbox,
+        )
+        self.network.start()
 
         self.clock = clock.get_default()
+        self.loop = ServerLoop(self.clock, self.network, self.loop_mode)
+        if self.profiler is not None:
+            self.profiler.telemetry = self.clock.enable_telemetry(budget=1 / 60)
+            self.profiler.loop = self.loop
 
         self.run()
 
@@ -86,125 +145,220 @@ class ServerApplication(Application):
 
     def run(self):
         self.running = True
-        self.clock.schedule_interval(self.send_udp, UDP_SEND_INTERVAL)
-        self.clock.schedule_interval(self.on_update, 1 / 60)
+        if self.profiler is not None:
+            self.profiler.install_signal_handler()
+        self.started = self.last_update = self.clock.time()
+        self.clock.schedule_interval(self.on_update, self.timestep.step)
         try:
             while self.running:
-                self.clock.tick()
+                self.loop.step()
         except KeyboardInterrupt:
             sys.exit()
 
     def send_udp(self, delta_time):
-        """Send all player data to each connected Client"""
-
-        # There is a race condition where a client can disconnect but
-        # still be in the players listing of the server for enough time
-        # for it to be sent with this. So we need to process any
-        # disconnects that may have happened between the last on_update
-        # and now
-        self.process_client_disconnects()
-
-        data = ""
+        """Send all player data to each connected Client.
+        Called by the SnapshotProcessor every few steps, so it must leave
+        the world alone. Clients that disconnected since the start of the
+        update are still sent a snapshot, which is harmless, and removed
+        at the start of the next one.
+        """
+        started = time.perf_counter()
+
+        state = {}
+        positions = {}
         for client_id, client in self.players.items():
-            # Add address for this client to the data
-            data += f"{client_id};"
-            # Add the velocity for the body to the data
+            net_id = self.net_ids[client_id]
             phys = self.world.component_for_entity(client, PhysicsComponent)
-            data += f"{phys.velocity[0]};{phys.velocity[1]};"
-            # Add the actual sprite position
-            sprite = self.world.component_for_entity(client, SpriteComponent).sprite
-            data += f"{sprite.center_x};{sprite.center_y};"
-            # Add an extra ;; delimiter to separate players
-            data += ";"
-        # Encode data minus the last ;; delimiter
-        data = data[:-2].encode()
-        # Send data to all connected clients
+            transform = self.world.component_for_entity(client, TransformComponent)
+            state[net_id] = quantize(
+                phys.velocity[0],
+                phys.velocity[1],
+                transform.x,
+                transform.y,
+            )
+            positions[net_id] = (transform.x, transform.y)
+
+        if self.interest is not None:
+            self.interest.update(positions)
+
+        self.snapshot_sequence += 1
+        # Clients interpolate between snapshots by the time they were taken
+        server_time = self.clock.time() - self.started
+        # Send each client the changes since the last snapshot it acknowledged
+        batch = []
         for id in self.players:
-            id_split = id.split(":")
-            self.udp_socket.sendto(data, (id_split[0], int(id_split[1])))
+            address = self.client_addresses[id]
+            if self.interest is None:
+                client_state = state
+            else:
+                visible = self.interest.visible_for(self.net_ids[id])
+                client_state = {net_id: state[net_id] for net_id in visible}
+            # Tell the client which of its commands this snapshot includes
+            inp = self.world.component_for_entity(self.players[id], InputComponent)
+            encoder = self.snapshot_encoders[id]
+            datagrams = encoder.encode(
+                self.snapshot_sequence, client_state, inp.applied, server_time
+            )
+            for datagram in datagrams:
+                batch.append((datagram, address))
+        self.udp_sender.send_batch(batch)
+
+        self.send_bytes.add(sum(len(datagram) for datagram, _ in batch))
+        self.send_times.add(time.perf_counter() - started)
+
+    def allocate_net_id(self, id: str) -> int:
+        if self._free_net_ids:
+            net_id = self._free_net_ids.pop()
+        else:
+            if self._next_net_id > 0xFFFF:
+                raise RuntimeError("Out of network ids")
+            net_id = self._next_net_id
+            self._next_net_id += 1
+        self.net_ids[id] = net_id
+        return net_id
+
+    def release_net_id(self, id: str) -> None:
+        self._free_net_ids.append(self.net_ids.pop(id))
+
+    def connect_message(self, ids) -> bytes:
+        """Build a client_connect message announcing one or more players"""
+        data = "client_connect"
+        for id in ids:
+            transform = self.world.component_for_entity(
+                self.players[id], TransformComponent
+            )
+            data += f";;{id};;{self.net_ids[id]};;{transform.x};;{transform.y}"
+        return encode_frame(data)
 
     def new_client(self, socket, id):
-        entity = self.add_player(id, 100, 100)
-        self.world.add_component(
-            entity,
-            TCPComponent(
-                socket, self.client_message_queue, self.client_disconnect_queue
-            ),
+        self.new_clients([(socket, id)])
+
+    def new_clients(self, connections):
+        """Add the players for a batch of (socket, id) connections"""
+        connections = list(connections)
+        new_ids = [id for _, id in connections]
+        entities = self.add_players((id, 100, 100) for id in new_ids)
+
+        tcp_comps = []
+        for client_socket, id in connections:
+            self.allocate_net_id(id)
+            self.snapshot_encoders[id] = DeltaEncoder()
+            host, _, port = id.rpartition(":")
+            self.client_addresses[id] = (host, int(port))
+            tcp_receiver = self.network.watch(client_socket, id)
+            tcp_comps.append(TCPComponent(client_socket, tcp_receiver))
+        self.world.add_components(
+            (entity, {TCPComponent: tcp_comp})
+            for entity, tcp_comp in zip(entities, tcp_comps)
         )
 
-        for entity in self.players.values():
-            tcp_comp = self.world.component_for_entity(entity, TCPComponent)
-            tcp_comp.socket.sendall(f"client_connect;;{id};;100;;100".encode())
+        # The new clients need to know about everyone in the game, everyone
+        # else only needs to know about the new clients
+        everyone = self.connect_message(self.players)
+        for tcp_comp in tcp_comps:
+            tcp_comp.socket.sendall(everyone)
+        message = self.connect_message(new_ids)
+        new_ids = set(new_ids)
+        for other_id, other in self.players.items():
+            if other_id not in new_ids:
+                other_tcp = self.world.component_for_entity(other, TCPComponent)
+                other_tcp.socket.sendall(message)
 
     def remove_client(self, id):
-        entity = self.players[id]
-        tcp_comp = self.world.component_for_entity(entity, TCPComponent)
-        tcp_comp.disconnect()
-        self.remove_player(id)
-
-        # Inform all other clients of the disconnect
+        self.remove_clients([id])
+
+    def remove_clients(self, ids):
+        ids = list(ids)
+        for id in ids:
+            tcp_comp = self.world.component_for_entity(self.players[id], TCPComponent)
+            self.network.unwatch(tcp_comp.socket)
+            tcp_comp.disconnect()
+        self.remove_players(ids)
+
+        for id in ids:
+            if self.interest is not None:
+                self.interest.remove(self.net_ids[id])
+            self.release_net_id(id)
+            del self.snapshot_encoders[id]
+            del self.client_addresses[id]
+
+        # Inform all other clients of the disconnects
+        messages = b"".join(encode_frame(f"client_disconnect;;{id}") for id in ids)
         for entity in self.players.values():
             tcp_comp = self.world.component_for_entity(entity, TCPComponent)
-            tcp_comp.socket.sendall(f"client_disconnect;;{id}".encode())
+            tcp_comp.socket.sendall(messages)
 
     def on_update(self, delta_time: float):
         """Game Logic"""
-        super().on_update(delta_time)
-
+        # The clock's delta_time is made up after it reschedules a late call,
+        # so the simulation is driven by the time actually elapsed instead
+        now = self.clock.time()
+        delta_time = now - self.last_update
+        self.last_update = now
+        started = time.perf_counter()
+
+        # Players join and leave between steps, never while the world runs
         self.process_client_connections()
         self.process_client_disconnects()
         self.process_client_messages()
-        self.process_client_updates()
+        inputs_started = time.perf_counter()
+        self.process_client_inputs()
+        self.input_times.add(time.perf_counter() - inputs_started)
 
-    def process_client_connections(self):
-        connections = []
-        while not self.client_connection_queue.empty():
-            connections.append(self.client_connection_queue.get())
-        if not connections:
-            return
+        super().on_update(delta_time)
+        self.tick_times.add(time.perf_counter() - started)
 
-        for connection in connections:
-            self.new_client(connection[0], connection[1])
+        if self.profiler is not None:
+            self.profiler.tick(delta_time)
 
-    def process_client_disconnects(self):
-        disconnects = []
-        while not self.client_disconnect_queue.empty():
-            disconnects.append(self.client_disconnect_queue.get())
-        if not disconnects:
-            return
+    def process_client_connections(self):
+        connections = self.client_connection_inbox.drain()
+        if connections:
+            self.new_clients(connections)
 
-        for disconnect in disconnects:
-            id = disconnect.getpeername()
-            if id in self.players:
-                self.remove_client(id)
+    def process_client_disconnects(self):
+        # Drop repeated reports and clients that are already gone
+        ids = {id for id in self.client_disconnect_inbox.drain() if id in self.players}
+        if ids:
+            self.remove_clients(ids)
 
     def process_client_messages(self):
-        messages = []
-        while not self.client_message_queue.empty():
-            messages.append(self.client_message_queue.get())
-        if not messages:
-            return
-
-        for message in messages:
-            # We don't actually have any TCP messages from clients right now
-            # outside of connections, which are handled separately.
-            # This would be used for things like chat messages or something
-            pass
-
-    def process_client_updates(self):
-        updates = []
-        while not self.client_update_queue.empty():
-            updates.append(self.client_update_queue.get())
-        if not updates:
-            return
-
-        for update in updates:
-            if update[0] in self.players:
-                entity = self.players[update[0]]
-                phys = self.world.component_for_entity(entity, PhysicsComponent)
-                sprite = self.world.component_for_entity(entity, SpriteComponent)
-                data = [float(val) for val in update[1][0].split(";")]
-                phys.velocity[0] = data[0]
-                phys.velocity[1] = data[1]
-                sprite.sprite.center_x = data[2]
-                sprite.sprite.center_y = data[3]
+        for id, message in self.client_message_inbox.drain():
+            # Connections are handled separately, this would also be used
+            # for things like chat messages
+            command = message.split(";;")[0]
+            if command == "server_stats" and id in self.players:
+                tcp_comp = self.world.component_for_entity(
+                    self.players[id], TCPComponent
+                )
+                tcp_comp.socket.sendall(self.stats_message())
+
+    def stats_message(self) -> bytes:
+        """Build a server_stats message with the player count, and the
+        recent tick, input and send_udp timings in milliseconds. A tick
+        includes the snapshots sent in it.
+        """
+        fields = {"players": len(self.players)}
+        for name, histogram in (
+            ("tick", self.tick_times),
+            ("inputs", self.input_times),
+            ("send", self.send_times),
+        ):
+            summary = histogram.summary()
+            for stat in ("p50", "p99", "max"):
+                fields[f"{name}_{stat}_ms"] = round(summary[stat] * 1000, 3)
+        fields["send_bytes"] = round(self.send_bytes.summary()["mean"])
+        data = "server_stats" + "".join(f";;{k}={v}" for k, v in fields.items())
+        return encode_frame(data)
+
+    def process_client_inputs(self):
+        for id, (sequence, ack, inputs) in self.client_update_inbox.drain().items():
+            if id not in self.players:
+                continue
+            self.snapshot_encoders[id].ack(ack)
+            self.queue_inputs(id, sequence, inputs)
+
+    def queue_inputs(self, id, sequence, inputs):
+        """Queue a client's new input commands for simulation"""
+        inp = self.world.component_for_entity(self.players[id], InputComponent)
+        queue_commands(inp, sequence, inputs)
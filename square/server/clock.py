@@ -69,6 +69,8 @@ you specify to the callback function::
 You can cancel a function scheduled with any of these methods using
 `unschedule`::
     clock.unschedule(move)
+Functions due at the same time are called in the order they were scheduled,
+or rescheduled after their last call.
 Using multiple clocks
 =====================
 The clock functions are all relayed to an instance of
@@ -83,14 +85,25 @@ measurement.  Each clock must be "ticked" separately.
 Multiple and derived clocks potentially allow you to separate "game-time" and
 "wall-time", or to synchronise your clock to an audio or video stream instead
 of the system clock.
+Telemetry
+=========
+A clock can time its own ticks and scheduled callbacks::
+    telemetry = clk.enable_telemetry(budget=1 / 60)
+    ...
+    print(telemetry.summary())
+See `ClockTelemetry` for what is measured.
 """
 
 import time as _time
+from bisect import bisect_left as _bisect_left
+from bisect import insort as _insort
 from collections import deque as _deque
 from heapq import heappop as _heappop
 from heapq import heappush as _heappush
 from heapq import heappushpop as _heappushpop
-from operator import attrgetter as _attrgetter
+from itertools import count as _count
+
+from square.common.stats import RollingHistogram as _RollingHistogram
 
 
 class _ScheduledItem:
@@ -103,7 +116,16 @@ class _ScheduledItem:
 
 
 class _ScheduledIntervalItem:
-    __slots__ = ["func", "interval", "last_ts", "next_ts", "args", "kwargs"]
+    __slots__ = [
+        "func",
+        "interval",
+        "last_ts",
+        "next_ts",
+        "args",
+        "kwargs",
+        "stats",
+        "order",
+    ]
 
     def __init__(self, func, interval, last_ts, next_ts, args, kwargs):
         self.func = func
@@ -112,14 +134,167 @@ class _ScheduledIntervalItem:
         self.next_ts = next_ts
         self.args = args
         self.kwargs = kwargs
+        self.stats = None
+        # Breaks ties between items due at the same time, set every time the
+        # item is scheduled
+        self.order = 0
 
     def __lt__(self, other):
         try:
+            if self.next_ts == other.next_ts:
+                return self.order < other.order
             return self.next_ts < other.next_ts
         except AttributeError:
             return self.next_ts < other
 
 
+class CallbackStats:
+    """Timing of one scheduled callback.
+    All times are in seconds.
+    :Ivariables:
+        `durations` : RollingHistogram
+            How long each call took.
+        `lateness` : RollingHistogram
+            How long after its scheduled time each call started.
+        `intervals` : RollingHistogram
+            Time between consecutive calls, for interval callbacks.
+        `late` : int
+            Calls that started more than `late_tolerance` of their
+            interval after their scheduled time.
+        `overruns` : int
+            Calls that took longer than their interval.
+        `missed` : int
+            Times the callback fell so far behind that it was rescheduled
+            from scratch, skipping the calls in between.
+        `drift` : float
+            Sum of the differences between the actual and intended interval.
+    """
+
+    def __init__(self, name, interval, window):
+        self.name = name
+        self.interval = interval
+        self.durations = _RollingHistogram(window)
+        self.lateness = _RollingHistogram(window)
+        self.intervals = _RollingHistogram(window)
+        self.late = 0
+        self.overruns = 0
+        self.missed = 0
+        self.drift = 0.0
+
+    def summary(self):
+        """Counters, and the histograms in milliseconds."""
+        durations = self.durations.summary()
+        lateness = self.lateness.summary()
+        intervals = self.intervals.summary()
+        return {
+            "calls": durations["count"],
+            "late": self.late,
+            "overruns": self.overruns,
+            "missed": self.missed,
+            "interval_ms": self.interval * 1000,
+            "actual_interval_ms": intervals["mean"] * 1000,
+            "drift_ms": self.drift * 1000,
+            "duration_p50_ms": durations["p50"] * 1000,
+            "duration_p95_ms": durations["p95"] * 1000,
+            "duration_p99_ms": durations["p99"] * 1000,
+            "duration_max_ms": durations["max"] * 1000,
+            "lateness_p95_ms": lateness["p95"] * 1000,
+        }
+
+
+class ClockTelemetry:
+    """Tick and callback timing for a `Clock`.
+    Created by `Clock.enable_telemetry`.
+    :Parameters:
+        `budget` : float
+            Seconds a tick may spend in callbacks, ticks taking longer are
+            counted in `over_budget`. None disables the count.
+        `late_tolerance` : float
+            Fraction of its interval a callback may start late before it is
+            counted as late.
+        `window` : int
+            Number of samples kept by every histogram.
+    """
+
+    def __init__(self, budget=None, late_tolerance=0.25, window=600):
+        self.budget = budget
+        self.late_tolerance = late_tolerance
+        self.window = window
+        self.callbacks = {}
+        # Only ticks that ran callbacks are recorded, idle ticks say nothing
+        # about the load: the time spent in callbacks, and between such ticks
+        self.tick_durations = _RollingHistogram(window)
+        self.tick_intervals = _RollingHistogram(window)
+        self.over_budget = 0
+        self._last_tick = None
+
+    def _stats(self, item):
+        stats = item.stats
+        if stats is None:
+            name = getattr(item.func, "__qualname__", repr(item.func))
+            stats = self.callbacks.get(name)
+            if stats is None:
+                stats = self.callbacks[name] = CallbackStats(
+                    name, item.interval, self.window
+                )
+            item.stats = stats
+        return stats
+
+    def record_call(self, item, now, started, finished):
+        """Record a call of an interval item, before it is rescheduled."""
+        stats = self._stats(item)
+        duration = finished - started
+        lateness = started - item.next_ts
+        stats.durations.add(duration)
+        stats.lateness.add(lateness)
+
+        if item.interval:
+            interval = now - item.last_ts
+            stats.intervals.add(interval)
+            stats.drift += interval - item.interval
+            if lateness > item.interval * self.late_tolerance:
+                stats.late += 1
+            if duration > item.interval:
+                stats.overruns += 1
+
+    def record_missed(self, item):
+        self._stats(item).missed += 1
+
+    def record_tick(self, started, finished):
+        """Record a tick that called at least one function."""
+        if self._last_tick is not None:
+            self.tick_intervals.add(started - self._last_tick)
+        self._last_tick = started
+        duration = finished - started
+        self.tick_durations.add(duration)
+        if self.budget is not None and duration > self.budget:
+            self.over_budget += 1
+
+    def summary(self):
+        """Everything measured so far, with times in milliseconds.
+        :rtype: dict
+        :return: ``ticks`` holds the per tick figures, and ``callbacks`` the
+                 `CallbackStats.summary` of every callback by name.
+        """
+        durations = self.tick_durations.summary()
+        intervals = self.tick_intervals.summary()
+        return {
+            "ticks": {
+                "count": durations["count"],
+                "over_budget": self.over_budget,
+                "budget_ms": (self.budget or 0.0) * 1000,
+                "duration_p50_ms": durations["p50"] * 1000,
+                "duration_p99_ms": durations["p99"] * 1000,
+                "duration_max_ms": durations["max"] * 1000,
+                "interval_p50_ms": intervals["p50"] * 1000,
+                "interval_p99_ms": intervals["p99"] * 1000,
+            },
+            "callbacks": {
+                name: stats.summary() for name, stats in self.callbacks.items()
+            },
+        }
+
+
 class Clock:
     """Class for calculating and limiting framerate.
     It is also used for calling scheduled functions.
@@ -156,6 +331,27 @@ class Clock:
         self._schedule_interval_items = []
         self._current_interval_item = None
 
+        # Sorted next_ts of every item in the interval heap, for the soft
+        # scheduler to bisect. Built on first use, then kept up to date.
+        self._sorted_next_ts = None
+        # Interval items by function, so unschedule doesn't scan the heap
+        self._items_by_func = {}
+        # Items due at the same time run in the order they were scheduled
+        self._schedule_order = _count()
+
+        # Set by enable_telemetry
+        self.telemetry = None
+
+    def enable_telemetry(self, budget=None, late_tolerance=0.25, window=600):
+        """Start timing ticks and scheduled interval callbacks.
+        Calling it again keeps the existing measurements.
+        :see: `ClockTelemetry` for the parameters.
+        :rtype: `ClockTelemetry`
+        """
+        if self.telemetry is None:
+            self.telemetry = ClockTelemetry(budget, late_tolerance, window)
+        return self.telemetry
+
     @staticmethod
     def sleep(microseconds):
         _time.sleep(microseconds * 1e-6)
@@ -218,6 +414,7 @@ class Clock:
         #       that are scheduled during this loop, due to the heap
         self._current_interval_item = item = None
         get_soft_next_ts = self._get_soft_next_ts
+        telemetry = self.telemetry
         while interval_items:
 
             # the scheduler will hold onto a reference to an item in
@@ -226,7 +423,9 @@ class Clock:
             if item is None:
                 item = _heappop(interval_items)
             else:
+                self._add_next_ts(item.next_ts)
                 item = _heappushpop(interval_items, item)
+            self._remove_next_ts(item.next_ts)
 
             # a scheduled function may try and unschedule itself
             # so we need to keep a reference to the current
@@ -238,10 +437,14 @@ class Clock:
                 break
 
             # execute the callback
+            if telemetry is not None:
+                started = self.time()
             try:
                 item.func(now - item.last_ts, *item.args, **item.kwargs)
             except ReferenceError:
                 pass  # weakly-referenced object no longer exists.
+            if telemetry is not None:
+                telemetry.record_call(item, now, started, self.time())
 
             if item.interval:
 
@@ -264,14 +467,20 @@ class Clock:
                         # likely missed execution. do a soft reschedule to
                         # avoid lumping many events together.
                         # in this case, the next dt will not be accurate
+                        if telemetry is not None:
+                            telemetry.record_missed(item)
                         item.next_ts = get_soft_next_ts(now, item.interval)
                         item.last_ts = item.next_ts - item.interval
+                # Behind the items already due at the same time
+                item.order = next(self._schedule_order)
             else:
                 # not an interval, so this item will not be rescheduled
+                self._unindex(item)
                 self._current_interval_item = item = None
 
         if item is not None:
             _heappush(interval_items, item)
+            self._add_next_ts(item.next_ts)
 
         return True
 
@@ -293,7 +502,12 @@ class Clock:
             self.sleep(0)
 
         delta_t = self.update_time()
-        self.call_scheduled_functions(delta_t)
+        if self.telemetry is None:
+            self.call_scheduled_functions(delta_t)
+        else:
+            started = self.time()
+            if self.call_scheduled_functions(delta_t):
+                self.telemetry.record_tick(started, self.time())
         return delta_t
 
     def get_sleep_time(self, sleep_idle):
@@ -351,25 +565,44 @@ class Clock:
             return ts
         return last_ts
 
+    def _add_next_ts(self, next_ts):
+        if self._sorted_next_ts is not None:
+            _insort(self._sorted_next_ts, next_ts)
+
+    def _remove_next_ts(self, next_ts):
+        sorted_next_ts = self._sorted_next_ts
+        if sorted_next_ts is not None:
+            index = _bisect_left(sorted_next_ts, next_ts)
+            if index < len(sorted_next_ts) and sorted_next_ts[index] == next_ts:
+                del sorted_next_ts[index]
+
+    def _push_interval_item(self, item):
+        item.order = next(self._schedule_order)
+        _heappush(self._schedule_interval_items, item)
+        self._add_next_ts(item.next_ts)
+        self._items_by_func.setdefault(item.func, []).append(item)
+
+    def _unindex(self, item):
+        items = self._items_by_func.get(item.func)
+        if items is not None:
+            try:
+                items.remove(item)
+            except ValueError:
+                pass
+            if not items:
+                del self._items_by_func[item.func]
+
     def _get_soft_next_ts(self, last_ts, interval):
+        sorted_next_ts = self._sorted_next_ts
+        if sorted_next_ts is None:
+            sorted_next_ts = self._sorted_next_ts = sorted(
+                item.next_ts for item in self._schedule_interval_items
+            )
+
         def taken(ts, e):
             """Check if `ts` has already got an item scheduled nearby."""
-            # TODO this function is slow and called very often.
-            # Optimise it, maybe?
-            for item in self._schedule_interval_items:
-                if abs(item.next_ts - ts) <= e:
-                    return True
-                elif item.next_ts > ts + e:
-                    return False
-
-            return False
-
-        # sorted list is required required to produce expected results
-        # taken() will iterate through the heap, expecting it to be sorted
-        # and will not always catch smallest value, so sort here.
-        # do not remove the sort key...it is faster than relaying comparisons
-        # NOTE: do not rewrite as popping from heap, as that is super slow!
-        self._schedule_interval_items.sort(key=_attrgetter("next_ts"))
+            index = _bisect_left(sorted_next_ts, ts - e)
+            return index < len(sorted_next_ts) and sorted_next_ts[index] <= ts + e
 
         # Binary division over interval:
         #
@@ -432,7 +665,7 @@ class Clock:
         last_ts = self._get_nearest_ts()
         next_ts = last_ts + delay
         item = _ScheduledIntervalItem(func, 0, last_ts, next_ts, args, kwargs)
-        _heappush(self._schedule_interval_items, item)
+        self._push_interval_item(item)
 
     def schedule_interval(self, func, interval, *args, **kwargs):
         """Schedule a function to be called every `interval` seconds.
@@ -448,7 +681,7 @@ class Clock:
         last_ts = self._get_nearest_ts()
         next_ts = last_ts + interval
         item = _ScheduledIntervalItem(func, interval, last_ts, next_ts, args, kwargs)
-        _heappush(self._schedule_interval_items, item)
+        self._push_interval_item(item)
 
     def schedule_interval_soft(self, func, interval, *args, **kwargs):
         """Schedule a function to be called every ``interval`` seconds.
@@ -476,7 +709,7 @@ class Clock:
         next_ts = self._get_soft_next_ts(self._get_nearest_ts(), interval)
         last_ts = next_ts - interval
         item = _ScheduledIntervalItem(func, interval, last_ts, next_ts, args, kwargs)
-        _heappush(self._schedule_interval_items, item)
+        self._push_interval_item(item)
 
     def unschedule(self, func):
         """Remove a function from the schedule.
@@ -489,13 +722,8 @@ class Clock:
         # clever remove item without disturbing the heap:
         # 1. set function to an empty lambda -- original function is not called
         # 2. set interval to 0               -- item will be removed from heap eventually
-        valid_items = set(
-            item for item in self._schedule_interval_items if item.func == func
-        )
-
-        if self._current_interval_item:
-            if self._current_interval_item.func == func:
-                valid_items.add(self._current_interval_item)
+        # the index also holds the current item, while it is off the heap
+        valid_items = self._items_by_func.pop(func, ())
 
         for item in valid_items:
             item.interval = 0
@@ -1,15 +1,17 @@
 import socket
 
-from square.server.networking import TCPReceiver
-
 
 class TCPComponent:
-    def __init__(self, socket, message_queue, disconnect_queue):
+    def __init__(self, socket, tcp_receiver=None):
         self.socket = socket
-        self.tcp_receiver = TCPReceiver(self.socket, message_queue, disconnect_queue)
-        self.tcp_receiver.start()
+        self.tcp_receiver = tcp_receiver
 
     def disconnect(self):
-        self.socket.shutdown(socket.SHUT_RD)
+        try:
+            self.socket.shutdown(socket.SHUT_RD)
+        except OSError:
+            # The client already closed its end of the connection
+            pass
         self.socket.close()
-        self.tcp_receiver.join()
+        if self.tcp_receiver is not None:
+            self.tcp_receiver.join()
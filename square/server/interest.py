@@ -0,0 +1,105 @@
+"""Area of interest filtering for server broadcasts.
+
+Each tick the positions of every entity are bucketed into a uniform grid.
+A client is then only sent the entities within `enter_radius` of its own
+square. Entities it can already see stay visible until they move past
+`exit_radius`, so entities near the edge don't flap in and out of view.
+"""
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+DEFAULT_RADIUS = 500.0
+DEFAULT_HYSTERESIS = 50.0
+
+Position = Tuple[float, float]
+
+
+class InterestGrid:
+    """Uniform grid of entity positions supporting radius queries."""
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.positions: Dict[Hashable, Position] = {}
+        self._cells: Dict[Tuple[int, int], List[Hashable]] = defaultdict(list)
+
+    def rebuild(self, positions: Dict[Hashable, Position]) -> None:
+        """Replace the contents of the grid with `positions`."""
+        self.positions = positions
+        self._cells.clear()
+        cell_size = self.cell_size
+        cells = self._cells
+        for key, (x, y) in positions.items():
+            cells[(int(x // cell_size), int(y // cell_size))].append(key)
+
+    def query(self, x: float, y: float, radius: float) -> Iterable[Hashable]:
+        """Yield every key within `radius` of ``(x, y)``."""
+        cell_size = self.cell_size
+        positions = self.positions
+        radius_squared = radius * radius
+        min_cx = int((x - radius) // cell_size)
+        max_cx = int((x + radius) // cell_size)
+        min_cy = int((y - radius) // cell_size)
+        max_cy = int((y + radius) // cell_size)
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                cell = self._cells.get((cx, cy))
+                if cell is None:
+                    continue
+                for key in cell:
+                    other_x, other_y = positions[key]
+                    dx = other_x - x
+                    dy = other_y - y
+                    if dx * dx + dy * dy <= radius_squared:
+                        yield key
+
+
+class InterestManager:
+    """Tracks which entities each viewer is interested in.
+
+    :param radius: Distance at which entities come into view.
+    :param hysteresis: Extra distance an entity has to move past `radius`
+                       before it leaves the view again.
+    """
+
+    def __init__(
+        self, radius: float = DEFAULT_RADIUS, hysteresis: float = DEFAULT_HYSTERESIS
+    ):
+        self.enter_radius = radius
+        self.exit_radius = radius + hysteresis
+        self.grid = InterestGrid(self.exit_radius)
+        self._visible: Dict[Hashable, Set[Hashable]] = {}
+
+    def update(self, positions: Dict[Hashable, Position]) -> None:
+        """Set the positions of every entity for this tick."""
+        self.grid.rebuild(positions)
+
+    def visible_for(self, viewer: Hashable) -> Set[Hashable]:
+        """Get the entities `viewer` should receive this tick.
+
+        The viewer must be one of the entities passed to `update`, and can
+        always see itself.
+        """
+        x, y = self.grid.positions[viewer]
+        previous = self._visible.get(viewer, ())
+        enter_squared = self.enter_radius * self.enter_radius
+        positions = self.grid.positions
+
+        visible = {viewer}
+        for key in self.grid.query(x, y, self.exit_radius):
+            if key in previous:
+                visible.add(key)
+                continue
+            other_x, other_y = positions[key]
+            dx = other_x - x
+            dy = other_y - y
+            if dx * dx + dy * dy <= enter_squared:
+                visible.add(key)
+
+        self._visible[viewer] = visible
+        return visible
+
+    def remove(self, viewer: Hashable) -> None:
+        """Forget everything about `viewer`."""
+        self._visible.pop(viewer, None)
+        for visible in self._visible.values():
+            visible.discard(viewer)
@@ -0,0 +1,68 @@
+"""Main loop driving the server clock between network polls."""
+
+from square.common.stats import RollingHistogram
+
+LOOP_MODES = ("sleep", "spin")
+
+# Waking this long before a scheduled item and spinning for the rest covers
+# the millisecond granularity of select timeouts and OS scheduling delays
+DEFAULT_SPIN = 0.002
+
+
+class ServerLoop:
+    """Ticks a Clock, handing the time in between to the network backend.
+
+    In ``sleep`` mode the network is polled with a timeout ending `spin`
+    seconds before the next scheduled item, then polled without blocking
+    until that item is due. The process sleeps through idle time and still
+    wakes up within a fraction of a millisecond of the schedule.
+    In ``spin`` mode the network is polled without blocking in a tight
+    loop, which gives the lowest latency but keeps a core busy.
+
+    `jitter` holds how many seconds after its scheduled time each due
+    item was ticked, measured for waits that ran up to a scheduled item.
+    :param clock: The Clock to tick.
+    :param network: A networking backend, whose `poll` waits for activity.
+    :param mode: One of `LOOP_MODES`.
+    :param spin: Seconds to spin before each scheduled item in sleep mode.
+    """
+
+    def __init__(
+        self, clock, network, mode: str = "sleep", spin: float = DEFAULT_SPIN
+    ):
+        if mode not in LOOP_MODES:
+            raise ValueError(f"Unknown loop mode {mode!r}")
+        self.clock = clock
+        self.network = network
+        self.mode = mode
+        self.spin = spin
+        self.jitter = RollingHistogram()
+        self.wakeups = 0
+
+    def step(self) -> None:
+        """Wait until the next scheduled item is due, then tick the clock."""
+        self.wakeups += 1
+        if self.mode == "spin":
+            self.network.poll(0)
+            self.clock.tick()
+            return
+
+        timeout = self.clock.get_sleep_time(True)
+        if timeout is None:
+            # Nothing is scheduled, only the network can give us work
+            self.network.poll(None)
+            self.clock.tick()
+            return
+
+        time = self.clock.time
+        deadline = time() + timeout
+        if timeout > self.spin:
+            self.network.poll(timeout - self.spin)
+        now = time()
+        # Network activity ends the wait early, then there is nothing to spin for
+        if deadline - now < self.spin:
+            while now < deadline:
+                self.network.poll(0)
+                now = time()
+            self.jitter.add(now - deadline)
+        self.clock.tick()
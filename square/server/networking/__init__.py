@@ -1,3 +1,6 @@
+from .datagram_io import DatagramReader, DatagramSender
+from .selector_network import SelectorNetwork
 from .tcp_connection_listener import TCPConnectionListener
 from .tcp_receiver import TCPReceiver
+from .threaded_network import ThreadedNetwork
 from .udp_receiver import UDPReceiver
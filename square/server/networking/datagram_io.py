@@ -0,0 +1,111 @@
+"""Bulk datagram I/O for the server's UDP socket.
+
+Python has no sendmmsg/recvmmsg, so the nearest equivalent is to do all of
+the datagram work for one wakeup or one tick in a single tight pass:
+`DatagramReader` drains every pending datagram into one reusable buffer and
+`DatagramSender` sends a whole tick's worth of snapshots to cached address
+tuples.
+"""
+import errno as _errno
+import socket as _socket
+from typing import Callable, Dict, Iterable, List, Tuple, TypeVar
+
+from square import BUFFER_SIZE
+from square.common.networking import SnapshotError
+
+Address = Tuple[str, int]
+T = TypeVar("T")
+
+# Receiving without blocking is only possible per call on some platforms
+_DONTWAIT = getattr(_socket, "MSG_DONTWAIT", 0)
+
+# Upper bound on cached address ids, so stray traffic can't grow it forever
+MAX_CACHED_ADDRESSES = 4096
+
+
+class DatagramReader:
+    """Drains pending datagrams from a UDP socket.
+
+    :param socket: The UDP socket to read from.
+    :param decode: Decodes a datagram, raising a SnapshotError if invalid.
+    :param max_batch: Maximum number of datagrams to drain per call.
+    """
+
+    def __init__(
+        self,
+        socket,
+        decode: Callable[[memoryview], T],
+        max_batch: int = 256,
+    ):
+        self.socket = socket
+        self.decode = decode
+        self.max_batch = max_batch
+        self.buffer = bytearray(BUFFER_SIZE)
+        self.view = memoryview(self.buffer)
+        self._ids: Dict[Address, str] = {}
+
+    def address_id(self, address: Address) -> str:
+        """Get the ``host:port`` id of `address`."""
+        try:
+            return self._ids[address]
+        except KeyError:
+            if len(self._ids) >= MAX_CACHED_ADDRESSES:
+                self._ids.clear()
+            id = self._ids[address] = f"{address[0]}:{address[1]}"
+            return id
+
+    def drain(self, block: bool = True) -> List[Tuple[str, T]]:
+        """Receive and decode every datagram that is currently pending.
+
+        :param block: Wait for the first datagram if none is pending.
+        :return: ``(address id, decoded datagram)`` for every valid datagram.
+        """
+        recvfrom_into = self.socket.recvfrom_into
+        decode = self.decode
+        view = self.view
+        batch = []
+        flags = 0 if block else _DONTWAIT
+        for _ in range(self.max_batch):
+            try:
+                size, address = recvfrom_into(self.buffer, 0, flags)
+            except (BlockingIOError, InterruptedError):
+                break
+            try:
+                batch.append((self.address_id(address), decode(view[:size])))
+            except SnapshotError:
+                pass
+            if not _DONTWAIT:
+                break
+            flags = _DONTWAIT
+        return batch
+
+
+class DatagramSender:
+    """Sends batches of datagrams from a UDP socket."""
+
+    def __init__(self, socket):
+        self.socket = socket
+        self.dropped = 0
+
+    def send_batch(self, batch: Iterable[Tuple[bytes, Address]]) -> int:
+        """Send every ``(datagram, address)`` pair in `batch`.
+
+        Datagrams the socket can't take right now, or that are too large
+        to send at all, are dropped like any other lost datagram.
+        :return: The number of datagrams sent.
+        """
+        sendto = self.socket.sendto
+        sent = 0
+        for datagram, address in batch:
+            try:
+                sendto(datagram, address)
+            except (BlockingIOError, InterruptedError):
+                self.dropped += 1
+                continue
+            except OSError as error:
+                if error.errno != _errno.EMSGSIZE:
+                    raise
+                self.dropped += 1
+                continue
+            sent += 1
+        return sent
@@ -0,0 +1,85 @@
+import selectors
+
+from square.common.networking import FrameBuffer, FramingError, decode_inputs
+from square.server.networking.datagram_io import DatagramReader
+
+
+class SelectorNetwork:
+    """Single threaded networking backend built on `selectors`.
+
+    The listening socket, the UDP socket and every client socket are
+    multiplexed on one selector which is polled from the game loop, feeding
+    the same inboxes as the threaded backend.
+    """
+
+    def __init__(
+        self,
+        tcp_socket,
+        udp_socket,
+        connection_inbox,
+        message_inbox,
+        disconnect_inbox,
+        update_inbox,
+    ):
+        self.tcp_socket = tcp_socket
+        self.udp_socket = udp_socket
+        self.connection_inbox = connection_inbox
+        self.message_inbox = message_inbox
+        self.disconnect_inbox = disconnect_inbox
+        self.update_inbox = update_inbox
+        self.selector = selectors.DefaultSelector()
+        self.udp_reader = DatagramReader(udp_socket, decode_inputs)
+
+    def start(self):
+        self.selector.register(self.tcp_socket, selectors.EVENT_READ, self._accept)
+        self.selector.register(self.udp_socket, selectors.EVENT_READ, self._receive_udp)
+
+    def watch(self, socket, id):
+        """Start receiving TCP messages from a client.
+
+        :return: None, there is no receiver thread to join.
+        """
+        frames = FrameBuffer()
+        self.selector.register(
+            socket,
+            selectors.EVENT_READ,
+            lambda: self._receive_tcp(socket, id, frames),
+        )
+        return None
+
+    def unwatch(self, socket):
+        """Stop receiving from a client, must be called before it is closed."""
+        try:
+            self.selector.unregister(socket)
+        except KeyError:
+            pass
+
+    def poll(self, timeout):
+        """Wait up to `timeout` seconds for socket activity and handle it.
+
+        :param timeout: Seconds to wait, 0 to return immediately, or None to
+                        wait until something happens.
+        """
+        for key, _ in self.selector.select(timeout):
+            key.data()
+
+    def _accept(self):
+        client_socket, address = self.tcp_socket.accept()
+        self.connection_inbox.put((client_socket, f"{address[0]}:{address[1]}"))
+
+    def _receive_tcp(self, socket, id, frames):
+        try:
+            if frames.recv_into(socket):
+                self.message_inbox.put_many(
+                    (id, message) for message in frames.messages()
+                )
+                return
+        except (OSError, FramingError):
+            pass
+        self.unwatch(socket)
+        self.disconnect_inbox.put(id)
+
+    def _receive_udp(self):
+        batch = self.udp_reader.drain(block=False)
+        if batch:
+            self.update_inbox.put_many(batch)
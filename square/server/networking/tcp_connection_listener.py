@@ -4,14 +4,14 @@ from threading import Thread
 class TCPConnectionListener(Thread):
     """Waits for TCP connections and creates new clients."""
 
-    def __init__(self, socket, queue):
+    def __init__(self, socket, inbox):
         super().__init__()
         self.running = False
         self.socket = socket
-        self.queue = queue
+        self.inbox = inbox
 
     def run(self):
         self.running = True
         while self.running:
             client_socket, address = self.socket.accept()
-            self.queue.put((client_socket, f"{address[0]}:{address[1]}"))
+            self.inbox.put((client_socket, f"{address[0]}:{address[1]}"))
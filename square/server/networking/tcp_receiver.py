@@ -1,25 +1,30 @@
 from threading import Thread
 
-from square import BUFFER_SIZE
+from square.common.networking import FrameBuffer, FramingError
 
 
 class TCPReceiver(Thread):
     """Creates a new thread to receive TCP data from a specific client"""
 
-    def __init__(self, socket, message_queue, disconnect_queue):
+    def __init__(self, socket, id, message_inbox, disconnect_inbox):
         super().__init__()
         self.running = False
         self.socket = socket
-        self.message_queue = message_queue
-        self.disconnect_queue = disconnect_queue
+        self.id = id
+        self.message_inbox = message_inbox
+        self.disconnect_inbox = disconnect_inbox
+        self.frames = FrameBuffer()
 
     def run(self):
         self.running = True
         while self.running:
             try:
-                data = self.socket.recv(BUFFER_SIZE).decode("utf-8")
-                self.message_queue.put(data)
-            finally:
+                if not self.frames.recv_into(self.socket):
+                    break
+                self.message_inbox.put_many(
+                    (self.id, message) for message in self.frames.messages()
+                )
+            except (OSError, FramingError):
                 break
 
-        self.disconnect_queue.put(self.socket)
+        self.disconnect_inbox.put(self.id)
@@ -0,0 +1,60 @@
+import time
+
+from square.server.networking.tcp_connection_listener import TCPConnectionListener
+from square.server.networking.tcp_receiver import TCPReceiver
+from square.server.networking.udp_receiver import UDPReceiver
+
+# Seconds slept by poll(None)
+IDLE_WAIT = 0.01
+
+
+class ThreadedNetwork:
+    """Networking backend with one receiver thread per socket.
+
+    A thread accepts new connections, another receives UDP updates and every
+    connected client gets its own TCP receiver thread.
+    """
+
+    def __init__(
+        self,
+        tcp_socket,
+        udp_socket,
+        connection_inbox,
+        message_inbox,
+        disconnect_inbox,
+        update_inbox,
+    ):
+        self.message_inbox = message_inbox
+        self.disconnect_inbox = disconnect_inbox
+        self.tcp_connector = TCPConnectionListener(tcp_socket, connection_inbox)
+        self.tcp_connector.daemon = True
+        self.udp_receiver = UDPReceiver(udp_socket, update_inbox)
+        self.udp_receiver.daemon = True
+
+    def start(self):
+        self.tcp_connector.start()
+        self.udp_receiver.start()
+
+    def watch(self, socket, id):
+        """Start receiving TCP messages from a client.
+
+        :return: The receiver thread, to be joined when the client is removed.
+        """
+        tcp_receiver = TCPReceiver(
+            socket, id, self.message_inbox, self.disconnect_inbox
+        )
+        tcp_receiver.start()
+        return tcp_receiver
+
+    def unwatch(self, socket):
+        """Stop receiving from a client, its thread exits once it is closed."""
+        pass
+
+    def poll(self, timeout):
+        """Sleep for `timeout` seconds.
+
+        The receiver threads hand everything off as it arrives, so there is
+        nothing to wake up for early. A timeout of None sleeps briefly, as
+        there is no way to tell when something happens.
+        """
+        time.sleep(IDLE_WAIT if timeout is None else timeout)
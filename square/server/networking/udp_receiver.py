@@ -1,18 +1,21 @@
 from threading import Thread
 
-from square import BUFFER_SIZE
+from square.common.networking import decode_inputs
+from square.server.networking.datagram_io import DatagramReader
 
 
 class UDPReceiver(Thread):
-    def __init__(self, socket, queue):
+    def __init__(self, socket, inbox):
         super().__init__()
         self.running = False
         self.socket = socket
-        self.queue = queue
+        self.inbox = inbox
+        self.reader = DatagramReader(socket, decode_inputs)
 
     def run(self):
         self.running = True
         while self.running:
-            data, address = self.socket.recvfrom(BUFFER_SIZE)
-            data = data.decode("utf-8").split(";;", 1)
-            self.queue.put((f"{address[0]}:{address[1]}", data))
+            # Hand off everything received in this wakeup as one batch
+            batch = self.reader.drain()
+            if batch:
+                self.inbox.put_many(batch)
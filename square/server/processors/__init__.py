@@ -0,0 +1 @@
+from .snapshot_processor import SnapshotProcessor
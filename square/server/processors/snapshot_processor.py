@@ -0,0 +1,20 @@
+from typing import List
+
+from square import UDP_SEND_INTERVAL
+from square.common import esper
+
+
+class SnapshotProcessor(esper.Processor):
+    """Sends every client a snapshot of the world once every
+    `UDP_SEND_INTERVAL` seconds of simulation.
+
+    :param server: The ServerApplication whose `send_udp` sends them.
+    """
+
+    interval = UDP_SEND_INTERVAL
+
+    def __init__(self, server):
+        self.server = server
+
+    def process(self, delta_time: float, excludes: List[int] = []):
+        self.server.send_udp(delta_time)
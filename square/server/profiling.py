@@ -0,0 +1,125 @@
+"""Periodic and on demand dumps of the server's instrumentation."""
+
+import logging
+import signal
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+
+def format_profile(profile) -> List[str]:
+    """Render a `World.profile` snapshot as log lines."""
+    lines = [f"entities={profile['entities']}"]
+    for name, stats in sorted(profile["processors"].items()):
+        lines.append(
+            f"{name}: p50={stats['p50']:.3f}ms p95={stats['p95']:.3f}ms"
+            f" p99={stats['p99']:.3f}ms max={stats['max']:.3f}ms"
+            f" runs={stats['count']}"
+        )
+    for name, count in sorted(profile["queries"].items()):
+        lines.append(f"query[{name}]={count}")
+    return lines
+
+
+def format_telemetry(summary) -> List[str]:
+    """Render a `ClockTelemetry.summary` as log lines."""
+    ticks = summary["ticks"]
+    lines = [
+        f"ticks: busy p50={ticks['duration_p50_ms']:.3f}ms"
+        f" p99={ticks['duration_p99_ms']:.3f}ms max={ticks['duration_max_ms']:.3f}ms"
+        f" over_budget={ticks['over_budget']}/{ticks['count']}"
+    ]
+    for name, stats in sorted(summary["callbacks"].items()):
+        lines.append(
+            f"{name}: every {stats['actual_interval_ms']:.2f}ms"
+            f" (wanted {stats['interval_ms']:.2f}ms, drift {stats['drift_ms']:.1f}ms)"
+            f" took p50={stats['duration_p50_ms']:.3f}ms"
+            f" p99={stats['duration_p99_ms']:.3f}ms"
+            f" late={stats['late']} overruns={stats['overruns']}"
+            f" missed={stats['missed']} calls={stats['calls']}"
+        )
+    return lines
+
+
+def _behind(summary) -> int:
+    """Total of the counters that mean the schedule is slipping."""
+    return summary["ticks"]["over_budget"] + sum(
+        stats["late"] + stats["overruns"] + stats["missed"]
+        for stats in summary["callbacks"].values()
+    )
+
+
+class ProfileExporter:
+    """Logs a World's processor timings and query sizes, and the server
+    Clock's tick telemetry when it is given.
+
+    Dumps happen every `interval` seconds of server time, and whenever the
+    process receives SIGUSR1 where that signal exists. The signal handler
+    only requests a dump, it is written out by the next `tick`, so logging
+    never runs inside the handler.
+    Dumps are logged at warning level when the clock fell behind its
+    schedule since the previous dump.
+    :param world: A timed esper World.
+    :param interval: Seconds between dumps, 0 to only dump on signal.
+    :param telemetry: Optional `ClockTelemetry` of the server Clock.
+    :param loop: Optional `ServerLoop`, to report its wake up jitter.
+    """
+
+    def __init__(self, world, interval: float = 0.0, telemetry=None, loop=None):
+        self.world = world
+        self.interval = interval
+        self.telemetry = telemetry
+        self.loop = loop
+        self._wakeups = 0
+        self.elapsed = 0.0
+        self.requested = False
+        self._behind = 0
+
+    def install_signal_handler(self) -> bool:
+        """Dump on SIGUSR1. Must be called from the main thread.
+        :return: False when the platform has no SIGUSR1.
+        """
+        signum = getattr(signal, "SIGUSR1", None)
+        if signum is None:
+            return False
+        signal.signal(signum, self._on_signal)
+        return True
+
+    def _on_signal(self, signum, frame):
+        self.requested = True
+
+    def tick(self, delta_time: float) -> None:
+        """Dump when the interval has passed or a dump was requested."""
+        self.elapsed += delta_time
+        if self.interval and self.elapsed >= self.interval:
+            self.elapsed %= self.interval
+            self.requested = True
+        if self.requested:
+            self.requested = False
+            self.dump()
+
+    def _loop_line(self) -> str:
+        jitter = self.loop.jitter.summary()
+        wakeups = self.loop.wakeups - self._wakeups
+        self._wakeups = self.loop.wakeups
+        return (
+            f"loop: mode={self.loop.mode} wakeups={wakeups}"
+            f" jitter p50={jitter['p50'] * 1000:.3f}ms"
+            f" p99={jitter['p99'] * 1000:.3f}ms max={jitter['max'] * 1000:.3f}ms"
+        )
+
+    def dump(self) -> None:
+        level = logging.INFO
+        lines = format_profile(self.world.profile())
+        if self.telemetry is not None:
+            summary = self.telemetry.summary()
+            lines += format_telemetry(summary)
+            behind = _behind(summary)
+            if behind > self._behind:
+                level = logging.WARNING
+            self._behind = behind
+        if self.loop is not None:
+            lines.append(self._loop_line())
+
+        for line in lines:
+            logger.log(level, line)
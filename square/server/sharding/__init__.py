@@ -0,0 +1,2 @@
+from .front import ShardedServer
+from .zones import ZoneMap
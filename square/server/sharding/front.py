@@ -0,0 +1,144 @@
+"""Front process of a sharded server."""
+import multiprocessing
+from typing import Dict, List
+
+from square.common.components import (
+    InputComponent,
+    PhysicsComponent,
+    TransformComponent,
+)
+from square.common.processors import InputProcessor, PhysicsProcessor
+from square.server.application_server import ServerApplication
+from square.server.sharding.shard import INPUTS, JOIN, LEAVE, PlayerState, run_shard
+from square.server.sharding.zones import DEFAULT_ZONE_WIDTH, ZoneMap
+
+
+class ShardedServer(ServerApplication):
+    """A server that spreads the simulation over one process per zone.
+
+    This process is the front. It owns the public TCP and UDP ports, the
+    clients, their snapshots and area of interest, exactly like a
+    ServerApplication. Its world only mirrors the players: every fixed step
+    is handed to the shard processes, which simulate the players of their
+    zone in parallel and report back where they ended up.
+    A player that walks out of a zone is handed off to the shard of the zone
+    it walked into, along with the input commands it has not simulated yet.
+
+    Shards are connected to the front with local socket pipes and step in
+    lockstep with it, so the simulation runs the same as in a single process.
+    :param shards: Number of shard processes, and of zones.
+    :param zone_width: Width of the strip of the map each zone covers.
+    :param columnar: Keep the bodies of every shard in a ColumnStore.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        port: int,
+        shards: int = 2,
+        zone_width: float = DEFAULT_ZONE_WIDTH,
+        columnar: bool = False,
+        **kwargs,
+    ):
+        super().__init__(address, port, **kwargs)
+        self.zone_map = ZoneMap(shards, zone_width)
+        self.shard_columnar = columnar
+        self.shard_processes: List[multiprocessing.Process] = []
+        self.shard_connections: list = []
+        # The zone simulating each player, and the events for every shard to
+        # apply before its next step
+        self.owners: Dict[str, int] = {}
+        self.shard_events: List[list] = [[] for _ in range(shards)]
+        # The shards simulate, the front's world only sends the snapshots
+        self.world.remove_processor(InputProcessor)
+        self.world.remove_processor(PhysicsProcessor)
+
+    def start(self):
+        self.start_shards()
+        super().start()
+
+    def start_shards(self):
+        # Shards are spawned, forking a process with threads running is unsafe
+        context = multiprocessing.get_context("spawn")
+        for zone in range(self.zone_map.zones):
+            connection, shard_connection = context.Pipe()
+            process = context.Process(
+                target=run_shard,
+                args=(shard_connection, zone, self.zone_map, self.shard_columnar),
+                name=f"shard-{zone}",
+                daemon=True,
+            )
+            process.start()
+            shard_connection.close()
+            self.shard_processes.append(process)
+            self.shard_connections.append(connection)
+
+    def stop_shards(self):
+        for connection in self.shard_connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+        for process in self.shard_processes:
+            process.join(timeout=1)
+
+    def run(self):
+        try:
+            super().run()
+        finally:
+            self.stop_shards()
+
+    def hand_to_zone(self, id: str, state: PlayerState):
+        zone = self.zone_map.zone_for(state.x)
+        self.owners[id] = zone
+        self.shard_events[zone].append((JOIN, id, state))
+
+    def add_players(self, spawns):
+        spawns = list(spawns)
+        players = super().add_players(spawns)
+        for id, x, y in spawns:
+            self.hand_to_zone(id, PlayerState(x, y, 0.0, 0.0))
+        return players
+
+    def remove_players(self, ids):
+        players = []
+        for id in ids:
+            self.shard_events[self.owners.pop(id)].append((LEAVE, id))
+            players.append(self.players.pop(id))
+        # The players are simulated by the shards, the front has no reason to
+        # keep their entities and closed sockets until its world next runs
+        self.world.delete_entities(players, immediate=True)
+
+    def queue_inputs(self, id, sequence, inputs):
+        self.shard_events[self.owners[id]].append((INPUTS, id, sequence, inputs))
+
+    def step(self, delta_time):
+        """Step every shard at once, mirror the players they simulated, then
+        send the snapshots that are due
+        """
+        events = self.shard_events
+        self.shard_events = [[] for _ in events]
+        for connection, shard_events in zip(self.shard_connections, events):
+            connection.send((delta_time, shard_events))
+
+        for connection in self.shard_connections:
+            states, handoffs = connection.recv()
+            for id, (vx, vy, x, y, applied) in states.items():
+                self.mirror(id, vx, vy, x, y, applied)
+            # A player handed off still moved in this step
+            for id, state in handoffs:
+                self.mirror(id, state.vx, state.vy, state.x, state.y, state.applied)
+                self.hand_to_zone(id, state)
+        self.world.process(delta_time=delta_time)
+
+    def mirror(self, id, vx, vy, x, y, applied):
+        """Copy the state a shard simulated onto the front's player"""
+        world = self.world
+        player = self.players[id]
+        transform = world.component_for_entity(player, TransformComponent)
+        transform.x = x
+        transform.y = y
+        phys = world.component_for_entity(player, PhysicsComponent)
+        phys.velocity[0] = vx
+        phys.velocity[1] = vy
+        world.component_for_entity(player, InputComponent).applied = applied
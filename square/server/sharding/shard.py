@@ -0,0 +1,139 @@
+"""Shard worker process simulating the players of one zone."""
+import signal
+from collections import deque
+from typing import Dict, List, NamedTuple, Tuple
+
+from square.common.application import Application
+from square.common.components import (
+    InputComponent,
+    PhysicsComponent,
+    TransformComponent,
+)
+from square.common.processors.input_processor import queue_commands
+from square.server.sharding.zones import ZoneMap
+
+# Events the front process sends to a shard
+JOIN = "join"
+LEAVE = "leave"
+INPUTS = "inputs"
+
+
+class PlayerState(NamedTuple):
+    """Everything needed to carry on simulating a player in another shard."""
+
+    x: float
+    y: float
+    vx: float
+    vy: float
+    # Sequence of the last input command simulated and of the last one queued
+    applied: int = 0
+    received: int = 0
+    # (sequence, input bits) commands not simulated yet
+    commands: Tuple[Tuple[int, int], ...] = ()
+
+
+# (vx, vy, x, y, last input command simulated) of a player after a step
+StepState = Tuple[float, float, float, float, int]
+
+
+class Shard:
+    """Simulates the players inside one zone of a ZoneMap.
+
+    :param zone: The zone this shard owns.
+    :param zone_map: The ZoneMap shared by every shard.
+    :param columnar: Keep player bodies in a ColumnStore.
+    """
+
+    def __init__(self, zone: int, zone_map: ZoneMap, columnar: bool = False):
+        self.zone = zone
+        self.low, self.high = zone_map.bounds(zone)
+        self.application = Application(columnar=columnar)
+
+    def join(self, id: str, state: PlayerState) -> None:
+        application = self.application
+        if id in application.players:
+            return
+        player = application.add_player(id, state.x, state.y)
+        phys = application.world.component_for_entity(player, PhysicsComponent)
+        phys.velocity[0] = state.vx
+        phys.velocity[1] = state.vy
+        inp = application.world.component_for_entity(player, InputComponent)
+        inp.applied = state.applied
+        inp.received = state.received
+        inp.commands = deque(state.commands)
+
+    def leave(self, id: str) -> None:
+        if id in self.application.players:
+            self.application.remove_player(id)
+
+    def queue_inputs(self, id: str, sequence: int, inputs: bytes) -> None:
+        player = self.application.players.get(id)
+        if player is None:
+            # The player was handed off, the client sends the commands again
+            return
+        inp = self.application.world.component_for_entity(player, InputComponent)
+        queue_commands(inp, sequence, inputs)
+
+    def step(
+        self, delta_time: float, events: List[tuple]
+    ) -> Tuple[Dict[str, StepState], List[Tuple[str, PlayerState]]]:
+        """Apply the events from the front process, then simulate one step.
+
+        :return: The state of every player still in the zone, and the
+                 ``(id, state)`` of every player that left it and has to
+                 be handed off to another shard.
+        """
+        for event, id, *args in events:
+            if event == JOIN:
+                self.join(id, *args)
+            elif event == LEAVE:
+                self.leave(id)
+            elif event == INPUTS:
+                self.queue_inputs(id, *args)
+
+        application = self.application
+        application.step(delta_time)
+
+        world = application.world
+        states = {}
+        handoffs = []
+        for id, player in application.players.items():
+            transform = world.component_for_entity(player, TransformComponent)
+            phys = world.component_for_entity(player, PhysicsComponent)
+            inp = world.component_for_entity(player, InputComponent)
+            x, y = transform.x, transform.y
+            vx, vy = phys.velocity[0], phys.velocity[1]
+            if self.low <= x < self.high:
+                states[id] = (vx, vy, x, y, inp.applied)
+                continue
+            state = PlayerState(
+                x, y, vx, vy, inp.applied, inp.received, tuple(inp.commands)
+            )
+            handoffs.append((id, state))
+        if handoffs:
+            application.remove_players(id for id, _ in handoffs)
+        return states, handoffs
+
+    def serve(self, connection) -> None:
+        """Answer step requests from the front process until it sends None,
+        or goes away without saying goodbye.
+        """
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+            connection.send(self.step(*message))
+        connection.close()
+
+
+def run_shard(connection, zone: int, zone_map: ZoneMap, columnar: bool = False):
+    """Entry point of a shard process.
+
+    :param connection: The shard's end of a Pipe to the front process.
+    """
+    # Ctrl+C reaches the whole process group, the front stops its shards
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    Shard(zone, zone_map, columnar).serve(connection)
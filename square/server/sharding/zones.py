@@ -0,0 +1,46 @@
+"""Partitioning of the map into zones, one per shard."""
+import math
+from typing import Tuple
+
+DEFAULT_ZONE_WIDTH = 1000.0
+DEFAULT_HYSTERESIS = 50.0
+
+
+class ZoneMap:
+    """Splits the map into vertical strips of equal width.
+
+    Strip ``i`` covers ``[i * width, (i + 1) * width)`` along x, except that
+    the first strip extends to minus infinity and the last one to infinity,
+    so every position belongs to exactly one zone.
+    A player only leaves a zone once it is `hysteresis` past its edge, so
+    players walking along a boundary aren't handed back and forth.
+    :param zones: Number of zones.
+    :param width: Width of every strip.
+    :param hysteresis: Distance past the edge of a zone before leaving it.
+    """
+
+    def __init__(
+        self,
+        zones: int,
+        width: float = DEFAULT_ZONE_WIDTH,
+        hysteresis: float = DEFAULT_HYSTERESIS,
+    ):
+        if zones < 1:
+            raise ValueError("A ZoneMap needs at least one zone")
+        self.zones = zones
+        self.width = width
+        self.hysteresis = hysteresis
+
+    def zone_for(self, x: float) -> int:
+        """Get the zone a position belongs to."""
+        return max(0, min(self.zones - 1, int(x // self.width)))
+
+    def bounds(self, zone: int) -> Tuple[float, float]:
+        """Get the ``(low, high)`` x range a zone holds its players in,
+        including the hysteresis on either side.
+        """
+        low = zone * self.width - self.hysteresis if zone > 0 else -math.inf
+        high = (zone + 1) * self.width + self.hysteresis
+        if zone == self.zones - 1:
+            high = math.inf
+        return low, high
@@ -0,0 +1,107 @@
+import random
+
+from square.bots import (
+    DIRECTIONS,
+    SEND_EVERY,
+    STEP,
+    Bot,
+    SwarmStats,
+    advance_swarm,
+    format_report,
+)
+from square.common.processors.input_processor import input_velocity
+from square.common.timestep import FixedTimestep
+
+
+class Transport:
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, data):
+        self.sent.append(data)
+
+
+def make_bots(stats, count, connected):
+    bots = [Bot(("127.0.0.1", 9000), stats, random.Random(0)) for _ in range(count)]
+    for bot in bots[:connected]:
+        bot.connected = True
+    return bots
+
+
+def test_report_without_samples():
+    stats = SwarmStats()
+    lines = format_report(stats, make_bots(stats, 2, 0), 1.0)
+    assert lines == [
+        "bots=0/2 up=0/0pps down=0pps 0.0KiB/s snapshot n/a latency n/a"
+        " steps=0 dropped=0"
+    ]
+
+
+def test_report():
+    stats = SwarmStats()
+    bots = make_bots(stats, 10, 8)
+    stats.sent = 240
+    stats.received = 120
+    stats.received_bytes = 2048
+    stats.steps = 120
+    for size in (100, 200, 300):
+        stats.snapshot_sizes.add(size)
+    for latency in (0.010, 0.020, 0.050):
+        stats.latency.add(latency)
+    stats.server = {"players": "8"}
+    target = 8 / (SEND_EVERY * STEP)
+    assert format_report(stats, bots, 2.0) == [
+        f"bots=8/10 up=120/{target:.0f}pps down=60pps 1.0KiB/s"
+        " snapshot p50=200B p99=300B latency p50=20.0ms p99=50.0ms max=50.0ms"
+        " steps=120 dropped=0",
+        "server: players=8",
+    ]
+
+
+def test_report_dropped_steps():
+    stats = SwarmStats()
+    stats.dropped = 30 * STEP
+    lines = format_report(stats, make_bots(stats, 1, 1), 1.0)
+    assert lines[0].endswith("dropped=30")
+    assert lines[1].startswith("bots fell 30 steps behind")
+
+
+def test_directions_are_unbiased():
+    assert len(set(DIRECTIONS)) == 9
+    velocities = [input_velocity(bits) for bits in DIRECTIONS]
+    assert len(set(velocities)) == 9
+    assert tuple(map(sum, zip(*velocities))) == (0, 0)
+
+
+def test_bots_send_in_turns():
+    stats = SwarmStats()
+    bots = make_bots(stats, 3 * SEND_EVERY, 3 * SEND_EVERY)
+    for bot in bots:
+        bot.transport = Transport()
+    timestep = FixedTimestep(STEP)
+
+    # Frames of one and of several steps at once
+    for frames in (1, 1, 3, 2, 1, 4):
+        advance_swarm(bots, stats, timestep, frames * STEP + STEP / 10)
+    steps = timestep.steps
+    assert stats.steps == steps
+    assert all(bot.sequence == steps for bot in bots)
+    # Every bot sends on its own turn, however the steps were batched
+    for index, bot in enumerate(bots):
+        turns = range(steps)
+        expected = sum(step % SEND_EVERY == index % SEND_EVERY for step in turns)
+        assert len(bot.transport.sent) == expected
+    assert stats.sent == steps * 3
+    assert stats.dropped == 0
+
+
+def test_dropped_steps_are_counted():
+    stats = SwarmStats()
+    bots = make_bots(stats, 2, 0)
+    timestep = FixedTimestep(STEP, max_steps=5, max_lag=10 * STEP)
+    advance_swarm(bots, stats, timestep, 40 * STEP)
+    assert stats.steps == 5
+    assert round(stats.dropped / STEP) == 30
+    advance_swarm(bots, stats, timestep, 0)
+    assert stats.steps == 10
+    assert round(stats.dropped / STEP) == 30
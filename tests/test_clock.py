@@ -0,0 +1,145 @@
+import random
+
+import pytest
+
+from square.server.clock import Clock
+
+
+class ScanClock(Clock):
+    """The soft scheduler and unschedule as they were before the clock
+    indexed them, scanning the whole heap every time.
+    """
+
+    def _get_soft_next_ts(self, last_ts, interval):
+        # A sorted copy, so the heap itself is left alone
+        items = sorted(item.next_ts for item in self._schedule_interval_items)
+
+        def taken(ts, e):
+            for next_ts in items:
+                if abs(next_ts - ts) <= e:
+                    return True
+                elif next_ts > ts + e:
+                    return False
+            return False
+
+        next_ts = last_ts + interval
+        if not taken(next_ts, interval / 4):
+            return next_ts
+        dt = interval
+        divs = 1
+        while True:
+            next_ts = last_ts
+            for i in range(divs - 1):
+                next_ts += dt
+                if not taken(next_ts, dt / 4):
+                    return next_ts
+            dt /= 2
+            divs *= 2
+            if divs > 16:
+                return next_ts
+
+    def unschedule(self, func):
+        items = [i for i in self._schedule_interval_items if i.func == func]
+        current = self._current_interval_item
+        if current is not None and current.func == func:
+            items.append(current)
+        for item in items:
+            item.interval = 0
+            item.func = lambda x, *args, **kwargs: x
+        self._schedule_items = [i for i in self._schedule_items if i.func != func]
+
+
+def run_schedule(clock_class, seed, stalls):
+    """Randomly schedule, run and cancel callbacks on a fake time source.
+    :return: Every call as ``(callback, time, dt)``.
+    """
+    rng = random.Random(seed)
+    now = [0.0]
+    clock = clock_class(time_function=lambda: now[0])
+    calls = []
+
+    def make_callback(name):
+        def callback(dt):
+            calls.append((name, now[0], round(dt, 9)))
+            # Callbacks sometimes cancel another one, or themselves
+            if rng.random() < 0.05:
+                clock.unschedule(callbacks[rng.randrange(len(callbacks))])
+
+        return callback
+
+    callbacks = [make_callback(name) for name in range(60)]
+    # Few distinct intervals, so many callbacks come due at the same time
+    intervals = (0.25, 0.5, 1.0)
+    for frame in range(600):
+        action = rng.random()
+        callback = rng.choice(callbacks)
+        if action < 0.1:
+            clock.schedule_interval_soft(callback, rng.choice(intervals))
+        elif action < 0.15:
+            clock.schedule_interval(callback, rng.choice(intervals))
+        elif action < 0.2:
+            clock.schedule_once(callback, rng.choice(intervals))
+        elif action < 0.25:
+            clock.unschedule(callback)
+        stall = stalls and frame % 60 == 59
+        now[0] += 0.25 if stall else 1 / 60
+        clock.tick()
+    return calls
+
+
+@pytest.mark.parametrize("stalls", [False, True])
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_scanning_clock(seed, stalls):
+    calls = run_schedule(Clock, seed, stalls)
+    assert len(calls) > 100
+    assert calls == run_schedule(ScanClock, seed, stalls)
+
+
+def test_simultaneous_items_run_in_schedule_order():
+    now = [0.0]
+    clock = Clock(time_function=lambda: now[0])
+    calls = []
+    callbacks = {name: (lambda dt, name=name: calls.append(name)) for name in "abcde"}
+    for name in "dbeac":
+        clock.schedule_interval(callbacks[name], 1.0)
+
+    def advance(seconds):
+        calls.clear()
+        now[0] += seconds
+        clock.tick()
+        return "".join(calls)
+
+    assert advance(1.0) == "dbeac"
+    assert advance(1.0) == "dbeac"
+    # Late enough for every item to be rescheduled from the time it ran
+    assert advance(1.04) == "dbeac"
+    # Rescheduled to be due with the others, after them
+    clock.unschedule(callbacks["b"])
+    clock.schedule_interval(callbacks["b"], 1.0)
+    assert advance(1.0) == "deacb"
+
+
+def test_soft_schedule_spreads_items():
+    now = [0.0]
+    clock = Clock(time_function=lambda: now[0])
+    for _ in range(8):
+        clock.schedule_interval_soft(lambda dt: None, 1.0)
+    due = sorted(item.next_ts for item in clock._schedule_interval_items)
+    assert len(set(due)) == 8
+    assert due[0] > 0 and due[-1] == 1.0
+
+
+def test_unschedule_during_call():
+    now = [0.0]
+    clock = Clock(time_function=lambda: now[0])
+    calls = []
+
+    def once_only(dt):
+        calls.append(now[0])
+        clock.unschedule(once_only)
+
+    clock.schedule_interval(once_only, 0.5)
+    for _ in range(4):
+        now[0] += 0.5
+        clock.tick()
+    assert calls == [0.5]
@@ -0,0 +1,76 @@
+import pytest
+
+from square.common.esper import ColumnStore, columns
+
+
+@pytest.fixture(params=["numpy", "array"])
+def store(request, monkeypatch):
+    if request.param == "numpy" and columns._np is None:
+        pytest.skip("NumPy is not installed")
+    if request.param == "array":
+        monkeypatch.setattr(columns, "_np", None)
+    return ColumnStore("x", "vx", capacity=2)
+
+
+def rows(store):
+    return {
+        entity: (store.get(entity, "x"), store.get(entity, "vx"))
+        for entity in store.entities
+    }
+
+
+def test_add_grows_past_capacity(store):
+    for entity in range(10):
+        assert store.add(entity, x=entity, vx=1.0) == entity
+    assert len(store) == 10
+    assert 9 in store and 10 not in store
+    assert list(store.column("x")) == [float(entity) for entity in range(10)]
+    store.add(10)
+    assert rows(store)[10] == (0.0, 0.0)
+
+
+def test_add_twice(store):
+    store.add(1)
+    with pytest.raises(KeyError):
+        store.add(1)
+
+
+def test_remove_compacts(store):
+    for entity in range(5):
+        store.add(entity, x=entity * 10, vx=entity)
+    store.remove(1)
+    store.remove(4)
+    store.remove(0)
+    assert len(store) == 2
+    # Every remaining row is packed at the front, and still found by entity
+    assert sorted(store.slots.values()) == [0, 1]
+    assert all(store.entities[slot] == entity for entity, slot in store.slots.items())
+    assert rows(store) == {2: (20.0, 2.0), 3: (30.0, 3.0)}
+    assert len(store.column("x")) == 2
+    with pytest.raises(KeyError):
+        store.remove(1)
+
+    store.add(7, x=70)
+    assert rows(store) == {2: (20.0, 2.0), 3: (30.0, 3.0), 7: (70.0, 0.0)}
+
+
+def test_remove_every_row(store):
+    store.add(1)
+    store.remove(1)
+    assert len(store) == 0 and 1 not in store
+    store.add(1, x=5)
+    assert rows(store) == {1: (5.0, 0.0)}
+
+
+def test_set_and_iadd(store):
+    for entity in range(5):
+        store.add(entity, x=entity, vx=0.5)
+    store.remove(2)
+    store.set(3, "vx", -1.0)
+    store.iadd("x", "vx")
+    assert rows(store) == {
+        0: (0.5, 0.5),
+        1: (1.5, 0.5),
+        3: (2.0, -1.0),
+        4: (4.5, 0.5),
+    }
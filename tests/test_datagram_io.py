@@ -0,0 +1,115 @@
+import socket
+import time
+
+import pytest
+
+from square import BUFFER_SIZE
+from square.common.networking import decode_inputs, encode_inputs
+from square.server.networking import DatagramReader, DatagramSender
+
+
+@pytest.fixture
+def sockets():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    clients = []
+    for _ in range(3):
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        client.bind(("127.0.0.1", 0))
+        client.settimeout(1)
+        clients.append(client)
+    yield server, clients
+    for sock in [server, *clients]:
+        sock.close()
+
+
+def id_of(sock):
+    return "{}:{}".format(*sock.getsockname())
+
+
+def test_reader_drains_a_batch(sockets):
+    server, clients = sockets
+    address = server.getsockname()
+    for sequence in range(1, 4):
+        for client in clients:
+            client.sendto(encode_inputs(sequence, 0, [sequence]), address)
+    time.sleep(0.05)
+
+    reader = DatagramReader(server, decode_inputs, max_batch=5)
+    first = reader.drain(block=False)
+    second = reader.drain(block=False)
+    assert len(first) == 5 and len(second) == 4
+    received = first + second
+    for client in clients:
+        mine = [inputs for id, inputs in received if id == id_of(client)]
+        assert mine == [(s, 0, bytes([s])) for s in range(1, 4)]
+
+
+def test_reader_would_block(sockets):
+    server, _ = sockets
+    reader = DatagramReader(server, decode_inputs)
+    started = time.perf_counter()
+    assert reader.drain(block=False) == []
+    assert time.perf_counter() - started < 0.5
+
+
+def test_reader_skips_invalid_and_oversized_datagrams(sockets):
+    server, [client, *_] = sockets
+    address = server.getsockname()
+    # Longer than the buffer, so it arrives truncated and fails to decode
+    client.sendto(b"\xff" * (BUFFER_SIZE * 2), address)
+    client.sendto(b"", address)
+    client.sendto(encode_inputs(7, 3, [1, 2]), address)
+    time.sleep(0.05)
+    reader = DatagramReader(server, decode_inputs)
+    assert reader.drain(block=False) == [(id_of(client), (7, 3, bytes([1, 2])))]
+
+
+def test_reader_caches_address_ids(sockets):
+    server, _ = sockets
+    reader = DatagramReader(server, decode_inputs)
+    address = ("127.0.0.1", 5000)
+    assert reader.address_id(address) == "127.0.0.1:5000"
+    assert reader.address_id(address) is reader.address_id(("127.0.0.1", 5000))
+
+
+def test_sender_sends_a_batch(sockets):
+    server, clients = sockets
+    sender = DatagramSender(server)
+    batch = [(bytes([i]) * 10, sock.getsockname()) for i, sock in enumerate(clients)]
+    assert sender.send_batch(batch) == 3
+    for i, client in enumerate(clients):
+        assert client.recv(BUFFER_SIZE) == bytes([i]) * 10
+    assert sender.dropped == 0
+
+
+class FullSocket:
+    """A socket whose send buffer is full for every other datagram."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.calls = 0
+
+    def sendto(self, data, address):
+        self.calls += 1
+        if self.calls % 2 == 0:
+            raise BlockingIOError
+        return self.sock.sendto(data, address)
+
+
+def test_sender_drops_datagrams_that_would_block(sockets):
+    server, [client, *_] = sockets
+    sender = DatagramSender(FullSocket(server))
+    batch = [(bytes([i]), client.getsockname()) for i in range(6)]
+    assert sender.send_batch(batch) == 3
+    assert sender.dropped == 3
+    assert [client.recv(BUFFER_SIZE) for _ in range(3)] == [b"\0", b"\2", b"\4"]
+
+
+def test_sender_drops_oversized_datagrams(sockets):
+    server, [client, *_] = sockets
+    sender = DatagramSender(server)
+    address = client.getsockname()
+    assert sender.send_batch([(b"x" * 70000, address), (b"small", address)]) == 1
+    assert sender.dropped == 1
+    assert client.recv(BUFFER_SIZE) == b"small"
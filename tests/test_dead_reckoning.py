@@ -0,0 +1,138 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from square.common import esper
+from square.common.dead_reckoning import (
+    DR_FIELDS,
+    SNAP_DISTANCE,
+    project_axis,
+    project_columns,
+    project_numpy,
+    record_snapshot,
+)
+from square.common.esper import columns
+
+DELTA_TIMES = (0.0, 1 / 60, 1 / 30, 0.1)
+
+
+def make_rows(count, seed=1):
+    """Rows of (x, y, vx, vy, px, py, dvx, dvy, ax, ay), every tenth with a
+    snapshot far enough away to snap.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+        jump = 2 * SNAP_DISTANCE if i % 10 == 0 else rng.uniform(-5, 5)
+        rows.append(
+            [
+                x,
+                y,
+                rng.choice((-3.0, 0.0, 3.0)),
+                rng.choice((-3.0, 0.0, 3.0)),
+                x + jump,
+                y - jump,
+                rng.uniform(-3, 3),
+                rng.uniform(-3, 3),
+                rng.uniform(-30, 30),
+                rng.uniform(-30, 30),
+            ]
+        )
+    return rows
+
+
+def project_rows(rows, delta_time, skip):
+    """What DRProcessor does without a ColumnStore, one entity at a time."""
+    for slot, row in enumerate(rows):
+        if slot in skip:
+            continue
+        x, y, vx, vy, px, py, dvx, dvy, ax, ay = row
+        row[0] = project_axis(x, vx, px, dvx, ax, delta_time)
+        row[1] = project_axis(y, vy, py, dvy, ay, delta_time)
+
+
+def make_store(rows):
+    store = esper.ColumnStore("x", "y", "vx", "vy", *DR_FIELDS)
+    fields = ("x", "y", "vx", "vy") + DR_FIELDS
+    for entity, row in enumerate(rows, 1):
+        store.add(entity, **dict(zip(fields, row)))
+    return store
+
+
+def positions(store):
+    return list(zip(store.column("x"), store.column("y")))
+
+
+@pytest.fixture(
+    params=[
+        project_columns,
+        pytest.param(
+            project_numpy,
+            marks=pytest.mark.skipif(columns._np is None, reason="needs NumPy"),
+        ),
+    ]
+)
+def project(request):
+    return request.param
+
+
+@pytest.mark.parametrize("skip", [set(), {0, 7}])
+def test_columns_match_scalar(project, skip):
+    rows = make_rows(100)
+    store = make_store(rows)
+    for delta_time in DELTA_TIMES * 3:
+        project_rows(rows, delta_time, skip)
+        project(store, delta_time, skip)
+        assert positions(store) == [(row[0], row[1]) for row in rows]
+
+
+def test_snaps_to_far_snapshot():
+    assert project_axis(0.0, 0.0, 100.0, 0.0, 0.0, 1 / 60) == 100.0
+    near = project_axis(99.0, 0.0, 100.0, 0.0, 0.0, 1 / 60)
+    assert 99.0 < near < 100.0
+
+
+def test_skipped_rows_stay():
+    rows = make_rows(20)
+    store = make_store(rows)
+    project_columns(store, 1 / 60, {0, 7})
+    assert positions(store)[0] == (rows[0][0], rows[0][1])
+    assert positions(store)[7] == (rows[7][0], rows[7][1])
+    assert positions(store)[1] != (rows[1][0], rows[1][1])
+
+
+def new_dr_comp():
+    """The fields of a fresh DRComponent, without importing the client."""
+    return SimpleNamespace(
+        previous_position=(0, 0),
+        position=(0, 0),
+        previous_velocity=(0, 0),
+        velocity=(0, 0),
+        previous_time=0,
+        time=0,
+        acceleration=(0, 0),
+        snapshots=0,
+    )
+
+
+def test_record_snapshot_acceleration():
+    dr_comp = new_dr_comp()
+    # Nothing to compare the first velocity with
+    record_snapshot(dr_comp, (3.0, -3.0), (100.0, 50.0), 10.0)
+    assert dr_comp.acceleration == (0, 0)
+    assert dr_comp.position == (100.0, 50.0)
+
+    record_snapshot(dr_comp, (3.0, 0.0), (110.0, 45.0), 10.5)
+    assert dr_comp.acceleration == (0.0, 6.0)
+    assert dr_comp.previous_position == (100.0, 50.0)
+    assert dr_comp.previous_velocity == (3.0, -3.0)
+
+
+@pytest.mark.parametrize("server_time", [10.5, 10.0])
+def test_record_snapshot_repeated_or_reordered_time(server_time):
+    dr_comp = new_dr_comp()
+    record_snapshot(dr_comp, (0.0, 0.0), (0.0, 0.0), 10.5)
+    record_snapshot(dr_comp, (3.0, 3.0), (0.0, 0.0), server_time)
+    assert dr_comp.acceleration == (0, 0)
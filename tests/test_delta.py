@@ -0,0 +1,166 @@
+import random
+
+import pytest
+
+from square.common.networking import (
+    DeltaEncoder,
+    SnapshotDecoder,
+    SnapshotError,
+    encode_snapshot,
+    quantize,
+)
+from square.common.networking.snapshot import KIND_DELTA, decode_header
+
+
+def make_states(count, players=100, seed=1):
+    """Snapshots of players moving about, joining and leaving."""
+    rng = random.Random(seed)
+    state = {
+        net_id: quantize(0, 0, rng.uniform(0, 800), rng.uniform(0, 600))
+        for net_id in range(players)
+    }
+    states = []
+    for _ in range(count):
+        state = dict(state)
+        for net_id in rng.sample(sorted(state), len(state) // 10):
+            vx, vy, x, y = state[net_id]
+            state[net_id] = (vx + 1, vy, x + rng.randint(-50, 50), y)
+        if rng.random() < 0.3:
+            del state[rng.choice(sorted(state))]
+        if rng.random() < 0.3:
+            state[rng.randint(0, 1000)] = quantize(1, 1, 1, 1)
+        states.append(state)
+    return states
+
+
+def test_round_trip():
+    encoder = DeltaEncoder()
+    decoder = SnapshotDecoder()
+    for sequence, state in enumerate(make_states(20), 1):
+        received = None
+        for datagram in encoder.encode(sequence, state, sequence * 2, sequence):
+            received = decoder.feed(datagram)
+        assert received == (sequence, sequence * 2, sequence, state)
+        encoder.ack(decoder.ack)
+
+
+def test_deltas_against_acked_baseline():
+    encoder = DeltaEncoder()
+    states = make_states(3)
+    first = encoder.encode(1, states[0])
+    assert decode_header(first[0])[0] != KIND_DELTA
+    encoder.ack(1)
+    second = encoder.encode(2, states[1])
+    assert decode_header(second[0])[:3] == (KIND_DELTA, 2, 1)
+    assert sum(map(len, second)) < sum(map(len, first))
+
+
+def test_multi_part_in_any_order():
+    state = {net_id: quantize(0, 0, net_id, net_id) for net_id in range(500)}
+    datagrams = encode_snapshot(1, state)
+    assert len(datagrams) > 2
+    decoder = SnapshotDecoder()
+    shuffled = datagrams[::-1]
+    for datagram in shuffled[:-1]:
+        assert decoder.feed(datagram) is None
+        # A duplicate part changes nothing
+        assert decoder.feed(datagram) is None
+    assert decoder.feed(shuffled[-1]).state == state
+
+
+def test_loss_and_reordering():
+    """Snapshots are lost and reordered, and the client only acks what it
+    received. Every snapshot the client completes must be exact.
+    """
+    rng = random.Random(2)
+    states = make_states(200, players=200)
+    encoder = DeltaEncoder(history=8)
+    decoder = SnapshotDecoder(history=8)
+    in_flight = []
+    completed = 0
+    for sequence, state in enumerate(states, 1):
+        for datagram in encoder.encode(sequence, state):
+            if rng.random() > 0.2:
+                in_flight.append(datagram)
+        rng.shuffle(in_flight)
+        # Deliver some now and hold back the rest, which arrive late
+        half = len(in_flight) // 2
+        delivered, in_flight = in_flight[:half], in_flight[half:]
+        for datagram in delivered:
+            received = decoder.feed(datagram)
+            if received is not None:
+                assert received.state == states[received.sequence - 1]
+                completed += 1
+        encoder.ack(decoder.ack)
+    assert completed > 20
+
+
+def test_stale_snapshots_are_dropped():
+    states = make_states(2, players=10)
+    decoder = SnapshotDecoder()
+    newer = encode_snapshot(2, states[1])
+    older = encode_snapshot(1, states[0])
+    assert decoder.feed(newer[0]).sequence == 2
+    assert decoder.feed(older[0]) is None
+
+
+def test_unknown_baseline_is_dropped():
+    states = make_states(2, players=10)
+    decoder = SnapshotDecoder()
+    delta = encode_snapshot(2, states[1], 1, states[0])
+    assert decoder.feed(delta[0]) is None
+
+
+def test_baseline_evicted_during_reassembly():
+    big = {net_id: quantize(0, 0, net_id, net_id) for net_id in range(200)}
+    decoder = SnapshotDecoder(history=2)
+    decoder.feed(encode_snapshot(1, {1: quantize(0, 0, 1, 1)})[0])
+    decoder.feed(encode_snapshot(2, {1: quantize(0, 0, 2, 2)})[0])
+
+    delta = encode_snapshot(4, big, 1, {1: quantize(0, 0, 1, 1)})
+    assert len(delta) > 1
+    assert decoder.feed(delta[0]) is None
+    # Completing snapshot 3 pushes snapshot 1 out of the history
+    decoder.feed(encode_snapshot(3, {1: quantize(0, 0, 3, 3)})[0])
+    assert decoder.feed(delta[1]) is None
+    assert not decoder._pending
+    for datagram in delta[2:]:
+        assert decoder.feed(datagram) is None
+    assert decoder.ack == 3
+
+
+def test_parts_disagreeing_on_count():
+    state = {net_id: quantize(0, 0, net_id, net_id) for net_id in range(200)}
+    two_parts = encode_snapshot(1, dict(list(state.items())[:100]))
+    many_parts = encode_snapshot(1, state)
+    assert len(two_parts) < len(many_parts)
+    decoder = SnapshotDecoder()
+    decoder.feed(two_parts[0])
+    with pytest.raises(SnapshotError):
+        decoder.feed(many_parts[-1])
+
+
+def test_unexpected_kind():
+    decoder = SnapshotDecoder()
+    datagram = bytearray(encode_snapshot(1, {})[0])
+    datagram[1] = 4
+    with pytest.raises(SnapshotError):
+        decoder.feed(bytes(datagram))
+
+
+def test_corrupted_datagrams_raise_snapshot_error():
+    rng = random.Random(3)
+    encoder = DeltaEncoder()
+    decoder = SnapshotDecoder()
+    for sequence, state in enumerate(make_states(50, players=150), 1):
+        for datagram in encoder.encode(sequence, state):
+            datagram = bytearray(datagram)
+            for _ in range(rng.randint(0, 3)):
+                datagram[rng.randrange(len(datagram))] = rng.randrange(256)
+            if rng.random() < 0.5:
+                datagram = datagram[: rng.randrange(len(datagram))]
+            try:
+                decoder.feed(bytes(datagram))
+            except SnapshotError:
+                pass
+        encoder.ack(decoder.ack)
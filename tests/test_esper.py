@@ -0,0 +1,132 @@
+import pytest
+
+from square.common import esper
+
+
+class A:
+    pass
+
+
+class B:
+    pass
+
+
+@pytest.fixture(params=[esper.World, esper.ArchetypeWorld])
+def world(request):
+    return request.param()
+
+
+def entities(world, *component_types):
+    return sorted(entity for entity, _ in world.get_components(*component_types))
+
+
+def test_delete_entities_invalidates_queries(world):
+    first = world.create_entity(A(), B())
+    second = world.create_entity(A())
+    assert entities(world, A) == [first, second]
+    assert entities(world, A, B) == [first]
+
+    world.delete_entities([first], immediate=True)
+    assert entities(world, A) == [second]
+    assert entities(world, A, B) == []
+
+
+def test_delete_entities_missing_entity(world):
+    first = world.create_entity(A(), B())
+    second = world.create_entity(A())
+    entities(world, A)
+    entities(world, A, B)
+
+    with pytest.raises(KeyError):
+        world.delete_entities([first, 999], immediate=True)
+
+    # Entities before the missing one are deleted, and out of every query
+    assert not world.entity_exists(first)
+    assert entities(world, A) == [second]
+    assert entities(world, A, B) == []
+
+
+def test_delete_entities_deferred(world):
+    first = world.create_entity(A())
+    world.delete_entities([first])
+    assert not world.entity_exists(first)
+    world.process()
+    assert entities(world, A) == []
+
+
+class Mover(esper.Processor):
+    reads = (B,)
+    writes = (A,)
+
+    def process(self, delta_time):
+        for _, (a, b) in self.world.get_components(A, B):
+            a.x += b.speed * delta_time
+
+
+class Counter(esper.Processor):
+    reads = (B,)
+    writes = ()
+
+    def __init__(self):
+        self.seen = 0
+
+    def process(self, delta_time):
+        self.seen += len(self.world.get_component(B))
+
+
+@pytest.mark.parametrize("world_class", [esper.World, esper.ArchetypeWorld])
+def test_parallel_workers(world_class):
+    world = world_class(workers=2)
+    counter = Counter()
+    world.add_processor(Mover())
+    world.add_processor(counter)
+    for i in range(100):
+        a = A()
+        a.x = 0.0
+        b = B()
+        b.speed = float(i)
+        world.create_entity(a, b)
+
+    for _ in range(10):
+        world.process(delta_time=0.5)
+    assert counter.seen == 1000
+    assert sorted(a.x for _, a in world.get_component(A)) == [
+        i * 5.0 for i in range(100)
+    ]
+
+
+class Recorder(esper.Processor):
+    def __init__(self):
+        self.runs = []
+
+    def process(self, delta_time):
+        self.runs.append(delta_time)
+
+
+def test_interval(world):
+    recorder = Recorder()
+    recorder.interval = 0.25
+    world.add_processor(recorder)
+    for _ in range(10):
+        world.process(delta_time=0.1)
+    # The remainder carries over, so it runs every 2.5 calls on average
+    assert recorder.runs == pytest.approx([0.25] * 4)
+    world.process(delta_time=1.0)
+    assert recorder.runs[4:] == pytest.approx([1.0])
+
+
+def test_skip_unchanged(world):
+    recorder = Recorder()
+    recorder.reads = (A,)
+    recorder.skip_unchanged = True
+    world.add_processor(recorder)
+    world.create_entity(A())
+    world.process(delta_time=1)
+    world.process(delta_time=1)
+    assert len(recorder.runs) == 1
+    world.create_entity(B())
+    world.process(delta_time=1)
+    assert len(recorder.runs) == 1
+    world.mark_dirty(A)
+    world.process(delta_time=1)
+    assert len(recorder.runs) == 2
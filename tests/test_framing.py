@@ -0,0 +1,66 @@
+import pytest
+
+from square.common.networking import FrameBuffer, FramingError, encode_frame
+from square.common.networking.framing import FRAME_HEADER, MAX_FRAME_SIZE
+
+
+class Stream:
+    """Stands in for a socket, handing out `data` in chunks of `chunk` bytes."""
+
+    def __init__(self, data: bytes, chunk: int):
+        self.data = data
+        self.chunk = chunk
+
+    def recv_into(self, view) -> int:
+        size = min(self.chunk, len(view), len(self.data))
+        view[:size] = self.data[:size]
+        self.data = self.data[size:]
+        return size
+
+
+def receive(stream, buffer=None):
+    buffer = buffer or FrameBuffer()
+    messages = []
+    while buffer.recv_into(stream):
+        messages.extend(buffer.messages())
+    return messages
+
+
+MESSAGES = ["client_connect;;127.0.0.1:5000", "", "ünïcødé", "x" * 3000]
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, 1024, 1 << 16])
+def test_split_and_coalesced_frames(chunk):
+    data = b"".join(encode_frame(message) for message in MESSAGES * 5)
+    assert receive(Stream(data, chunk)) == MESSAGES * 5
+
+
+def test_frames_larger_than_the_buffer():
+    message = "y" * 100000
+    buffer = FrameBuffer(capacity=16)
+    data = encode_frame("small") + encode_frame(message) + encode_frame("end")
+    assert receive(Stream(data, 4096), buffer) == ["small", message, "end"]
+    assert len(buffer.buffer) >= 100000
+
+
+def test_partial_frame_waits():
+    buffer = FrameBuffer()
+    frame = encode_frame("hello")
+    stream = Stream(frame[:6], 1024)
+    buffer.recv_into(stream)
+    assert buffer.messages() == []
+    stream.data = frame[6:]
+    buffer.recv_into(stream)
+    assert buffer.messages() == ["hello"]
+
+
+def test_oversized_frame_is_rejected():
+    buffer = FrameBuffer()
+    buffer.recv_into(Stream(FRAME_HEADER.pack(MAX_FRAME_SIZE + 1), 1024))
+    with pytest.raises(FramingError):
+        buffer.messages()
+
+
+def test_oversized_message_is_not_encoded():
+    with pytest.raises(FramingError):
+        encode_frame("z" * (MAX_FRAME_SIZE + 1))
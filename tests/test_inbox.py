@@ -0,0 +1,40 @@
+import threading
+
+from square.common.inbox import CoalescingInbox, Inbox
+
+
+def test_inbox_keeps_arrival_order():
+    inbox = Inbox()
+    inbox.put(1)
+    inbox.put_many([2, 3])
+    assert len(inbox) == 3
+    assert inbox.drain() == [1, 2, 3]
+    assert inbox.drain() == []
+
+
+def test_inbox_from_threads():
+    inbox = Inbox()
+
+    def producer(offset):
+        for i in range(1000):
+            inbox.put(offset + i)
+
+    threads = [threading.Thread(target=producer, args=(n * 1000,)) for n in range(4)]
+    drained = []
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        drained.extend(inbox.drain())
+    for thread in threads:
+        thread.join()
+    drained.extend(inbox.drain())
+    assert sorted(drained) == list(range(4000))
+
+
+def test_coalescing_inbox_keeps_latest():
+    inbox = CoalescingInbox()
+    inbox.put("a", 1)
+    inbox.put_many([("b", 2), ("a", 3)])
+    assert len(inbox) == 2
+    assert inbox.drain() == {"a": 3, "b": 2}
+    assert inbox.drain() == {}
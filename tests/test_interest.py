@@ -0,0 +1,60 @@
+import random
+
+from square.server.interest import InterestGrid, InterestManager
+
+
+def test_grid_query_matches_brute_force():
+    rng = random.Random(3)
+    positions = {
+        key: (rng.uniform(-500, 500), rng.uniform(-500, 500)) for key in range(300)
+    }
+    grid = InterestGrid(cell_size=120)
+    grid.rebuild(positions)
+    for x, y, radius in [(0, 0, 100), (-480, 300, 250), (10, 10, 0), (0, 0, 1000)]:
+        expected = {
+            key
+            for key, (other_x, other_y) in positions.items()
+            if (other_x - x) ** 2 + (other_y - y) ** 2 <= radius * radius
+        }
+        assert set(grid.query(x, y, radius)) == expected
+
+
+def test_entity_oscillating_inside_the_margin_stays_visible():
+    interest = InterestManager(radius=100, hysteresis=20)
+    seen = []
+    # Crosses the enter radius back and forth, but never the exit radius
+    for x in [150, 99, 105, 119, 101, 95, 118, 110, 120, 100]:
+        interest.update({"viewer": (0.0, 0.0), "other": (float(x), 0.0)})
+        seen.append("other" in interest.visible_for("viewer"))
+    assert seen == [False] + [True] * 9
+
+    interest.update({"viewer": (0.0, 0.0), "other": (121.0, 0.0)})
+    assert interest.visible_for("viewer") == {"viewer"}
+    # Once out, it has to come back inside the enter radius
+    for x in (119, 101):
+        interest.update({"viewer": (0.0, 0.0), "other": (float(x), 0.0)})
+        assert interest.visible_for("viewer") == {"viewer"}
+    interest.update({"viewer": (0.0, 0.0), "other": (100.0, 0.0)})
+    assert interest.visible_for("viewer") == {"viewer", "other"}
+
+
+def test_visibility_is_per_viewer():
+    interest = InterestManager(radius=100, hysteresis=20)
+    interest.update({"a": (0.0, 0.0), "b": (90.0, 0.0), "c": (300.0, 0.0)})
+    assert interest.visible_for("a") == {"a", "b"}
+    # b walks out of a's view and into c's, each viewer keeps its own
+    interest.update({"a": (0.0, 0.0), "b": (210.0, 0.0), "c": (300.0, 0.0)})
+    assert interest.visible_for("c") == {"c", "b"}
+    assert interest.visible_for("a") == {"a"}
+
+
+def test_remove_forgets_the_viewer():
+    interest = InterestManager(radius=100, hysteresis=20)
+    interest.update({"a": (0.0, 0.0), "b": (50.0, 0.0)})
+    interest.visible_for("a")
+    interest.visible_for("b")
+    interest.remove("b")
+    # A new viewer reusing the id only enters from inside the radius
+    interest.update({"a": (0.0, 0.0), "b": (110.0, 0.0)})
+    assert interest.visible_for("a") == {"a"}
+    assert interest.visible_for("b") == {"b"}
@@ -0,0 +1,72 @@
+import pytest
+
+from square.common.interpolation import DRIFT, SnapshotBuffer, SnapshotInterpolator
+
+
+def test_buffer_interpolates_between_samples():
+    buffer = SnapshotBuffer()
+    assert buffer.sample(1.0) is None
+    buffer.add(1.0, 0.0, 10.0)
+    buffer.add(2.0, 10.0, 30.0)
+    buffer.add(4.0, 10.0, 10.0)
+    assert buffer.sample(1.0) == (0.0, 10.0)
+    assert buffer.sample(1.25) == pytest.approx((2.5, 15.0))
+    assert buffer.sample(3.0) == pytest.approx((10.0, 20.0))
+    assert buffer.sample(4.0) == (10.0, 10.0)
+
+
+def test_buffer_holds_the_nearest_sample_outside():
+    buffer = SnapshotBuffer()
+    buffer.add(1.0, 1.0, 1.0)
+    buffer.add(2.0, 2.0, 2.0)
+    assert buffer.sample(0.0) == (1.0, 1.0)
+    assert buffer.sample(5.0) == (2.0, 2.0)
+
+
+def test_buffer_discards_out_of_order_samples():
+    buffer = SnapshotBuffer()
+    assert buffer.add(2.0, 2.0, 2.0)
+    assert not buffer.add(1.0, 1.0, 1.0)
+    assert not buffer.add(2.0, 5.0, 5.0)
+    assert buffer.sample(1.0) == (2.0, 2.0)
+
+
+def test_buffer_size():
+    buffer = SnapshotBuffer(size=3)
+    for time in range(10):
+        buffer.add(float(time), float(time), 0.0)
+    assert [sample[0] for sample in buffer.samples] == [7.0, 8.0, 9.0]
+    assert buffer.sample(0.0) == (7.0, 0.0)
+
+
+def test_render_time_follows_the_quickest_arrival():
+    interpolator = SnapshotInterpolator(delay=0.1)
+    assert interpolator.render_time(0.0) is None
+    # Snapshots taken at server time 10 + t arrive 0.05 to 0.2 later
+    interpolator.observe(10.0, 100.05)
+    # A later arrival only moves the estimate a little
+    interpolator.observe(10.1, 100.3)
+    assert interpolator.offset == pytest.approx(10.0 - 100.05 - 0.15 * DRIFT)
+    interpolator.observe(10.2, 100.22)
+    assert interpolator.offset == pytest.approx(10.0 - 100.02)
+    assert interpolator.render_time(100.5) == pytest.approx(10.38)
+
+
+def test_render_time_drifts_towards_later_arrivals():
+    interpolator = SnapshotInterpolator()
+    interpolator.observe(0.0, 0.0)
+    interpolator.observe(1.0, 2.0)
+    assert interpolator.offset == pytest.approx(-DRIFT)
+
+
+def test_interpolator_buffers_per_entity():
+    interpolator = SnapshotInterpolator(size=4)
+    assert interpolator.push(1, 1.0, 0.0, 0.0)
+    assert interpolator.push(2, 1.0, 5.0, 5.0)
+    assert not interpolator.push(1, 0.5, 1.0, 1.0)
+    assert interpolator.buffers[1].samples.maxlen == 4
+    interpolator.remove(1)
+    interpolator.remove(1)
+    assert list(interpolator.buffers) == [2]
+    # Starts over from its next position
+    assert interpolator.push(1, 0.5, 1.0, 1.0)
@@ -0,0 +1,163 @@
+from collections import deque
+
+from square.common.application import Application
+from square.common.components import InputComponent, TransformComponent
+from square.common.networking import decode_inputs, dequantize, encode_inputs, quantize
+from square.common.processors.input_processor import (
+    DOWN,
+    LEFT,
+    RIGHT,
+    SPEED,
+    TARGET_QUEUED_INPUTS,
+    UP,
+    drop_commands,
+    queue_commands,
+    replay_commands,
+)
+
+STEP = 1 / 60
+PATTERN = [RIGHT] * 10 + [RIGHT | UP] * 5 + [0] * 3 + [LEFT | DOWN] * 7 + [UP] * 5
+
+
+def test_drop_commands():
+    commands = deque((sequence, RIGHT) for sequence in range(1, 6))
+    drop_commands(commands, 3)
+    assert [sequence for sequence, _ in commands] == [4, 5]
+    drop_commands(commands, 2)
+    assert len(commands) == 2
+    drop_commands(commands, 10)
+    assert not commands
+
+
+def test_replay_commands():
+    commands = [(1, RIGHT), (2, RIGHT | UP), (3, LEFT | RIGHT), (4, DOWN)]
+    assert replay_commands(commands, 10.0, 20.0) == (10.0 + 2 * SPEED, 20.0)
+    assert replay_commands([], 1.0, 2.0) == (1.0, 2.0)
+
+
+def test_server_catches_up_after_a_late_burst():
+    server = Application()
+    player = server.add_player("me", 100.0, 100.0)
+    inp = server.world.component_for_entity(player, InputComponent)
+    commands = [
+        (sequence, PATTERN[sequence % len(PATTERN)]) for sequence in range(1, 401)
+    ]
+    sent = 0
+    lag = []
+    for step in range(1, 401):
+        # A datagram with the last few commands every few steps, except for
+        # a while when they are held up and then arrive all at once
+        stalled = 100 <= step < 100 + 6 * TARGET_QUEUED_INPUTS
+        if step % TARGET_QUEUED_INPUTS == 0 and not stalled:
+            inputs = [bits for _, bits in commands[sent:step]]
+            queue_commands(inp, step, inputs)
+            sent = step
+        server.step(STEP)
+        lag.append(inp.received - inp.applied)
+
+    assert max(lag[:100]) < TARGET_QUEUED_INPUTS
+    assert max(lag[100:200]) > 2 * TARGET_QUEUED_INPUTS
+    # The backlog is worked off, back to the lag from before the stall, with
+    # every command simulated once
+    target = TARGET_QUEUED_INPUTS
+    assert lag[-2 * target : -target] == lag[100 - 2 * target : 100 - target]
+    simulated = commands[: inp.applied]
+    assert position(server, player) == replay_commands(simulated, 100.0, 100.0)
+
+
+class Link:
+    """Delivers datagrams a fixed number of steps after they were sent."""
+
+    def __init__(self, delay: int):
+        self.in_flight = deque([None] * delay)
+
+    def send(self, datagram):
+        self.in_flight.append(datagram)
+
+    def receive(self):
+        return self.in_flight.popleft()
+
+
+def position(application, entity):
+    transform = application.world.component_for_entity(entity, TransformComponent)
+    return transform.x, transform.y
+
+
+def run(steps, delay, teleport_at=None):
+    """Step a client predicting its own player and the server simulating
+    it, `delay` steps apart in each direction. The client reconciles with
+    every snapshot like ClientApplication.reconcile.
+    :return: Client and server positions after every step.
+    """
+    server = Application()
+    client = Application()
+    server_player = server.add_player("me", 100.0, 100.0)
+    client_player = client.add_player("me", 100.0, 100.0)
+    server_input = server.world.component_for_entity(server_player, InputComponent)
+    client_input = client.world.component_for_entity(client_player, InputComponent)
+    to_server = Link(delay)
+    to_client = Link(delay)
+    pending = deque(maxlen=60)
+    history = []
+
+    for sequence in range(1, steps + 1):
+        # Client: predict this step's command, and send every pending one
+        command = (sequence, PATTERN[sequence % len(PATTERN)])
+        client_input.commands.append(command)
+        pending.append(command)
+        client.step(STEP)
+        to_server.send(encode_inputs(sequence, 0, [bits for _, bits in pending]))
+
+        # Server: simulate, then snapshot its position and the last command
+        datagram = to_server.receive()
+        if datagram is not None:
+            newest, _, inputs = decode_inputs(datagram)
+            queue_commands(server_input, newest, inputs)
+        server.step(STEP)
+        if sequence == teleport_at:
+            transform = server.world.component_for_entity(
+                server_player, TransformComponent
+            )
+            transform.x += 50
+        player_data = quantize(0, 0, *position(server, server_player))
+        to_client.send((server_input.applied, player_data))
+
+        # Client: reconcile with the snapshot that arrived
+        snapshot = to_client.receive()
+        if snapshot is not None:
+            applied, player_data = snapshot
+            drop_commands(pending, applied)
+            _, _, x, y = dequantize(player_data)
+            transform = client.world.component_for_entity(
+                client_player, TransformComponent
+            )
+            transform.x, transform.y = replay_commands(pending, x, y)
+
+        history.append(
+            (position(client, client_player), position(server, server_player))
+        )
+    return history
+
+
+def test_prediction_runs_ahead_of_the_server():
+    delay = 4
+    history = run(120, delay)
+    # Commands reach the server one delay after the client predicted them,
+    # and reconciling with its snapshots never moves the client's player
+    for step in range(delay, len(history)):
+        assert history[step][1] == history[step - delay][0]
+
+
+def test_reconcile_replays_unacked_inputs_after_a_correction():
+    delay = 3
+    teleport_at = 40
+    history = run(120, delay, teleport_at)
+    expected = run(120, delay)
+    # The client only learns about the correction one delay later
+    for step in range(teleport_at + delay - 1):
+        assert history[step][0] == expected[step][0]
+    # From then on it keeps predicting from the corrected position, with
+    # the commands the server hadn't simulated yet replayed on top
+    for step in range(teleport_at + delay - 1, len(history)):
+        (x, y), (expected_x, expected_y) = history[step][0], expected[step][0]
+        assert (x, y) == (expected_x + 50, expected_y)
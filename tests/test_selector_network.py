@@ -0,0 +1,93 @@
+import socket
+import time
+
+import pytest
+
+from square.common.inbox import CoalescingInbox, Inbox
+from square.common.networking import encode_frame, encode_inputs
+from square.common.networking.framing import FRAME_HEADER, MAX_FRAME_SIZE
+from square.server.networking import SelectorNetwork
+
+
+@pytest.fixture
+def network():
+    tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    tcp_socket.bind(("127.0.0.1", 0))
+    tcp_socket.listen()
+    udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp_socket.bind(tcp_socket.getsockname())
+    network = SelectorNetwork(
+        tcp_socket, udp_socket, Inbox(), Inbox(), Inbox(), CoalescingInbox()
+    )
+    network.start()
+    yield network
+    network.selector.close()
+    tcp_socket.close()
+    udp_socket.close()
+
+
+def poll_until(network, inbox, timeout=2.0):
+    """Poll the network until something arrives in `inbox`."""
+    deadline = time.monotonic() + timeout
+    while not len(inbox) and time.monotonic() < deadline:
+        network.poll(0.01)
+    return inbox.drain()
+
+
+def connect(network):
+    """Connect a client and watch it like the server would."""
+    client = socket.create_connection(network.tcp_socket.getsockname())
+    [(server_side, id)] = poll_until(network, network.connection_inbox)
+    assert id == "{}:{}".format(*client.getsockname())
+    network.watch(server_side, id)
+    return client, server_side, id
+
+
+def test_partial_and_coalesced_frames(network):
+    client, server_side, id = connect(network)
+    frame = encode_frame("server_stats")
+    client.sendall(frame[:3])
+    network.poll(0.05)
+    assert not len(network.message_inbox)
+    client.sendall(frame[3:] + encode_frame("a") + encode_frame("b")[:2])
+    assert poll_until(network, network.message_inbox) == [
+        (id, "server_stats"),
+        (id, "a"),
+    ]
+    client.sendall(encode_frame("b")[2:])
+    assert poll_until(network, network.message_inbox) == [(id, "b")]
+    client.close()
+    server_side.close()
+
+
+def test_input_datagrams(network):
+    client, server_side, id = connect(network)
+    udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp.bind(client.getsockname())
+    address = network.udp_socket.getsockname()
+    udp.sendto(encode_inputs(4, 0, [1, 2, 3, 4]), address)
+    udp.sendto(encode_inputs(5, 0, [2, 3, 4, 5]), address)
+    udp.sendto(b"garbage", address)
+    time.sleep(0.05)
+    # Only the newest datagram of each client is kept
+    updates = poll_until(network, network.update_inbox)
+    assert updates == {id: (5, 0, bytes([2, 3, 4, 5]))}
+    udp.close()
+    client.close()
+    server_side.close()
+
+
+@pytest.mark.parametrize("oversized", [False, True])
+def test_disconnect_stops_watching(network, oversized):
+    client, server_side, id = connect(network)
+    watched = len(network.selector.get_map())
+    if oversized:
+        client.sendall(FRAME_HEADER.pack(MAX_FRAME_SIZE + 1))
+    else:
+        client.close()
+    assert poll_until(network, network.disconnect_inbox) == [id]
+    assert len(network.selector.get_map()) == watched - 1
+    # Unwatching again, as the server does when it removes the client, is fine
+    network.unwatch(server_side)
+    server_side.close()
+    client.close()
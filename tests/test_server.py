@@ -0,0 +1,77 @@
+import socket
+
+import pytest
+
+from square import BUFFER_SIZE, UDP_SEND_INTERVAL
+from square.common.inbox import CoalescingInbox, Inbox
+from square.common.networking import DeltaEncoder, SnapshotDecoder
+from square.server.application_server import ServerApplication
+from square.server.clock import Clock
+from square.server.networking import DatagramSender
+
+
+def test_snapshots_are_sent_every_few_steps():
+    server = ServerApplication("127.0.0.1", 0)
+    sends = []
+    server.send_udp = sends.append
+    steps = round(1 / server.timestep.step)
+    for _ in range(steps):
+        server.step(server.timestep.step)
+    assert sends == pytest.approx([UDP_SEND_INTERVAL] * round(1 / UDP_SEND_INTERVAL))
+
+
+def test_disconnects_are_handled_between_updates():
+    now = [0.0]
+    server = ServerApplication("127.0.0.1", 0, interest_radius=0)
+    server.clock = Clock(time_function=lambda: now[0])
+    server.started = server.last_update = 0.0
+    server.client_connection_inbox = Inbox()
+    server.client_disconnect_inbox = Inbox()
+    server.client_message_inbox = Inbox()
+    server.client_update_inbox = CoalescingInbox()
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server_socket.bind(("127.0.0.1", 0))
+    server.udp_sender = DatagramSender(server_socket)
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    client.bind(("127.0.0.1", 0))
+    client.settimeout(1)
+
+    id = "{}:{}".format(*client.getsockname())
+    server.add_players([(id, 100, 100)])
+    server.allocate_net_id(id)
+    server.snapshot_encoders[id] = DeltaEncoder()
+    server.client_addresses[id] = client.getsockname()
+
+    events = []
+
+    def remove_clients(ids):
+        events.append("remove")
+        server.remove_players(ids)
+
+    process = server.world.process
+
+    def record_process(**kwargs):
+        events.append("process")
+        # The client disconnects while the world is running
+        if len(events) == 1:
+            server.client_disconnect_inbox.put(id)
+        process(**kwargs)
+
+    server.remove_clients = remove_clients
+    server.world.process = record_process
+
+    steps = round(UDP_SEND_INTERVAL / server.timestep.step)
+    now[0] = steps * server.timestep.step + 0.001
+    server.on_update(0)
+    # The snapshot still went out, and the player was left alone until
+    # the world was done with it
+    assert events == ["process"] * steps
+    snapshot = SnapshotDecoder().feed(client.recv(BUFFER_SIZE))
+    assert list(snapshot.state) == [server.net_ids[id]]
+
+    now[0] += server.timestep.step
+    server.on_update(0)
+    assert events[steps:] == ["remove", "process"]
+    assert not server.players
+    client.close()
+    server_socket.close()
@@ -0,0 +1,81 @@
+import threading
+from multiprocessing import Pipe
+
+import pytest
+
+from square.common.components import TransformComponent
+from square.common.processors.input_processor import RIGHT, SPEED
+from square.server.sharding import ShardedServer, ZoneMap
+from square.server.sharding.shard import JOIN, LEAVE, Shard
+
+STEP = 1 / 60
+
+
+@pytest.fixture
+def sharded():
+    """A front with its shards served by threads instead of processes."""
+    server = ShardedServer("127.0.0.1", 0, shards=2, zone_width=100)
+    server.send_udp = lambda delta_time: None
+    threads = []
+    for zone in range(2):
+        connection, shard_connection = Pipe()
+        shard = Shard(zone, server.zone_map)
+        thread = threading.Thread(target=shard.serve, args=(shard_connection,))
+        thread.start()
+        server.shard_connections.append(connection)
+        threads.append((shard, thread))
+    yield server, [shard for shard, _ in threads]
+    server.stop_shards()
+    for _, thread in threads:
+        thread.join()
+
+
+def test_front_deletes_players_that_leave(sharded):
+    server, _ = sharded
+    for i in range(50):
+        server.add_players([(str(i), 10.0, 10.0)])
+        server.remove_players([str(i)])
+
+    assert not server.players
+    assert not server.world.get_component(TransformComponent)
+    assert server.world.profile()["entities"] == 0
+    assert [event for event, *_ in server.shard_events[0]] == [JOIN, LEAVE] * 50
+
+
+def test_player_is_handed_off_between_shards(sharded):
+    server, shards = sharded
+    player = server.add_player("walker", 90.0, 10.0)
+    transform = server.world.component_for_entity(player, TransformComponent)
+    owners = []
+    for sequence in range(1, 41):
+        server.queue_inputs("walker", sequence, [RIGHT])
+        server.step(STEP)
+        owners.append(
+            [
+                zone
+                for zone, shard in enumerate(shards)
+                if "walker" in shard.application.players
+            ]
+        )
+        # The front mirrors every step, including the one handing it off
+        assert transform.x == 90.0 + SPEED * sequence
+
+    # Zone 0 keeps the player until it is past the hysteresis margin
+    _, high = server.zone_map.bounds(0)
+    crossed = sum(90.0 + SPEED * sequence < high for sequence in range(1, 41))
+    assert owners[:crossed] == [[0]] * crossed
+    assert owners[-1] == [1]
+    assert all(len(zones) <= 1 for zones in owners)
+    assert server.owners == {"walker": 1}
+
+
+def test_zone_map():
+    zone_map = ZoneMap(3, 100)
+    assert [zone_map.zone_for(x) for x in (-50, 0, 99, 100, 250, 5000)] == [
+        0,
+        0,
+        0,
+        1,
+        2,
+        2,
+    ]
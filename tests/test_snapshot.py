@@ -0,0 +1,128 @@
+import pytest
+
+from square import BUFFER_SIZE
+from square.common.networking import (
+    SnapshotError,
+    decode_inputs,
+    dequantize,
+    encode_inputs,
+    encode_snapshot,
+    quantize,
+)
+from square.common.networking.snapshot import (
+    ALL_FIELDS,
+    HEADER,
+    KIND_DELTA,
+    KIND_KEYFRAME,
+    POSITION_X,
+    REMOVED,
+    decode_header,
+    decode_records,
+)
+
+
+def decode(datagrams):
+    records = []
+    for datagram in datagrams:
+        header = decode_header(datagram)
+        records.extend(decode_records(datagram, header[-1]))
+    return records
+
+
+def test_quantize_round_trip():
+    assert dequantize(quantize(3.0, -1.5, 100.25, -20.0625)) == (
+        3.0,
+        -1.5,
+        100.25,
+        -20.0625,
+    )
+
+
+def test_quantize_clamps():
+    vx, vy, x, y = quantize(1e9, -1e9, 1e12, -1e12)
+    assert (vx, vy) == (0x7FFF, -0x7FFF)
+    assert (x, y) == (0x7FFFFFFF, -0x7FFFFFFF)
+
+
+def test_keyframe():
+    state = {1: quantize(3, 0, 10, 20), 7: quantize(0, -3, 5.5, 6.5)}
+    datagrams = encode_snapshot(9, state, input_sequence=42, server_time=1.5)
+    assert len(datagrams) == 1
+    assert decode_header(datagrams[0]) == (KIND_KEYFRAME, 9, 0, 42, 1.5, 0, 1, 2)
+    assert decode(datagrams) == [
+        (net_id, ALL_FIELDS, entity) for net_id, entity in state.items()
+    ]
+
+
+def test_delta_only_sends_changes():
+    baseline = {1: quantize(3, 0, 10, 20), 2: quantize(0, 0, 0, 0)}
+    state = {1: quantize(3, 0, 13, 20), 3: quantize(1, 1, 1, 1)}
+    datagrams = encode_snapshot(5, state, 4, baseline)
+    assert decode_header(datagrams[0])[:3] == (KIND_DELTA, 5, 4)
+    assert sorted(decode(datagrams)) == [
+        (1, POSITION_X, (13 * 16,)),
+        (2, REMOVED, ()),
+        (3, ALL_FIELDS, quantize(1, 1, 1, 1)),
+    ]
+
+
+def test_large_snapshot_is_split():
+    state = {net_id: quantize(0, 0, net_id, net_id) for net_id in range(500)}
+    datagrams = encode_snapshot(1, state)
+    assert len(datagrams) > 1
+    assert all(len(datagram) <= BUFFER_SIZE for datagram in datagrams)
+    headers = [decode_header(datagram) for datagram in datagrams]
+    assert [header[5] for header in headers] == list(range(len(datagrams)))
+    assert {header[6] for header in headers} == {len(datagrams)}
+    assert dict((net_id, values) for net_id, _, values in decode(datagrams)) == state
+
+
+def test_server_time_wraps():
+    datagram = encode_snapshot(1, {}, server_time=2**32 / 1000 + 2)[0]
+    assert decode_header(datagram)[4] == 2.0
+
+
+@pytest.mark.parametrize(
+    "datagram",
+    [
+        b"",
+        b"\x04\x01",
+        b"\x03" + bytes(HEADER.size - 1),
+    ],
+)
+def test_bad_header(datagram):
+    with pytest.raises(SnapshotError):
+        decode_header(datagram)
+
+
+def test_truncated_records():
+    datagram = encode_snapshot(1, {1: quantize(0, 0, 1, 1)})[0]
+    with pytest.raises(SnapshotError):
+        decode_records(datagram[:-1], 1)
+    with pytest.raises(SnapshotError):
+        decode_records(datagram + b"\x00", 1)
+
+
+def test_inputs_round_trip():
+    datagram = encode_inputs(100, 7, [1, 2, 4, 8])
+    assert decode_inputs(datagram) == (100, 7, bytes([1, 2, 4, 8]))
+
+
+@pytest.mark.parametrize(
+    "datagram",
+    [
+        encode_inputs(100, 7, [1, 2])[:-1],
+        encode_inputs(1, 7, [1]) + b"\x00",
+        # More commands than there have been since the first one
+        encode_inputs(1, 7, [1, 2]),
+        encode_snapshot(1, {})[0],
+    ],
+)
+def test_bad_inputs(datagram):
+    with pytest.raises(SnapshotError):
+        decode_inputs(datagram)
+
+
+def test_too_many_inputs():
+    with pytest.raises(SnapshotError):
+        encode_inputs(1000, 0, [0] * 256)
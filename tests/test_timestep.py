@@ -0,0 +1,48 @@
+import pytest
+
+from square.common.timestep import FixedTimestep
+
+
+def test_accumulates_partial_steps():
+    timestep = FixedTimestep(step=0.1)
+    assert timestep.advance(0.05) == 0
+    assert timestep.advance(0.06) == 1
+    assert timestep.accumulator == pytest.approx(0.01)
+    assert timestep.advance(0.19) == 2
+    assert timestep.steps == 3
+    assert timestep.alpha == pytest.approx(0.0, abs=1e-9)
+
+
+def test_irregular_frames_lose_no_steps():
+    timestep = FixedTimestep(step=1 / 60)
+    frames = [0.001, 0.03, 0.016, 0.005, 0.04, 0.0, 0.025] * 20
+    for delta_time in frames:
+        timestep.advance(delta_time)
+    simulated = timestep.steps * timestep.step + timestep.accumulator
+    assert simulated == pytest.approx(sum(frames))
+    assert timestep.accumulator < timestep.step
+    assert timestep.dropped == 0
+
+
+def test_max_steps_per_call():
+    timestep = FixedTimestep(step=0.01, max_steps=3, max_lag=1.0)
+    assert timestep.advance(0.1) == 3
+    assert timestep.advance(0) == 3
+    assert timestep.advance(0) == 3
+    assert timestep.advance(0) == 1
+    assert timestep.advance(0) == 0
+    assert timestep.dropped == 0
+
+
+def test_max_lag_drops_the_surplus():
+    timestep = FixedTimestep(step=0.01, max_steps=5, max_lag=0.05)
+    assert timestep.advance(2.0) == 5
+    assert timestep.dropped == pytest.approx(1.95)
+    assert timestep.advance(0) == 0
+    assert timestep.steps == 5
+
+
+def test_alpha():
+    timestep = FixedTimestep(step=0.1)
+    timestep.advance(0.125)
+    assert timestep.alpha == pytest.approx(0.25)